@@ -0,0 +1 @@
+"""Offline benchmarks for the bot (not loaded by main.py)."""
@@ -0,0 +1,247 @@
+"""
+Micro-benchmarks for the moderation checks.
+
+Runs check_profanity, check_spam, contains_banned_words,
+contains_allowed_words and the full ModerationPipeline over a generated
+corpus (short chat, long pastes, raid text, Unicode-heavy text) and
+reports throughput, latency percentiles and peak allocation per message.
+
+    python -m benchmarks.moderation                          # print results
+    python -m benchmarks.moderation -o bench.json            # save them
+    python -m benchmarks.moderation --compare bench.json     # fail on regressions
+
+With --compare the run exits with status 1 if any function/corpus pair
+lost more than --max-regression percent of its throughput.
+"""
+
+import argparse
+import asyncio
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from words.BANNED_WORDS import bad_words
+from words.ALLOWED_WORDS import chill_profane_words
+from words.SPAM_WORDS import spam_words
+from bot.helpers import check_profanity, check_spam, contains_allowed_words, contains_banned_words
+from bot.moderation import ModerationPipeline
+
+_CHAT_WORDS = (
+    "hey anyone going to the meeting tonight i think it starts at 7 in the lab lol same "
+    "does anybody have notes for ece lecture thanks so much the project demo is next week "
+    "who wants to grab food after yeah sounds good what room is it in nvm found it "
+    "congrats on the internship that's awesome can someone help me with the circuit hw"
+).split()
+_EMOJI = ["😂", "👍", "🔥", "🎉", "💀", "🙏", "❤️", "👀"]
+_UNICODE_WORDS = [
+    "ｈｅｌｌｏ", "𝐟𝐫𝐞𝐞", "сlass", "аss", "n​ice", "é̃x̂ṫr̈ä", "日本語", "한국어", "ÜBER", "ﬁnal",
+    "Ⓐⓑⓒ", "ℌ𝔢𝔩𝔩𝔬", "naïve", "Ｆｒｅｅ ｔｉｃｋｅｔｓ", "ɡood", "straße",
+]
+_SPAM_PHRASES = list(spam_words)
+
+
+def _short_chat(rng: random.Random) -> str:
+    words = [rng.choice(_CHAT_WORDS) for _ in range(max(1, int(rng.expovariate(1 / 8))))]
+    roll = rng.random()
+    if roll < 0.03:
+        words.insert(rng.randrange(len(words) + 1), rng.choice(bad_words))
+    elif roll < 0.10:
+        words.insert(rng.randrange(len(words) + 1), rng.choice(chill_profane_words))
+    if rng.random() < 0.2:
+        words.append(rng.choice(_EMOJI))
+    return " ".join(words)
+
+
+def _long_paste(rng: random.Random) -> str:
+    target = rng.randint(1500, 4000)
+    parts = []
+    length = 0
+    while length < target:
+        line = " ".join(rng.choice(_CHAT_WORDS) for _ in range(rng.randint(5, 15)))
+        if rng.random() < 0.3:
+            line = f"    {line.replace(' ', '_')}({rng.randint(0, 99)});"
+        parts.append(line)
+        length += len(line) + 1
+    return "\n".join(parts)[:target]
+
+
+def _raid(rng: random.Random) -> str:
+    phrases = rng.sample(_SPAM_PHRASES, rng.randint(3, 6))
+    text = " ".join(phrases)
+    if rng.random() < 0.5:
+        text = "@everyone " + text
+    return text.upper() if rng.random() < 0.3 else text
+
+
+def _unicode_heavy(rng: random.Random) -> str:
+    words = []
+    for _ in range(rng.randint(3, 25)):
+        words.append(rng.choice(_UNICODE_WORDS) if rng.random() < 0.6 else rng.choice(_CHAT_WORDS))
+    return " ".join(words)
+
+
+# corpus name -> (generator, messages at scale 1.0)
+CORPORA = {
+    "short_chat": (_short_chat, 5000),
+    "long_paste": (_long_paste, 200),
+    "raid": (_raid, 2000),
+    "unicode": (_unicode_heavy, 1000),
+}
+
+
+def build_corpus(seed: int = 0, scale: float = 1.0) -> dict[str, list[str]]:
+    rng = random.Random(seed)
+    corpus = {}
+    for name, (generate, count) in CORPORA.items():
+        messages = [generate(rng) for _ in range(max(1, int(count * scale)))]
+        if name == "raid":
+            # Raids repeat themselves: most messages are copies of a few templates
+            messages = [rng.choice(messages[:20]) if rng.random() < 0.8 else message for message in messages]
+        corpus[name] = messages
+    return corpus
+
+
+def _pipeline_check():
+    """classify() as a plain callable; a fresh pipeline per corpus so caches start cold."""
+    pipeline = ModerationPipeline()
+    loop = asyncio.new_event_loop()
+
+    def check(text: str):
+        return loop.run_until_complete(pipeline.classify(text))
+    return check
+
+
+FUNCTIONS = {
+    "check_profanity": lambda: check_profanity,
+    "check_spam": lambda: check_spam,
+    "contains_banned_words": lambda: contains_banned_words,
+    "contains_allowed_words": lambda: contains_allowed_words,
+    "pipeline": _pipeline_check,
+}
+
+
+def _percentile(sorted_values: list[int], fraction: float) -> float:
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def measure(func, messages: list[str], alloc_sample: int = 200) -> dict:
+    """Time each call, then measure peak allocation on a sample with tracemalloc."""
+    for message in messages[:50]:
+        func(message)  # warm-up
+
+    latencies = []
+    perf = time.perf_counter_ns
+    for message in messages:
+        start = perf()
+        func(message)
+        latencies.append(perf() - start)
+    total_ns = sum(latencies)
+    latencies.sort()
+
+    peaks = []
+    tracemalloc.start()
+    try:
+        for message in messages[:alloc_sample]:
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+            func(message)
+            peaks.append(tracemalloc.get_traced_memory()[1] - before)
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "messages": len(messages),
+        "msgs_per_sec": len(messages) / (total_ns / 1e9) if total_ns else float("inf"),
+        "p50_us": _percentile(latencies, 0.50) / 1000,
+        "p99_us": _percentile(latencies, 0.99) / 1000,
+        "p999_us": _percentile(latencies, 0.999) / 1000,
+        "peak_alloc_bytes": sum(peaks) / len(peaks) if peaks else 0,
+    }
+
+
+def run(seed: int = 0, scale: float = 1.0, functions: list[str] | None = None) -> dict:
+    corpus = build_corpus(seed, scale)
+    results = {}
+    for name in functions or FUNCTIONS:
+        results[name] = {}
+        for corpus_name, messages in corpus.items():
+            results[name][corpus_name] = measure(FUNCTIONS[name](), messages)
+    return {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "seed": seed,
+            "scale": scale,
+        },
+        "results": results,
+    }
+
+
+def print_report(report: dict) -> None:
+    print(f"{'function':<24}{'corpus':<12}{'msgs/s':>12}{'p50 µs':>10}{'p99 µs':>10}{'p999 µs':>10}{'peak B':>10}")
+    for name, by_corpus in report["results"].items():
+        for corpus_name, r in by_corpus.items():
+            print(
+                f"{name:<24}{corpus_name:<12}{r['msgs_per_sec']:>12,.0f}{r['p50_us']:>10.1f}"
+                f"{r['p99_us']:>10.1f}{r['p999_us']:>10.1f}{r['peak_alloc_bytes']:>10,.0f}"
+            )
+
+
+def compare(report: dict, baseline: dict, max_regression: float) -> list[str]:
+    """Function/corpus pairs whose throughput fell by more than max_regression percent."""
+    regressions = []
+    for name, by_corpus in report["results"].items():
+        for corpus_name, r in by_corpus.items():
+            base = baseline.get("results", {}).get(name, {}).get(corpus_name)
+            if not base:
+                continue
+            change = (r["msgs_per_sec"] - base["msgs_per_sec"]) / base["msgs_per_sec"] * 100
+            line = (
+                f"{name}/{corpus_name}: {base['msgs_per_sec']:,.0f} -> {r['msgs_per_sec']:,.0f} msgs/s "
+                f"({change:+.1f}%), p99 {base['p99_us']:.1f} -> {r['p99_us']:.1f} µs"
+            )
+            print(line)
+            if change < -max_regression:
+                regressions.append(line)
+    return regressions
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("-o", "--output", help="save results as JSON to this path")
+    parser.add_argument("--compare", metavar="BASELINE", help="compare against a saved JSON run")
+    parser.add_argument("--max-regression", type=float, default=10.0,
+                        help="allowed throughput loss in percent before --compare fails (default 10)")
+    parser.add_argument("--scale", type=float, default=1.0, help="multiply the corpus sizes")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--function", action="append", choices=list(FUNCTIONS), dest="functions",
+                        help="only benchmark this function (repeatable)")
+    args = parser.parse_args(argv)
+
+    report = run(args.seed, args.scale, args.functions)
+    print_report(report)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Saved results to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        print(f"\nCompared with {args.compare} (max regression {args.max_regression:.0f}%):")
+        regressions = compare(report, baseline, args.max_regression)
+        if regressions:
+            print(f"❌ {len(regressions)} regression(s) over {args.max_regression:.0f}%")
+            return 1
+        print("✅ No regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,260 @@
+"""
+Offline replay of gateway message events through the real on_message handler.
+
+Messages are fed to the handlers registered by bot.events.setup_events at
+a fixed rate, against in-memory stand-ins for messages, channels, users
+and the REST API, so nothing talks to Discord. The report covers handler
+latency, event-loop lag, how many handlers were in flight at once, the
+REST actions the bot took (deletes, bulk deletes, warnings, DMs) and
+peak memory.
+
+    python -m benchmarks.replay --synthetic raid --count 10000 --rate 200
+    python -m benchmarks.replay --synthetic chat --count 5000 --rate 50
+    python -m benchmarks.replay --file events.jsonl --rate 100
+
+Event files are JSON lines: {"author": 1, "content": "...", "channel": 10,
+"bot": false, "guild": 1}; only "author" and "content" are required.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import resource
+import sys
+import time
+from collections import Counter
+import discord
+from discord.ext import commands
+from bot.events import setup_events
+from bot.logs import setup_logging
+from benchmarks.moderation import CORPORA, build_corpus
+
+_WARNING_WAIT_SECONDS = 1.0
+
+
+class FakeREST:
+    """Counts REST actions and simulates their round-trip time."""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.calls = Counter()
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def call(self, action: str, count: int = 1) -> None:
+        self.calls[action] += 1
+        if count != 1:
+            self.calls[f"{action}_messages"] += count
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.latency)
+        finally:
+            self.in_flight -= 1
+
+
+class FakeGuild:
+    def __init__(self, guild_id: int):
+        self.id = guild_id
+
+
+class FakeUser:
+    def __init__(self, user_id: int, rest: FakeREST, bot: bool = False):
+        self.id = user_id
+        self.name = f"user{user_id}"
+        self.bot = bot
+        self.mention = f"<@{user_id}>"
+        self._rest = rest
+
+    async def send(self, *args, **kwargs):
+        await self._rest.call("dm")
+
+    def __str__(self) -> str:
+        return self.name
+
+
+class FakeMessage:
+    def __init__(self, message_id: int, content: str, author, channel, guild):
+        self.id = message_id
+        self.content = content
+        self.author = author
+        self.channel = channel
+        self.guild = guild
+
+    async def delete(self):
+        await self.channel.rest.call("delete")
+
+
+class FakeChannel:
+    def __init__(self, channel_id: int, guild, rest: FakeREST, ids):
+        self.id = channel_id
+        self.guild = guild
+        self.rest = rest
+        self._ids = ids
+
+    async def send(self, *args, **kwargs):
+        await self.rest.call("send")
+        return FakeMessage(next(self._ids), "", None, self, self.guild)
+
+    async def delete_messages(self, messages, reason=None):
+        await self.rest.call("bulk_delete", len(messages))
+
+    def get_partial_message(self, message_id: int):
+        return FakeMessage(message_id, "", None, self, self.guild)
+
+    def __str__(self) -> str:
+        return f"#channel-{self.id}"
+
+
+def synthetic_events(kind: str, count: int, seed: int = 0) -> list[dict]:
+    """A chat-like stream, or a raid where many accounts post the same few spam texts."""
+    rng = random.Random(seed)
+    corpus = build_corpus(seed, scale=max(count / sum(size for _, size in CORPORA.values()), 0.01))
+    if kind == "raid":
+        raid_texts = corpus["raid"]
+        return [
+            {"author": 10_000 + rng.randrange(500), "content": rng.choice(raid_texts),
+             "channel": rng.randrange(3), "bot": rng.random() < 0.3}
+            for _ in range(count)
+        ]
+    chat = corpus["short_chat"] + corpus["unicode"] + corpus["long_paste"]
+    return [
+        {"author": rng.randrange(2000), "content": rng.choice(chat), "channel": rng.randrange(10)}
+        for _ in range(count)
+    ]
+
+
+def load_events(path: str) -> list[dict]:
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def _percentile(sorted_values: list[float], fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))]
+
+
+async def replay(events: list[dict], rate: float, rest_latency: float) -> dict:
+    rest = FakeREST(rest_latency)
+    bot = commands.Bot(command_prefix='!', intents=discord.Intents.default())
+    setup_events(bot)
+
+    ids = iter(range(1, 1 << 62))
+    guilds: dict[int, FakeGuild] = {}
+    channels: dict[int, FakeChannel] = {}
+    users: dict[int, FakeUser] = {}
+    commands_seen = 0
+
+    async def process_commands(message):
+        nonlocal commands_seen
+        commands_seen += 1
+
+    # Stand-ins for what on_ready and the gateway would normally provide
+    bot.process_commands = process_commands
+    bot.get_channel = channels.get
+    bot.reaper.save_file = None
+    bot.reaper.start()
+
+    messages = []
+    for event in events:
+        guild = guilds.setdefault(event.get("guild", 1), FakeGuild(event.get("guild", 1)))
+        channel_id = event.get("channel", 0)
+        if channel_id not in channels:
+            channels[channel_id] = FakeChannel(channel_id, guild, rest, ids)
+        author = users.setdefault(event["author"], FakeUser(event["author"], rest, event.get("bot", False)))
+        messages.append(FakeMessage(next(ids), event["content"], author, channels[channel_id], guild))
+
+    latencies: list[float] = []
+    lags: list[float] = []
+    in_flight = 0
+    max_in_flight = 0
+
+    async def handle(message):
+        nonlocal in_flight
+        started = time.perf_counter()
+        try:
+            await bot.on_message(message)
+        finally:
+            latencies.append(time.perf_counter() - started)
+            in_flight -= 1
+
+    # Dispatch like discord.py does: one task per gateway event
+    tasks = []
+    start = time.perf_counter()
+    for i, message in enumerate(messages):
+        due = start + i / rate
+        delay = due - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        lags.append(time.perf_counter() - due)
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        tasks.append(asyncio.create_task(handle(message)))
+    await asyncio.gather(*tasks)
+    replay_seconds = time.perf_counter() - start
+
+    # Let raid-mode batches flush and warnings go out
+    await bot.enforcer.wait_idle()
+    await asyncio.sleep(_WARNING_WAIT_SECONDS)
+
+    latencies.sort()
+    lags.sort()
+    stats = bot.moderation.stats
+    return {
+        "messages": len(messages),
+        "target_rate": rate,
+        "achieved_rate": len(messages) / replay_seconds if replay_seconds else 0.0,
+        "handler_p50_ms": _percentile(latencies, 0.50) * 1000,
+        "handler_p99_ms": _percentile(latencies, 0.99) * 1000,
+        "handler_max_ms": latencies[-1] * 1000 if latencies else 0.0,
+        "loop_lag_p99_ms": _percentile(lags, 0.99) * 1000,
+        "loop_lag_max_ms": lags[-1] * 1000 if lags else 0.0,
+        "max_handlers_in_flight": max_in_flight,
+        "max_rest_in_flight": rest.max_in_flight,
+        "flagged": {"spam": stats.spam, "banned": stats.banned},
+        "stages": dict(stats.stages),
+        "rest_calls": dict(rest.calls),
+        "rest_calls_total": sum(n for action, n in rest.calls.items() if not action.endswith("_messages")),
+        "pending_deletions": len(bot.reaper),
+        "commands_processed": commands_seen,
+        # Linux reports ru_maxrss in KiB
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+
+
+def print_report(report: dict) -> None:
+    width = max(len(key) for key in report)
+    for key, value in report.items():
+        if isinstance(value, float):
+            value = f"{value:,.2f}"
+        print(f"{key:<{width}}  {value}")
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--file", help="JSON-lines file of message events")
+    source.add_argument("--synthetic", choices=["chat", "raid"], help="generate a stream instead")
+    parser.add_argument("--count", type=int, default=10_000, help="messages to generate (with --synthetic)")
+    parser.add_argument("--rate", type=float, default=200.0, help="messages per second to replay at")
+    parser.add_argument("--rest-latency", type=float, default=0.05, help="simulated REST round trip in seconds")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-q", "--quiet", action="store_true", help="don't show the bot's own log output")
+    parser.add_argument("-o", "--output", help="save the report as JSON to this path")
+    args = parser.parse_args(argv)
+
+    events = load_events(args.file) if args.file else synthetic_events(args.synthetic, args.count, args.seed)
+    # The bot's real logging setup, so its cost is part of the measurement
+    setup_logging(console=not args.quiet, log_file=None)
+    report = asyncio.run(replay(events, args.rate, args.rest_latency))
+    print_report(report)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,11 +2,16 @@
 
 import os
 import json
+import logging
 import discord
 from discord.ext import commands
-import requests
+from bot import fun
+from bot.fun import fun_cooldown
 from bot.views import MajorView, VerifyView, YearView
-from bot.config import MAJOR_YEAR_SELECT_SAVE_FILE, VERIFY_SAVE_FILE, VERIFY_CHANNEL_ID, ANNOUNCEMENTS_CHANNEL_ID, RULES_SAVE_FILE, RULES_CHANNEL_ID, REMINDER_INTERVALS
+from bot.event_store import EventRecord, reminder_type_code
+from bot.config import MAJOR_YEAR_SELECT_SAVE_FILE, VERIFY_SAVE_FILE, VERIFY_CHANNEL_ID, ANNOUNCEMENTS_CHANNEL_ID, RULES_SAVE_FILE, RULES_CHANNEL_ID, REMINDER_INTERVALS, FUN_USER_RATE, FUN_CHANNEL_RATE
+
+log = logging.getLogger(__name__)
 
 
 def setup_commands(bot: commands.Bot):
@@ -64,9 +69,8 @@ def setup_commands(bot: commands.Bot):
         )
         embed.set_footer(text="If you experience any issues, message an officer.")
 
-        # Get supabase client from bot's attributes
-        supabase = getattr(bot, 'supabase', None)
-        view = VerifyView(supabase_client=supabase)
+        # Tokens are issued by the bot-wide store (None without Supabase)
+        view = VerifyView(getattr(bot, 'verification_tokens', None))
         msg = await verify_channel.send(embed=embed, view=view)
 
         # save the message + channel so we know it exists
@@ -84,18 +88,15 @@ def setup_commands(bot: commands.Bot):
     @commands.has_permissions(manage_guild=True)
     async def checkevents(ctx):
         """Check upcoming events and reminder status"""
-        supabase = getattr(bot, 'supabase', None)
-        if not supabase:
+        store = getattr(bot, 'event_store', None)
+        if not store:
             return await ctx.send("❌ Supabase not configured!")
         
         try:
             from datetime import datetime, timedelta, timezone
-            # Get upcoming events (next 30 days)
+            # Upcoming events (next 30 days) from the shared store
+            events = await store.upcoming()
             current_time = datetime.now(timezone.utc)
-            thirty_days_from_now = current_time + timedelta(days=30)
-            
-            response = supabase.table('events').select('*').gte('start_time', current_time.isoformat()).lte('start_time', thirty_days_from_now.isoformat()).execute()
-            events = response.data if response.data else []
             
             if not events:
                 return await ctx.send("📅 No upcoming events found.")
@@ -107,11 +108,7 @@ def setup_commands(bot: commands.Bot):
             )
             
             for event in events:
-                start_time_str = event['start_time'].replace('Z', '+00:00')
-                event_datetime = datetime.fromisoformat(start_time_str)
-                if event_datetime.tzinfo is None:
-                    event_datetime = event_datetime.replace(tzinfo=timezone.utc)
-                
+                event_datetime = event.start_time
                 time_until = event_datetime - current_time
                 
                 days = time_until.days
@@ -128,11 +125,11 @@ def setup_commands(bot: commands.Bot):
                 
                 event_info = f"📅 {eastern_time.strftime('%B %d, %Y at %I:%M %p %Z')}\n⏰ {days} days, {hours} hours from now"
                 
-                if event.get('location'):
-                    event_info += f"\n📍 {event['location']}"
+                if event.location:
+                    event_info += f"\n📍 {event.location}"
                 
                 embed.add_field(
-                    name=f"{event['name']} (ID: {event['id'][:8]}...)",
+                    name=f"{event.name} (ID: {event.id[:8]}...)",
                     value=event_info,
                     inline=False
                 )
@@ -141,40 +138,45 @@ def setup_commands(bot: commands.Bot):
             
         except Exception as e:
             await ctx.send(f"❌ Error checking events: {str(e)}")
-            import traceback
-            traceback.print_exc()
+            log.exception("Error checking events")
 
     @bot.command()
     @commands.has_permissions(manage_guild=True)
     async def eventinfo(ctx, event_uuid: str):
         """Get detailed information about a specific event"""
-        supabase = getattr(bot, 'supabase', None)
-        if not supabase:
+        store = getattr(bot, 'event_store', None)
+        if not store:
             return await ctx.send("❌ Supabase not configured!")
         
         try:
             from datetime import datetime, timezone
-            response = supabase.table('events').select('*').eq('id', event_uuid).execute()
-            event = response.data[0] if response.data else None
+            # Upcoming events are answered from memory; anything else falls back to a lookup
+            event = await store.get(event_uuid)
+            if event and store.reminders_known(event.id):
+                sent_reminders = [
+                    code for code in map(reminder_type_code, REMINDER_INTERVALS)
+                    if code and store.reminder_sent(event.id, code)
+                ]
+            else:
+                event = event or EventRecord.from_row(await store.supabase.fetch_event(event_uuid) or {})
+                if event:
+                    reminders = await store.supabase.fetch_sent_reminders([event.id])
+                    sent_reminders = [r['reminder_type'] for r in reminders]
             
             if not event:
                 return await ctx.send(f"❌ Event with ID {event_uuid} not found!")
             
-            start_time_str = event['start_time'].replace('Z', '+00:00')
-            event_datetime = datetime.fromisoformat(start_time_str)
+            event_datetime = event.start_time
             current_time = datetime.now(timezone.utc)
-            if event_datetime.tzinfo is None:
-                event_datetime = event_datetime.replace(tzinfo=timezone.utc)
-            
             time_until = event_datetime - current_time
             
             embed = discord.Embed(
-                title=f"📅 {event['name']}",
+                title=f"📅 {event.name}",
                 color=discord.Color.blurple()
             )
             
-            if event.get('flyer_url'):
-                embed.set_image(url=event['flyer_url'])
+            if event.flyer_url:
+                embed.set_image(url=event.flyer_url)
             
             # Convert UTC to Eastern Time for display
             try:
@@ -200,31 +202,24 @@ def setup_commands(bot: commands.Bot):
                 inline=True
             )
             
-            if event.get('location'):
+            if event.location:
                 embed.add_field(
                     name="📍 Location",
-                    value=event['location'],
+                    value=event.location,
                     inline=True
                 )
             
-            if event.get('description'):
+            if event.description:
                 embed.add_field(
                     name="📝 Description",
-                    value=event['description'],
+                    value=event.description,
                     inline=False
                 )
             
-            # Check sent reminders
-            reminders_response = supabase.table('event_reminders').select('*').eq('event_id', event['id']).execute()
-            sent_reminders = [r['reminder_type'] for r in reminders_response.data] if reminders_response.data else []
-            
             reminder_status = []
             for interval in REMINDER_INTERVALS:
-                if 'days' in interval:
-                    code = f"{interval['days']}d"
-                elif 'hours' in interval:
-                    code = f"{interval['hours']}h"
-                else:
+                code = reminder_type_code(interval)
+                if code is None:
                     continue
                 status = "✅ Sent" if code in sent_reminders else "⏳ Pending"
                 reminder_status.append(f"{interval['message']}: {status}")
@@ -235,85 +230,67 @@ def setup_commands(bot: commands.Bot):
                 inline=False
             )
             
-            embed.set_footer(text=f"Event ID: {event['id']}")
+            embed.set_footer(text=f"Event ID: {event.id}")
             
             await ctx.send(embed=embed)
             
         except Exception as e:
             await ctx.send(f"❌ Error getting event details: {str(e)}")
-            import traceback
-            traceback.print_exc()
+            log.exception("Error getting event details")
 
     @bot.command()
+    @fun_cooldown(FUN_USER_RATE, FUN_CHANNEL_RATE)
     async def dadjoke(ctx):
         """Get a random dad joke."""
-        try:
-            headers = {'Accept': 'application/json'}
-            response = requests.get('https://icanhazdadjoke.com/', headers=headers)
-
-            if response.status_code == 200:
-                joke_data = response.json()
-                joke = joke_data.get('joke', 'Sorry, couldn\'t fetch a joke right now!')
-                await ctx.send(f"{joke}")
-            else:
-                await ctx.send("❌ Sorry, I couldn't fetch a dad joke right now!")
-
-        except Exception as e:
-            await ctx.send("❌ Sorry, something went wrong while fetching the joke!")
-            print(f"Error fetching dad joke: {e}")
+        joke = await fun.dadjokes.get()
+        if joke:
+            await ctx.send(f"{joke}")
+        else:
+            await ctx.send("❌ Sorry, I couldn't fetch a dad joke right now!")
 
     @bot.command()
+    @fun_cooldown(FUN_USER_RATE, FUN_CHANNEL_RATE)
     async def meme(ctx):
         """Get a random meme."""
-        try:
-            response = requests.get('https://meme-api.com/gimme/1')
-
-            if response.status_code == 200:
-                meme_data = response.json()
-                if meme_data.get('memes') and len(meme_data['memes']) > 0:
-                    meme = meme_data['memes'][0]
-                    embed = discord.Embed(
-                        title=meme.get('title', 'Random Meme'),
-                        url=meme.get('postLink', ''),
-                        color=discord.Color.blue()
-                    )
-                    embed.set_image(url=meme['url'])
-                    embed.set_footer(text=f"From r/{meme.get('subreddit', 'unknown')} • {meme.get('ups', 0)} upvotes")
-
-                    await ctx.send(embed=embed)
-                else:
-                    await ctx.send("❌ Sorry, couldn't fetch a meme right now!")
-            else:
-                await ctx.send("❌ Sorry, I couldn't fetch a meme right now!")
+        meme = await fun.memes.get()
+        if not meme:
+            return await ctx.send("❌ Sorry, I couldn't fetch a meme right now!")
 
-        except Exception as e:
-            await ctx.send("❌ Sorry, something went wrong while fetching the meme!")
-            print(f"Error fetching meme: {e}")
+        embed = discord.Embed(
+            title=meme.get('title', 'Random Meme'),
+            url=meme.get('postLink', ''),
+            color=discord.Color.blue()
+        )
+        embed.set_image(url=meme['url'])
+        embed.set_footer(text=f"From r/{meme.get('subreddit', 'unknown')} • {meme.get('ups', 0)} upvotes")
+        await ctx.send(embed=embed)
 
     @bot.command()
+    @fun_cooldown(FUN_USER_RATE, FUN_CHANNEL_RATE)
     async def quote(ctx):
         """Get a random inspirational quote."""
-        try:
-            response = requests.get('https://zenquotes.io/api/random')
-
-            if response.status_code == 200:
-                quote_data = response.json()
-                if quote_data and len(quote_data) > 0:
-                    quote = quote_data[0]
-                    embed = discord.Embed(
-                        description=f'"{quote.get("q", "No quote found")}"',
-                        color=discord.Color.blue()
-                    )
-                    embed.set_footer(text=f"— {quote.get('a', 'Unknown Author')}")
-                    await ctx.send(embed=embed)
-                else:
-                    await ctx.send("❌ Sorry, couldn't fetch a quote right now!")
-            else:
-                await ctx.send("❌ Sorry, I couldn't fetch a quote right now!")
+        quote = await fun.quotes.get()
+        if not quote:
+            return await ctx.send("❌ Sorry, I couldn't fetch a quote right now!")
 
-        except Exception as e:
-            await ctx.send("❌ Sorry, something went wrong while fetching the quote!")
-            print(f"Error fetching quote: {e}")
+        embed = discord.Embed(
+            description=f'"{quote.get("q", "No quote found")}"',
+            color=discord.Color.blue()
+        )
+        embed.set_footer(text=f"— {quote.get('a', 'Unknown Author')}")
+        await ctx.send(embed=embed)
+
+    async def fun_command_error(ctx, error):
+        """Tell users once when they hit their own rate limit; channel-wide limits are silent to avoid more spam."""
+        if isinstance(error, fun.FunCommandOnCooldown):
+            if error.type == commands.BucketType.user and error.notify:
+                notice = await ctx.send(f"⏳ Slow down! Try `!{ctx.command.name}` again in {error.retry_after:.0f}s.")
+                bot.reaper.schedule(notice, 5)
+            return
+        log.error("Error in !%s: %s", ctx.command.name, error)
+
+    for fun_command in (dadjoke, meme, quote):
+        fun_command.error(fun_command_error)
 
     @bot.command()
     @commands.has_permissions(manage_guild=True)
@@ -406,14 +383,43 @@ def setup_commands(bot: commands.Bot):
     async def syncevents(ctx):
         """Manually trigger Discord scheduled event sync."""
         from bot.events import sync_discord_scheduled_events_once
-        supabase = getattr(bot, 'supabase', None)
-        if not supabase:
+        store = getattr(bot, 'event_store', None)
+        if not store:
             return await ctx.send("❌ Supabase not configured!")
         
         await ctx.send("🔄 Syncing events to Discord Scheduled Events...")
         try:
-            created, updated = await sync_discord_scheduled_events_once(bot, supabase)
-            await ctx.send(f"✅ Sync complete! Created **{created}**, updated **{updated}** scheduled event(s).")
+            # Admin-triggered sync always starts from a fresh full reload
+            await store.refresh(full=True)
+            result = await sync_discord_scheduled_events_once(bot, store, full=True)
+            summary = f"Created **{result.created}**, updated **{result.updated}**, cancelled **{result.cancelled}** scheduled event(s)"
+            if result.errors:
+                # Keep the message under Discord's 2000 character limit
+                details = "\n".join(f"• {error}" for error in result.errors[:10])
+                await ctx.send(f"⚠️ Sync finished with {len(result.errors)} error(s). {summary}.\n{details}"[:2000])
+            else:
+                await ctx.send(f"✅ Sync complete! {summary}.")
         except Exception as e:
             await ctx.send(f"❌ Sync failed: {e}")
 
+    @bot.command()
+    @commands.has_permissions(manage_guild=True)
+    async def modstats(ctx):
+        """Show where messages leave the moderation pipeline."""
+        stats = bot.moderation.stats
+        await ctx.send(f"🛡️ Moderation since startup:\n```\n{stats.describe()}\n```")
+
+    @bot.command()
+    @commands.has_permissions(manage_guild=True)
+    async def reloadwords(ctx):
+        """Reload the moderation word lists from Supabase now."""
+        from bot.helpers import active_word_lists
+        if not bot.word_lists:
+            return await ctx.send("❌ Supabase not configured!")
+        try:
+            await bot.word_lists.reload(force=True)
+        except Exception as e:
+            return await ctx.send(f"❌ Reload failed, still using the previous lists: {e}")
+        lists = active_word_lists()
+        counts = ", ".join(f"**{count}** {kind}" for kind, count in lists.counts.items())
+        await ctx.send(f"✅ Word lists v{lists.version} loaded from {lists.source}: {counts}.")
@@ -10,6 +10,25 @@ RULES_SAVE_FILE = "data/rules_message.json"
 UNVERIFIED_ROLE_NAME = "Unverified"
 MEMBER_ROLE_NAME = "Member"
 
+# Self-assigned roles (see RolePickerView in bot/views.py): one dropdown per
+# category, and a member holds at most one role from each. Option labels
+# must match the role names; custom_id must never change once posted.
+ROLE_CATEGORIES = {
+    "year": {
+        "placeholder": "Select your year...",
+        "custom_id": "year_select_menu",
+        "roles": ["Freshman", "Sophomore", "Junior", "Senior", "Grad", "Alumni"],
+    },
+    "major": {
+        "placeholder": "Select your major...",
+        "custom_id": "major_select_menu",
+        "roles": [
+            "Biology", "Biomedical Engineering", "Chemistry", "Computer Engineering", "Computer Science",
+            "Electrical Engineering", "Mechanical Engineering",
+        ],
+    },
+}
+
 # Channel IDs
 VERIFY_CHANNEL_ID = 1456120433190637729
 ROLES_CHANNEL_ID = 1454883474166124606
@@ -19,9 +38,140 @@ RULES_CHANNEL_ID = 1456118818266152960
 # Verification settings
 VERIFICATION_URL_BASE = "https://www.ufembs.com/discord-verify"
 TOKEN_EXPIRY_MINUTES = 15
+# A member clicking Verify again gets their current token back unless it has
+# less than this long left (see bot/verification.py)
+VERIFY_TOKEN_MIN_REMAINING_SECONDS = 180
+# New tokens are written to Supabase in batches of up to this many rows,
+# gathered for this long after the first one
+VERIFY_TOKEN_BATCH_SIZE = 100
+VERIFY_TOKEN_FLUSH_SECONDS = 0.5
+# The Verify button waits at most this long for a new token to be written
+# before telling the member to try again
+VERIFY_TOKEN_STORE_TIMEOUT_SECONDS = 20.0
+# Expired tokens, and used ones older than TOKEN_GC_USED_RETENTION_DAYS, are
+# deleted about every TOKEN_GC_INTERVAL_SECONDS (+/- TOKEN_GC_JITTER of it),
+# TOKEN_GC_BATCH_SIZE rows per request and for at most
+# TOKEN_GC_TIME_BUDGET_SECONDS per run
+TOKEN_GC_INTERVAL_SECONDS = 3600
+TOKEN_GC_JITTER = 0.2
+TOKEN_GC_BATCH_SIZE = 500
+TOKEN_GC_TIME_BUDGET_SECONDS = 30.0
+TOKEN_GC_USED_RETENTION_DAYS = 7
+# When enabled, the bot itself swaps Unverified for Member as soon as a
+# token is marked used (see bot/role_grants.py), instead of the website's
+# Edge Function. Used tokens are polled this often, going back this far by
+# expiry; grants run this many at a time and are tried at most this often.
+ROLE_GRANTS_ENABLED = False
+ROLE_GRANT_POLL_SECONDS = 5
+ROLE_GRANT_LOOKBACK_MINUTES = 30
+ROLE_GRANT_CONCURRENCY = 4
+ROLE_GRANT_MAX_ATTEMPTS = 5
 
 REMINDER_INTERVALS = [
     {"days": 5, "message": "5 days"},
     {"days": 1, "message": "1 day"},
     {"hours": 2, "message": "2 hours"}
-]
\ No newline at end of file
+]
+# Spam filter: a message is spam once the weights of the spam phrases it
+# contains (words/SPAM_WORDS.py) add up to this score
+SPAM_SCORE_THRESHOLD = 7
+
+# Supabase access (see bot/database.py)
+SUPABASE_MAX_WORKERS = 4
+SUPABASE_TIMEOUT_SECONDS = 10.0
+
+# Outbound HTTP (see bot/http.py)
+HTTP_POOL_SIZE = 20
+HTTP_TIMEOUT_SECONDS = 10.0
+
+# Fun commands (!dadjoke, !meme, !quote): items kept warm per source, and
+# how many uses are allowed per user / per channel within the given seconds
+FUN_BUFFER_SIZE = 10
+FUN_USER_RATE = (1, 5.0)
+FUN_CHANNEL_RATE = (5, 30.0)
+
+# Flyer cache (see bot/flyers.py): memory budget, on-disk tier (None to
+# disable) and its size limit, and how long a flyer is reused before a
+# conditional re-check
+FLYER_CACHE_MAX_BYTES = 16 * 1024 * 1024
+FLYER_CACHE_DIR = "data/flyers"
+FLYER_DISK_MAX_BYTES = 128 * 1024 * 1024
+FLYER_REVALIDATE_SECONDS = 600
+
+# Scheduled-event sync runs in delta mode (only rows whose updated_at moved)
+# and does a full reconcile, including hard-deleted rows, this often
+FULL_SYNC_INTERVAL_SECONDS = 6 * 60 * 60
+
+# Shared event store (see bot/event_store.py): how far ahead events are
+# loaded and how long the cached copy is used before refreshing. Refreshes
+# fetch changed rows and the ids in the window (to drop deleted events);
+# all rows in the window are reloaded every EVENT_STORE_FULL_RELOAD_SECONDS
+EVENT_WINDOW_DAYS = 30
+EVENT_STORE_TTL_SECONDS = 300
+EVENT_STORE_FULL_RELOAD_SECONDS = 30 * 60
+
+# Reminder scheduler wakes at least this often even with no deadline due,
+# as a guard against clock jumps
+REMINDER_MAX_SLEEP_SECONDS = 3600
+
+# Scheduled-event sync concurrency: guilds synced at once, and events
+# created/edited at once within one guild (they share a rate-limit bucket)
+SYNC_GUILD_CONCURRENCY = 4
+SYNC_EVENT_CONCURRENCY = 2
+
+# Moderation pipeline (see bot/moderation.py): messages at least this long
+# are scanned on a worker thread so a paste never stalls the event loop
+MODERATION_OFFLOAD_CHARS = 2000
+# Verdicts for repeated message content (raids, copy-paste chains) are
+# reused for this long, keeping at most this many
+VERDICT_CACHE_SIZE = 4096
+VERDICT_CACHE_TTL_SECONDS = 600
+
+# Flood detection: a member posting FLOOD_MAX_MESSAGES messages within
+# FLOOD_WINDOW_SECONDS is flooding. Members idle for FLOOD_IDLE_SECONDS are
+# forgotten, and at most FLOOD_MAX_TRACKED members are tracked at once.
+FLOOD_MAX_MESSAGES = 10
+FLOOD_WINDOW_SECONDS = 5.0
+FLOOD_IDLE_SECONDS = 60.0
+FLOOD_MAX_TRACKED = 10000
+
+# Enforcement (see bot/enforcement.py): after a flagged message, a channel
+# batches further deletions/warnings for this long; warnings stay up for
+# WARNING_DELETE_AFTER_SECONDS and a user gets at most one in that time
+ENFORCEMENT_WINDOW_SECONDS = 2.0
+WARNING_DELETE_AFTER_SECONDS = 10.0
+
+# Temporary messages waiting to be deleted (see bot/reaper.py); deletions
+# due within REAPER_BATCH_SECONDS of each other go out together, and the
+# pending list is written to disk at most every REAPER_SAVE_SECONDS
+REAPER_SAVE_FILE = "data/pending_deletions.json"
+REAPER_BATCH_SECONDS = 1.0
+REAPER_SAVE_SECONDS = 2.0
+
+# Word lists are read from the Supabase moderation_words table (falling
+# back to words/*.py when it is empty or missing; schema in README.md) and
+# re-checked this often
+WORD_LIST_POLL_SECONDS = 300
+
+# Prometheus metrics (see bot/metrics.py) are served on this address;
+# set METRICS_PORT to None to not start the server. Only local scrapers can
+# reach it by default; use "0.0.0.0" to expose it (behind a firewall)
+METRICS_HOST = "127.0.0.1"
+METRICS_PORT = 9100
+
+# Logging (see bot/logs.py): levels per logger ("" is the root logger),
+# the JSON-lines log file and its rotation, and how many records may wait
+# for the writer thread before new ones are dropped
+LOG_LEVELS = {"": "INFO", "discord": "INFO", "discord.http": "WARNING", "discord.gateway": "WARNING"}
+LOG_FILE = "discord.log"
+LOG_FILE_MAX_BYTES = 5 * 1024 * 1024
+LOG_FILE_BACKUPS = 3
+LOG_QUEUE_SIZE = 10000
+# Console lines as JSON too (for log collectors) instead of plain text
+LOG_CONSOLE_JSON = False
+# High-volume loggers are sampled: per message, the first LOG_SAMPLE_BURST
+# records in each window pass, then one in LOG_SAMPLE_EVERY
+LOG_SAMPLED_LOGGERS = ("bot.moderation.actions",)
+LOG_SAMPLE_BURST = 20
+LOG_SAMPLE_EVERY = 50
+LOG_SAMPLE_WINDOW_SECONDS = 60.0
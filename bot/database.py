@@ -0,0 +1,146 @@
+"""Async access layer over the synchronous Supabase client."""
+
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from bot.config import SUPABASE_MAX_WORKERS, SUPABASE_TIMEOUT_SECONDS
+from bot.metrics import SUPABASE_ERRORS, SUPABASE_SECONDS
+
+
+class SupabaseRepository:
+    """
+    Awaitable wrapper around a supabase-py client.
+
+    supabase-py blocks on every ``.execute()``, so queries are run on a small
+    dedicated thread pool and bounded by a per-call timeout. The underlying
+    PostgREST client keeps one pooled HTTP connection set that all worker
+    threads share, so the event loop never waits on a round trip.
+    """
+
+    def __init__(self, client, max_workers: int = SUPABASE_MAX_WORKERS, timeout: float = SUPABASE_TIMEOUT_SECONDS):
+        self.client = client
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="supabase")
+
+    @classmethod
+    async def connect(cls, url: str, key: str, **kwargs) -> "SupabaseRepository":
+        """Create the Supabase client off the event loop and wrap it."""
+        from supabase import create_client
+        loop = asyncio.get_running_loop()
+        client = await loop.run_in_executor(None, create_client, url, key)
+        return cls(client, **kwargs)
+
+    def close(self) -> None:
+        """Stop accepting new queries; in-flight ones are allowed to finish."""
+        self._executor.shutdown(wait=False)
+
+    async def _execute(self, table: str, query, timeout: float | None = None) -> list[dict]:
+        """Run a prepared query builder on the pool and return its rows."""
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        try:
+            future = loop.run_in_executor(self._executor, query.execute)
+            response = await asyncio.wait_for(future, timeout or self.timeout)
+        except Exception:
+            SUPABASE_ERRORS.labels(table).inc()
+            raise
+        finally:
+            SUPABASE_SECONDS.labels(table).observe(time.perf_counter() - started)
+        return response.data or []
+
+    # Events
+
+    async def fetch_upcoming_events(self, start: datetime, end: datetime) -> list[dict]:
+        """Events whose start_time falls between start and end (inclusive)."""
+        query = self.client.table('events').select('*').gte(
+            'start_time', start.isoformat()
+        ).lte(
+            'start_time', end.isoformat()
+        )
+        return await self._execute('events', query)
+
+    async def fetch_upcoming_event_ids(self, start: datetime, end: datetime) -> list[str]:
+        """Ids of the events whose start_time falls between start and end (inclusive)."""
+        query = self.client.table('events').select('id').gte(
+            'start_time', start.isoformat()
+        ).lte(
+            'start_time', end.isoformat()
+        )
+        return [row['id'] for row in await self._execute('events', query)]
+
+    async def fetch_events_updated_since(self, updated_at: str) -> list[dict]:
+        """Every event row (any start_time) changed after the given updated_at."""
+        query = self.client.table('events').select('*').gt('updated_at', updated_at).order('updated_at')
+        return await self._execute('events', query)
+
+    async def fetch_latest_event_update(self) -> str | None:
+        """The newest updated_at in the events table, used as a delta-sync high-water mark."""
+        query = self.client.table('events').select('updated_at').order('updated_at', desc=True).limit(1)
+        rows = await self._execute('events', query)
+        return rows[0]['updated_at'] if rows else None
+
+    async def fetch_events_by_ids(self, event_ids: list[str]) -> list[dict]:
+        if not event_ids:
+            return []
+        query = self.client.table('events').select('*').in_('id', event_ids)
+        return await self._execute('events', query)
+
+    async def fetch_event(self, event_id: str) -> dict | None:
+        query = self.client.table('events').select('*').eq('id', event_id)
+        rows = await self._execute('events', query)
+        return rows[0] if rows else None
+
+    # Event reminders
+
+    async def fetch_sent_reminders(self, event_ids: list[str]) -> list[dict]:
+        """(event_id, reminder_type) rows already sent for any of the given events."""
+        if not event_ids:
+            return []
+        query = self.client.table('event_reminders').select('event_id, reminder_type').in_('event_id', event_ids)
+        return await self._execute('event_reminders', query)
+
+    async def record_reminder(self, event_id: str, reminder_type: str) -> None:
+        await self._execute('event_reminders', self.client.table('event_reminders').insert({
+            'event_id': event_id,
+            'reminder_type': reminder_type,
+        }))
+
+    # Moderation word lists
+
+    async def fetch_word_lists(self) -> list[dict]:
+        """Every (word, list, weight) row of the moderation_words table."""
+        query = self.client.table('moderation_words').select('word, list, weight')
+        return await self._execute('moderation_words', query)
+
+    # Verification tokens
+
+    async def insert_verification_tokens(self, rows: list[dict]) -> None:
+        """Insert several token rows with one request."""
+        if not rows:
+            return
+        query = self.client.table('discord_verification_tokens').insert(rows, returning='minimal')
+        await self._execute('discord_verification_tokens', query)
+
+    async def fetch_used_verification_tokens(self, expired_after: datetime) -> list[dict]:
+        """Used tokens that expire (or expired) after expired_after: the recently completed verifications."""
+        query = self.client.table('discord_verification_tokens').select(
+            'id, discord_user_id, guild_id, expires_at'
+        ).is_('used', 'true').gt('expires_at', expired_after.isoformat())
+        return await self._execute('discord_verification_tokens', query)
+
+    async def fetch_stale_verification_token_ids(self, expired_before: datetime, used_before: datetime,
+                                                 limit: int) -> list[int]:
+        """Ids of unused tokens that expired before expired_before and used ones created before used_before."""
+        stale = (
+            f"and(used.not.is.true,expires_at.lt.{expired_before.isoformat()}),"
+            f"and(used.is.true,created_at.lt.{used_before.isoformat()})"
+        )
+        query = self.client.table('discord_verification_tokens').select('id').or_(stale).order('id').limit(limit)
+        return [row['id'] for row in await self._execute('discord_verification_tokens', query)]
+
+    async def delete_verification_tokens(self, ids: list[int]) -> None:
+        if not ids:
+            return
+        query = self.client.table('discord_verification_tokens').delete(returning='minimal').in_('id', ids)
+        await self._execute('discord_verification_tokens', query)
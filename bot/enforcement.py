@@ -0,0 +1,143 @@
+"""Deletes flagged messages and warns their authors, batched per channel."""
+
+import asyncio
+import logging
+import time
+import discord
+from bot.config import ENFORCEMENT_WINDOW_SECONDS, WARNING_DELETE_AFTER_SECONDS
+from bot.logs import MODERATION_ACTIONS
+from bot.reaper import MessageReaper, delete_batch
+
+log = logging.getLogger(__name__)
+actions_log = logging.getLogger(MODERATION_ACTIONS)
+
+SPAM = "spam"
+PROFANITY = "profanity"
+
+# kind -> (title, what the user is asked to stop, color, footer)
+_WARNINGS = {
+    SPAM: (
+        "⚠️ Spam Message Removed",
+        "please refrain from posting spam messages in this server.",
+        discord.Color.orange(),
+        "This message was automatically removed by the spam filter.",
+    ),
+    PROFANITY: (
+        "⚠️ Message Removed",
+        "please refrain from using inappropriate language in this server.",
+        discord.Color.red(),
+        "This message was automatically removed by the moderation system.",
+    ),
+}
+
+_MAX_MENTIONS = 50  # keeps a coalesced warning well under the embed description limit
+
+
+def _warning_embed(kind: str, users: list) -> discord.Embed:
+    title, request, color, footer = _WARNINGS[kind]
+    mentions = ", ".join(user.mention for user in users[:_MAX_MENTIONS])
+    if len(users) > _MAX_MENTIONS:
+        mentions += f" and {len(users) - _MAX_MENTIONS} others"
+    embed = discord.Embed(title=title, description=f"{mentions}, {request}", color=color)
+    embed.set_footer(text=footer)
+    return embed
+
+
+class _ChannelBatch:
+    """Flagged messages and users to warn that are waiting for one channel's next flush."""
+
+    def __init__(self, channel):
+        self.channel = channel
+        self.messages: list[discord.Message] = []
+        self.warn: dict[str, dict[int, discord.abc.User]] = {kind: {} for kind in _WARNINGS}
+
+    def take(self) -> tuple[list, dict]:
+        messages, warn = self.messages, self.warn
+        self.messages = []
+        self.warn = {kind: {} for kind in _WARNINGS}
+        return messages, warn
+
+
+class Enforcer:
+    """
+    Removes flagged messages without one REST call per message during raids.
+
+    The first flagged message in a quiet channel is handled right away.
+    The channel then stays in raid mode for ``window`` seconds: anything
+    flagged meanwhile is buffered, deleted with one bulk delete, and
+    warned about with one embed per kind mentioning every author. A user
+    is warned at most once per ``warn_every`` seconds in a channel (by
+    default, while their previous warning is still showing). Warnings are
+    handed to the reaper to be removed after WARNING_DELETE_AFTER_SECONDS.
+    """
+
+    def __init__(self, reaper: MessageReaper, window: float = ENFORCEMENT_WINDOW_SECONDS,
+                 warn_every: float = WARNING_DELETE_AFTER_SECONDS):
+        self.reaper = reaper
+        self.window = window
+        self.warn_every = warn_every
+        self._batches: dict[int, _ChannelBatch] = {}
+        self._tasks: dict[int, asyncio.Task] = {}
+        self._warned: dict[tuple[int, int], float] = {}  # (channel id, user id) -> last warning
+
+    def flag(self, message: discord.Message, kind: str, warn: bool = True) -> None:
+        """Queue a message for deletion and, if ``warn``, its author for a warning."""
+        channel_id = message.channel.id
+        batch = self._batches.get(channel_id)
+        if batch is None:
+            batch = self._batches[channel_id] = _ChannelBatch(message.channel)
+            self._tasks[channel_id] = asyncio.create_task(self._drain(channel_id))
+        batch.messages.append(message)
+        if warn:
+            batch.warn[kind].setdefault(message.author.id, message.author)
+
+    async def wait_idle(self) -> None:
+        """Wait until every channel has flushed and left raid mode."""
+        while self._tasks:
+            await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+
+    async def _drain(self, channel_id: int) -> None:
+        batch = self._batches[channel_id]
+        try:
+            while True:
+                messages, warn = batch.take()
+                if not messages:
+                    break
+                try:
+                    await self._delete(batch.channel, messages)
+                    await self._warn(batch.channel, warn)
+                except Exception as e:
+                    log.error("Error enforcing moderation in %s: %s", batch.channel, e)
+                await asyncio.sleep(self.window)
+        finally:
+            del self._batches[channel_id]
+            self._tasks.pop(channel_id, None)
+
+    async def _delete(self, channel, messages: list[discord.Message]) -> None:
+        await delete_batch(channel, messages, reason="Automatic moderation")
+        if len(messages) > 1:
+            actions_log.info("Deleted %d flagged messages in %s", len(messages), channel)
+
+    async def _warn(self, channel, warn: dict[str, dict[int, discord.abc.User]]) -> None:
+        now = time.monotonic()
+        self._warned = {key: at for key, at in self._warned.items() if now - at < self.warn_every}
+
+        for kind, users in warn.items():
+            users = [user for user_id, user in users.items() if (channel.id, user_id) not in self._warned]
+            if not users:
+                continue
+            for user in users:
+                self._warned[(channel.id, user.id)] = now
+
+            embed = _warning_embed(kind, users)
+            # Try to send warning in the same channel, fallback to DM if no permissions
+            try:
+                warning = await channel.send(embed=embed)
+                self.reaper.schedule(warning, WARNING_DELETE_AFTER_SECONDS)
+            except discord.Forbidden:
+                for user in users:
+                    try:
+                        await user.send(embed=_warning_embed(kind, [user]))
+                    except discord.Forbidden:
+                        # User has DMs disabled, just log it
+                        log.warning("Could not send %s warning to %s", kind, user)
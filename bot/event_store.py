@@ -0,0 +1,344 @@
+"""Process-wide cache of upcoming events shared by reminders, sync and admin commands."""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from bot.config import EVENT_STORE_FULL_RELOAD_SECONDS, EVENT_STORE_TTL_SECONDS, EVENT_WINDOW_DAYS
+
+log = logging.getLogger(__name__)
+
+
+def parse_timestamp(value: str) -> datetime:
+    """Parse a Supabase timestamp string into an aware UTC datetime."""
+    parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+
+def is_tombstone(row: dict) -> bool:
+    """True if a Supabase event row has been soft-deleted or cancelled."""
+    return bool(row.get('deleted_at')) or (row.get('status') or '').lower() in ('cancelled', 'canceled', 'deleted')
+
+
+def reminder_type_code(interval: dict) -> str | None:
+    """Code stored in event_reminders for a REMINDER_INTERVALS entry (e.g. "5d", "2h")."""
+    if 'days' in interval:
+        return f"{interval['days']}d"
+    if 'hours' in interval:
+        return f"{interval['hours']}h"
+    return None
+
+
+@dataclass(frozen=True)
+class EventRecord:
+    """One row of the events table, parsed once when it is loaded."""
+    id: str
+    name: str
+    start_time: datetime
+    location: str | None = None
+    description: str | None = None
+    flyer_url: str | None = None
+    updated_at: str | None = None
+    row: dict = field(default_factory=dict, repr=False)
+
+    @classmethod
+    def from_row(cls, row: dict) -> "EventRecord | None":
+        """Build a record from a Supabase row; None if it lacks a name or start time."""
+        if not row.get('id') or not row.get('name') or not row.get('start_time'):
+            return None
+        return cls(
+            id=row['id'],
+            name=row['name'],
+            start_time=parse_timestamp(row['start_time']),
+            location=row.get('location'),
+            description=row.get('description'),
+            flyer_url=row.get('flyer_url'),
+            updated_at=row.get('updated_at'),
+            row=row,
+        )
+
+
+class EventStore:
+    """
+    Holds the upcoming events (next EVENT_WINDOW_DAYS) and the reminders
+    already sent for them, so the background loops and admin commands read
+    from memory instead of each running their own query.
+
+    Refreshes happen on read once the data is older than ``ttl``, and only
+    one refresh runs at a time. Refreshes are incremental: only rows whose
+    ``updated_at`` moved are fetched, plus the ids in the window so hard
+    deletes are noticed on the same refresh, with a full reload every
+    ``full_interval`` for edits that didn't move ``updated_at``. The bot
+    never writes events itself (the website does), so there is nothing to
+    invalidate on write; ``refresh()`` forces a reload when an admin asks
+    for one, and ``confirm()`` re-reads one event right before it is used.
+
+    Every change bumps ``revision`` so consumers (the Discord sync) can ask
+    for just what changed since they last looked via ``changes_since``.
+    Waiters (the reminder scheduler) can also sleep until anything in the
+    store changes with ``wait_for_change``. Full reloads also forget
+    deletions older than the previous full reload and the sent reminders
+    of events that have left the window, so neither grows for the life of
+    the process.
+    """
+
+    def __init__(self, supabase, ttl: float = EVENT_STORE_TTL_SECONDS,
+                 full_interval: float = EVENT_STORE_FULL_RELOAD_SECONDS, window_days: int = EVENT_WINDOW_DAYS):
+        self.supabase = supabase
+        self.ttl = ttl
+        self.full_interval = full_interval
+        self.window = timedelta(days=window_days)
+        self.revision = 0
+        self.generation = 0  # bumps whenever events or known reminders change
+
+        self._records: dict[str, EventRecord] = {}
+        self._sorted: list[EventRecord] = []
+        self._changed_at: dict[str, int] = {}  # event id -> revision of its last change
+        self._removed: set[str] = set()  # ids deleted/cancelled in Supabase
+        self._sent: set[tuple[str, str]] = set()  # (event_id, reminder_type)
+        self._sent_loaded: set[str] = set()  # event ids whose sent reminders are known
+        self._pruned_revision = 0  # revision at the last full reload
+
+        self._high_water: str | None = None
+        self._refreshed_at: float | None = None
+        self._last_full: float | None = None
+        self._force_full = True
+        self._lock = asyncio.Lock()
+        self._changed = asyncio.Condition()
+
+    # Reads
+
+    async def upcoming(self) -> list[EventRecord]:
+        """Upcoming events sorted by start time."""
+        await self.ensure_fresh()
+        now = datetime.now(timezone.utc)
+        return [record for record in self._sorted if record.start_time > now]
+
+    async def get(self, event_id: str) -> EventRecord | None:
+        await self.ensure_fresh()
+        return self._records.get(event_id)
+
+    def cached(self, event_id: str) -> EventRecord | None:
+        """The current record for an event without triggering a refresh."""
+        return self._records.get(event_id)
+
+    def reminders_known(self, event_id: str) -> bool:
+        """False if the sent reminders for this event couldn't be loaded yet."""
+        return event_id in self._sent_loaded
+
+    def reminder_sent(self, event_id: str, reminder_type: str) -> bool:
+        return (event_id, reminder_type) in self._sent
+
+    def changes_since(self, revision: int) -> tuple[list[EventRecord], list[str], int]:
+        """(changed records, removed event ids, current revision) since the given revision."""
+        changed = []
+        removed = []
+        for event_id, changed_rev in self._changed_at.items():
+            if changed_rev <= revision:
+                continue
+            if event_id in self._records:
+                changed.append(self._records[event_id])
+            elif event_id in self._removed:
+                removed.append(event_id)
+        return changed, removed, self.revision
+
+    async def existing_ids(self, event_ids: list[str]) -> set[str]:
+        """Which of the given ids still exist (and aren't deleted) in Supabase, at any start time."""
+        if not event_ids:
+            return set()
+        rows = await self.supabase.fetch_events_by_ids(event_ids)
+        return {row['id'] for row in rows if not is_tombstone(row)}
+
+    async def wait_for_change(self, generation: int, timeout: float | None = None) -> bool:
+        """Wait until ``self.generation`` moves past the given value; False on timeout."""
+        async with self._changed:
+            try:
+                await asyncio.wait_for(self._changed.wait_for(lambda: self.generation != generation), timeout)
+            except asyncio.TimeoutError:
+                return False
+        return True
+
+    async def confirm(self, record: EventRecord) -> bool:
+        """Re-read one event from Supabase; False if it was deleted, cancelled or changed since ``record``."""
+        row = await self.supabase.fetch_event(record.id)
+        before = self.revision
+        if row is None:
+            self._remove(record.id, deleted=True)
+        else:
+            self._apply_rows([row], datetime.now(timezone.utc))
+        if self.revision != before:
+            self._sorted = sorted(self._records.values(), key=lambda record: record.start_time)
+            await self._notify()
+        return self._records.get(record.id) is record
+
+    # Writes
+
+    async def record_reminder(self, event_id: str, reminder_type: str) -> None:
+        """Persist a sent reminder and remember it locally."""
+        await self.supabase.record_reminder(event_id, reminder_type)
+        self._sent.add((event_id, reminder_type))
+
+    # Refreshing
+
+    async def run_refresher(self) -> None:
+        """Background loop that keeps the store fresh so waiters see new events."""
+        while True:
+            try:
+                await self.ensure_fresh()
+            except Exception as e:
+                log.error("Error refreshing events: %s", e)
+            await asyncio.sleep(self.ttl)
+
+    async def ensure_fresh(self) -> None:
+        if not self._is_stale():
+            return
+        async with self._lock:
+            # Another reader may have refreshed while we waited for the lock
+            if self._is_stale():
+                await self._refresh()
+
+    async def refresh(self, full: bool = False) -> None:
+        """Refresh now, regardless of the TTL."""
+        async with self._lock:
+            if full:
+                self._force_full = True
+            await self._refresh()
+
+    def _is_stale(self) -> bool:
+        return self._refreshed_at is None or time.monotonic() - self._refreshed_at >= self.ttl
+
+    async def _refresh(self) -> None:
+        before = self.revision
+        now = datetime.now(timezone.utc)
+        full = (
+            self._force_full
+            or self._high_water is None
+            or self._last_full is None
+            or time.monotonic() - self._last_full >= self.full_interval
+        )
+
+        if not full:
+            try:
+                rows = await self.supabase.fetch_events_updated_since(self._high_water)
+                window_ids = await self.supabase.fetch_upcoming_event_ids(now, now + self.window)
+            except Exception as e:
+                log.warning("⚠️ Delta event refresh failed, doing a full reload instead: %s", e)
+                full = True
+
+        if full:
+            # Read the high-water mark first so rows changed meanwhile are picked up next time
+            try:
+                high_water = await self.supabase.fetch_latest_event_update()
+            except Exception as e:
+                # Without updated_at we just keep doing full reloads
+                log.warning("⚠️ Could not read events.updated_at, incremental refresh disabled: %s", e)
+                high_water = None
+            rows = await self.supabase.fetch_upcoming_events(now, now + self.window)
+            await self._apply_full(rows, now)
+            self._prune()
+            self._last_full = time.monotonic()
+            self._force_full = False
+        else:
+            self._apply_rows(rows, now)
+            await self._reconcile_missing(set(window_ids), now)
+            high_water = max(
+                (row['updated_at'] for row in rows if row.get('updated_at')),
+                key=parse_timestamp,
+                default=self._high_water,
+            )
+
+        self._high_water = high_water
+        self._sorted = sorted(self._records.values(), key=lambda record: record.start_time)
+        loaded = await self._load_sent_reminders()
+        self._refreshed_at = time.monotonic()
+
+        if self.revision != before or loaded:
+            await self._notify()
+
+    async def _notify(self) -> None:
+        self.generation += 1
+        async with self._changed:
+            self._changed.notify_all()
+
+    async def _apply_full(self, rows: list[dict], now: datetime) -> None:
+        self._apply_rows(rows, now)
+        await self._reconcile_missing({row.get('id') for row in rows}, now)
+
+    async def _reconcile_missing(self, returned: set, now: datetime) -> None:
+        """Handle records whose id is no longer among the ``returned`` ids in the window."""
+        missing = [event_id for event_id in self._records if event_id not in returned]
+        if not missing:
+            return
+        # Gone from the window: either rescheduled/expired or deleted. Ask once to tell them apart.
+        still_there = await self.supabase.fetch_events_by_ids(missing)
+        self._apply_rows(still_there, now)
+        found = {row.get('id') for row in still_there}
+        for event_id in missing:
+            if event_id not in found:
+                self._remove(event_id, deleted=True)
+
+    def _apply_rows(self, rows: list[dict], now: datetime) -> None:
+        window_end = now + self.window
+        for row in rows:
+            if is_tombstone(row):
+                if row.get('id'):
+                    self._remove(row['id'], deleted=True)
+                continue
+            record = EventRecord.from_row(row)
+            if record is None:
+                continue
+            if now < record.start_time <= window_end:
+                self._upsert(record)
+            else:
+                self._remove(record.id, deleted=False)
+
+    def _upsert(self, record: EventRecord) -> None:
+        if self._records.get(record.id) == record:
+            return
+        self._records[record.id] = record
+        self._removed.discard(record.id)
+        self.revision += 1
+        self._changed_at[record.id] = self.revision
+
+    def _remove(self, event_id: str, deleted: bool) -> None:
+        existed = self._records.pop(event_id, None) is not None
+        if deleted and event_id not in self._removed:
+            self._removed.add(event_id)
+            self.revision += 1
+            self._changed_at[event_id] = self.revision
+        elif existed:
+            self._changed_at.pop(event_id, None)
+
+    def _prune(self) -> None:
+        # Deletions are kept for at least one full_interval, longer than the
+        # Discord sync waits between runs; a consumer that falls further
+        # behind than that needs its own full reconcile (the sync runs one
+        # every FULL_SYNC_INTERVAL_SECONDS), so older deletions can be forgotten
+        for event_id in [event_id for event_id in self._removed
+                         if self._changed_at.get(event_id, 0) <= self._pruned_revision]:
+            self._removed.discard(event_id)
+            self._changed_at.pop(event_id, None)
+        # Past or out-of-window events get no reminders; if one comes back
+        # its sent reminders are loaded again
+        self._sent = {key for key in self._sent if key[0] in self._records}
+        self._sent_loaded.intersection_update(self._records)
+        self._pruned_revision = self.revision
+
+    async def _load_sent_reminders(self) -> bool:
+        """Load sent reminders for events that don't have them yet; True if any were loaded."""
+        unknown = [event_id for event_id in self._records if event_id not in self._sent_loaded]
+        if not unknown:
+            return False
+        try:
+            rows = await self.supabase.fetch_sent_reminders(unknown)
+        except Exception as e:
+            # Reminders for these events are skipped until this succeeds
+            log.warning("Failed to fetch sent reminders, will retry on next refresh: %s", e)
+            return False
+        for row in rows:
+            self._sent.add((row['event_id'], row['reminder_type']))
+        self._sent_loaded.update(unknown)
+        return True
@@ -2,60 +2,134 @@
 
 import os
 import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
 import discord
 from discord.ext import commands
-from bot.helpers import check_spam, check_profanity, get_roles
-from bot.views import MajorView, VerifyView, YearView
-from bot.config import MAJOR_YEAR_SELECT_SAVE_FILE, VERIFY_SAVE_FILE, ANNOUNCEMENTS_CHANNEL_ID, REMINDER_INTERVALS
+from bot.helpers import get_roles
+from bot.views import RolePickerView, VerifyView
+from bot.database import SupabaseRepository
+from bot.fun import start_prefetch
+from bot.moderation import ModerationPipeline
+from bot.enforcement import Enforcer, SPAM, PROFANITY
+from bot.reaper import MessageReaper
+from bot.wordlists import WordListReloader
+from bot.verification import StaleTokenCollector, VerificationTokens
+from bot.role_grants import VerifiedRoleGranter
+from bot.flyers import flyer_cache
+from bot.event_store import EventStore, reminder_type_code
+from bot.scheduled_index import ScheduledEventIndex, sync_tag
+from bot.logs import MODERATION_ACTIONS
+from bot.metrics import (
+    EVENT_SYNC_ERRORS, EVENT_SYNC_SECONDS, ON_MESSAGE_SECONDS, REMINDER_CYCLE_SECONDS, WEBSOCKET_LATENCY,
+)
+from bot.config import (
+    MAJOR_YEAR_SELECT_SAVE_FILE, VERIFY_SAVE_FILE, ANNOUNCEMENTS_CHANNEL_ID, REMINDER_INTERVALS,
+    REMINDER_MAX_SLEEP_SECONDS, FULL_SYNC_INTERVAL_SECONDS, SYNC_GUILD_CONCURRENCY, SYNC_EVENT_CONCURRENCY,
+    ROLE_GRANTS_ENABLED, ROLE_CATEGORIES,
+)
+
+log = logging.getLogger(__name__)
+actions_log = logging.getLogger(MODERATION_ACTIONS)
 
 
 def setup_events(bot: commands.Bot, supabase_client=None):
     """Register all event handlers with the bot."""
+    bot.scheduled_index = ScheduledEventIndex()
+    bot.moderation = ModerationPipeline()
+    bot.reaper = MessageReaper(bot)
+    bot.enforcer = Enforcer(bot.reaper)
+    bot.word_lists = None  # set once Supabase is available
+    bot.verification_tokens = None  # likewise
+    WEBSOCKET_LATENCY.set_function(lambda: bot.latency)
     
     @bot.event
     async def on_ready():
-        print(f"Logged in as {bot.user} (ID: {bot.user.id})")
+        log.info("Logged in as %s (ID: %s)", bot.user, bot.user.id)
+
+        # A fresh session may have missed scheduled-event updates; re-seed on next sync
+        bot.scheduled_index.reset()
         
-        # Initialize Supabase client NOW (after bot is connected)
-        from supabase import create_client
-        supabase_client = None
-        if bot.supabase_url and bot.supabase_key:
+        # Initialize Supabase client NOW (after bot is connected); on_ready can
+        # fire again after a reconnect, so keep the repository we already have
+        supabase_client = bot.supabase
+        if supabase_client is None and bot.supabase_url and bot.supabase_key:
             try:
-                print("🔧 Initializing Supabase client...")
-                supabase_client = create_client(bot.supabase_url, bot.supabase_key)
+                log.info("🔧 Initializing Supabase client...")
+                supabase_client = await SupabaseRepository.connect(bot.supabase_url, bot.supabase_key)
                 bot.supabase = supabase_client
-                print("✅ Supabase client initialized")
+                log.info("✅ Supabase client initialized")
             except Exception as e:
-                print(f"⚠️ Failed to initialize Supabase: {e}")
-        else:
-            print("⚠️ Supabase credentials not found. Verification feature will be disabled.")
+                log.warning("⚠️ Failed to initialize Supabase: %s", e)
+        elif supabase_client is None:
+            log.warning("⚠️ Supabase credentials not found. Verification feature will be disabled.")
 
         # Check if verification is already set up, if not, remind admin
         if not os.path.exists(VERIFY_SAVE_FILE):
-            print("⚠️ Verification not set up! Use !setupverify command to set it up.")
+            log.warning("⚠️ Verification not set up! Use !setupverify command to set it up.")
         else:
-            print("Persistent VerifyView loaded from saved message")
+            log.info("Persistent VerifyView loaded from saved message")
 
         # Check if roles are already set up, if not, remind admin
         if not os.path.exists(MAJOR_YEAR_SELECT_SAVE_FILE):
-            print("⚠️ Roles not set up! Use !setuproles command to set it up.")
+            log.warning("⚠️ Roles not set up! Use !setuproles command to set it up.")
         else:
-            print("Persistent YearView and MajorView loaded from saved message")
-
-        bot.add_view(YearView())
-        bot.add_view(MajorView())
-        bot.add_view(VerifyView(supabase_client))
-        print("Persistent views added")
+            log.info("Persistent YearView and MajorView loaded from saved message")
+
+        # Verification tokens are issued from memory and written to Supabase in batches
+        if supabase_client and bot.verification_tokens is None:
+            bot.verification_tokens = VerificationTokens(supabase_client)
+            bot.verification_tokens.start()
+            # ...and expired/used ones are deleted periodically so the table stays small
+            asyncio.create_task(StaleTokenCollector(supabase_client).run())
+            if ROLE_GRANTS_ENABLED:
+                asyncio.create_task(VerifiedRoleGranter(bot, supabase_client).run())
+                log.info("Member role grants for completed verifications started")
+
+        for category in ROLE_CATEGORIES:
+            bot.add_view(RolePickerView(category))
+        bot.add_view(VerifyView(bot.verification_tokens))
+        log.info("Persistent views added")
+
+        # Keep jokes/memes/quotes warm so the fun commands answer from memory
+        start_prefetch()
+        # Clean up temporary messages, including any left over from before a restart
+        bot.reaper.start()
+
+        # Pick up word list changes from Supabase without a redeploy
+        if supabase_client and bot.word_lists is None:
+            bot.word_lists = WordListReloader(supabase_client)
+            asyncio.create_task(bot.word_lists.run())
         
         # Start background tasks if Supabase is available (guard against duplicate on_ready)
         if supabase_client and not getattr(bot, '_reminder_task_started', False):
-            asyncio.create_task(check_event_reminders(bot, supabase_client))
-            asyncio.create_task(sync_discord_scheduled_events(bot, supabase_client))
+            # One shared store so the loops and admin commands don't each query events
+            bot.event_store = EventStore(supabase_client)
+            asyncio.create_task(bot.event_store.run_refresher())
+            asyncio.create_task(run_event_reminders(bot, bot.event_store))
+            asyncio.create_task(sync_discord_scheduled_events(bot, bot.event_store))
             bot._reminder_task_started = True
-            print("Event reminder system started")
-            print("Discord scheduled event sync started")
+            log.info("Event reminder system started")
+            log.info("Discord scheduled event sync started")
         elif not supabase_client:
-            print("Event reminder system disabled - Supabase not available")
+            log.warning("Event reminder system disabled - Supabase not available")
+
+    @bot.event
+    async def on_scheduled_event_create(event: discord.ScheduledEvent):
+        bot.scheduled_index.upsert(event)
+
+    @bot.event
+    async def on_scheduled_event_update(before: discord.ScheduledEvent, after: discord.ScheduledEvent):
+        bot.scheduled_index.upsert(after)
+
+    @bot.event
+    async def on_scheduled_event_delete(event: discord.ScheduledEvent):
+        bot.scheduled_index.remove(event)
+
+    @bot.event
+    async def on_guild_remove(guild: discord.Guild):
+        bot.scheduled_index.forget_guild(guild.id)
 
     @bot.event
     async def on_member_join(member: discord.Member):
@@ -65,485 +139,494 @@ def setup_events(bot: commands.Bot, supabase_client=None):
             try:
                 await member.add_roles(unverified, reason="New member joined the server")
             except discord.Forbidden:
-                print("Missing permissions to add Unverified role")
+                log.warning("Missing permissions to add Unverified role")
 
     @bot.event
     async def on_message(message: discord.Message):
         """Censor out any slurs/hate speech in messages and detect spam from all users"""
+        started = time.perf_counter()
+        allowed = await moderate(message)
+        ON_MESSAGE_SECONDS.observe(time.perf_counter() - started)
+
+        # Process bot commands after checking the message
+        if allowed:
+            await bot.process_commands(message)
+
+    async def moderate(message: discord.Message) -> bool:
+        """Flag the message if it breaks the rules; True if its commands should still run."""
         # Skip messages from the bot itself
         if message.author == bot.user:
-            await bot.process_commands(message)
-            return
+            return True
         
-        # Check for spam messages from all users (bots and regular users)
-        if check_spam(message.content):
-            try:
-                # Delete the message
-                await message.delete()
-                user_type = "bot" if message.author.bot else "user"
-                print(f"Deleted spam message from {user_type} {message.author.name} (ID: {message.author.id})")
-                
-                # Send a warning message (only for regular users, not bots)
-                if not message.author.bot:
-                    warning_embed = discord.Embed(
-                        title="⚠️ Spam Message Removed",
-                        description=f"{message.author.mention}, please refrain from posting spam messages in this server.",
-                        color=discord.Color.orange()
-                    )
-                    warning_embed.set_footer(text="This message was automatically removed by the spam filter.")
-                    
-                    # Try to send warning in the same channel, fallback to DM if no permissions
-                    try:
-                        warning_msg = await message.channel.send(embed=warning_embed)
-                        # Delete warning after 10 seconds
-                        async def delete_warning():
-                            await asyncio.sleep(10.0)
-                            try:
-                                await warning_msg.delete()
-                            except (discord.NotFound, discord.Forbidden):
-                                pass
-                        asyncio.create_task(delete_warning())
-                    except discord.Forbidden:
-                        # If we can't send in channel, try DM
-                        try:
-                            await message.author.send(embed=warning_embed)
-                        except discord.Forbidden:
-                            # User has DMs disabled, just log it
-                            print(f"Could not send spam warning to {message.author}")
-            except discord.Forbidden:
-                user_type = "bot" if message.author.bot else "user"
-                print(f"Missing permissions to delete spam message from {user_type} {message.author.name} in {message.channel}")
-            except discord.NotFound:
-                # Message was already deleted
-                pass
-            except Exception as e:
-                print(f"Error handling spam filter: {e}")
+        verdict = await bot.moderation.check(message)
+        if verdict.is_spam:
+            user_type = "bot" if message.author.bot else "user"
+            actions_log.info(
+                "Removing spam message from %s %s (ID: %s), %s",
+                user_type, message.author.name, message.author.id, verdict.describe(),
+            )
+            # Warn regular users only, not bots
+            bot.enforcer.flag(message, SPAM, warn=not message.author.bot)
             # Don't process commands if message was spam
-            return
+            return False
         
         # Skip profanity check for bots (they've already been checked for spam above)
         if message.author.bot:
-            await bot.process_commands(message)
-            return
+            return True
         
-        # Check for profanity (regular users only)
-        is_banned, reason = check_profanity(message.content)
+        if verdict.is_banned:
+            actions_log.info(
+                "Removing message from %s (ID: %s), %s", message.author.name, message.author.id, verdict.describe(),
+            )
+            bot.enforcer.flag(message, PROFANITY)
+        return True
+
+    async def run_event_reminders(bot, store):
+        """Send event reminders exactly when they are due.
         
-        if is_banned:
-            try:
-                # Delete the message
-                await message.delete()
-                
-                # Send a warning message
-                warning_embed = discord.Embed(
-                    title="⚠️ Message Removed",
-                    description=f"{message.author.mention}, please refrain from using inappropriate language in this server.",
-                    color=discord.Color.red()
-                )
-                warning_embed.set_footer(text="This message was automatically removed by the moderation system.")
-                
-                # Try to send warning in the same channel, fallback to DM if no permissions
-                try:
-                    warning_msg = await message.channel.send(embed=warning_embed)
-                    # Delete warning after 10 seconds
-                    async def delete_warning():
-                        await asyncio.sleep(10.0)
-                        try:
-                            await warning_msg.delete()
-                        except (discord.NotFound, discord.Forbidden):
-                            pass
-                    asyncio.create_task(delete_warning())
-                except discord.Forbidden:
-                    # If we can't send in channel, try DM
-                    try:
-                        await message.author.send(embed=warning_embed)
-                    except discord.Forbidden:
-                        # User has DMs disabled, just log it
-                        print(f"Could not send warning to {message.author} - message deleted for: {reason}")
-            except discord.Forbidden:
-                print(f"Missing permissions to delete message from {message.author} in {message.channel}")
-            except discord.NotFound:
-                # Message was already deleted
-                pass
-            except Exception as e:
-                print(f"Error handling profanity filter: {e}")
-        
-        # Process bot commands after checking profanity
-        await bot.process_commands(message)
-
-    async def check_event_reminders(bot, supabase):
-        """Check for events that need reminders and send them.
+        Every pending (event, interval) reminder gets a fire time, and those are
+        kept in a min-heap. The loop sleeps until the earliest one, or until the
+        event store reports a change, in which case the heap is re-planned.
         
         Uses a 'past-due' timing model: if a reminder's target time has arrived
         (or passed) and the event itself hasn't happened yet, the reminder is sent.
         This naturally catches up on missed reminders after bot downtime.
         """
-        from datetime import datetime, timedelta, timezone
-        try:
-            from zoneinfo import ZoneInfo
-            eastern_tz = ZoneInfo('America/New_York')
-        except ImportError:
-            eastern_tz = timezone(timedelta(hours=-5))
-
-        if not supabase:
-            print("Warning: Supabase not available for event reminders")
-            return
-            
+        import heapq
+        from datetime import datetime, timezone
+
+        heap = []
+        planned_generation = None
+
         while True:
+            cycle_started = time.perf_counter()
             try:
+                if planned_generation != store.generation:
+                    planned_generation = store.generation
+                    heap = _plan_reminders(store, await store.upcoming())
+
                 current_time = datetime.now(timezone.utc)
-                
-                # Get upcoming events (next 30 days)
-                thirty_days_from_now = current_time + timedelta(days=30)
-                
-                response = supabase.table('events').select('*').gte('start_time', current_time.isoformat()).lte('start_time', thirty_days_from_now.isoformat()).execute()
-                events = response.data if response.data else []
-                
-                announcements_channel = bot.get_channel(ANNOUNCEMENTS_CHANNEL_ID)
-                
-                if not announcements_channel:
-                    print(f"Warning: Announcements channel {ANNOUNCEMENTS_CHANNEL_ID} not found")
-                    await asyncio.sleep(300)
-                    continue
-                
-                # Batch-fetch all sent reminders in one query instead of per-event
-                sent_reminders_set = set()
-                if events:
-                    event_ids = [e['id'] for e in events if e.get('id')]
-                    if event_ids:
-                        try:
-                            rem_response = supabase.table('event_reminders').select('event_id, reminder_type').in_('event_id', event_ids).execute()
-                            for r in (rem_response.data or []):
-                                sent_reminders_set.add((r['event_id'], r['reminder_type']))
-                        except Exception as e:
-                            print(f"Warning: Failed to batch-fetch sent reminders, will skip this cycle: {e}")
-                            await asyncio.sleep(300)
-                            continue
-                
-                for event in events:
+                while heap and heap[0][0] <= current_time:
+                    _, _, event, interval, code = heapq.heappop(heap)
+
+                    # Skip entries made stale by an edit/removal or already sent
+                    if store.cached(event.id) is not event or store.reminder_sent(event.id, code):
+                        continue
+                    time_until = event.start_time - current_time
+                    if time_until.total_seconds() <= 0:
+                        continue
+
+                    announcements_channel = bot.get_channel(ANNOUNCEMENTS_CHANNEL_ID)
+                    if not announcements_channel:
+                        log.warning("Announcements channel %s not found", ANNOUNCEMENTS_CHANNEL_ID)
+                        # Re-plan (and retry) after a pause
+                        planned_generation = None
+                        await asyncio.sleep(300)
+                        break
+
+                    # The store can be a refresh behind; don't ping @everyone for
+                    # an event deleted or moved since. An edited event is re-planned.
                     try:
-                        # Guard required fields
-                        if not event.get('start_time') or not event.get('name'):
-                            print(f"Skipping event with missing start_time or name: {event.get('id', 'unknown')}")
+                        if not await store.confirm(event):
+                            log.info("Skipping %s reminder for %s: the event changed", code, event.id)
                             continue
+                    except Exception as e:
+                        log.warning("Could not re-check event %s, sending its reminder anyway: %s", event.id, e)
+
+                    try:
+                        embed = _build_reminder_embed(event, interval, time_until)
                         
-                        # Parse event start time
-                        start_time_str = event['start_time'].replace('Z', '+00:00')
-                        event_datetime = datetime.fromisoformat(start_time_str)
-                        if event_datetime.tzinfo is None:
-                            event_datetime = event_datetime.replace(tzinfo=timezone.utc)
-                        
-                        time_until = event_datetime - current_time
+                        # Send with @everyone as content so it actually pings
+                        await announcements_channel.send(content="@everyone", embed=embed)
                         
-                        # Skip events that have already passed
-                        if time_until.total_seconds() <= 0:
-                            continue
+                        # Record that we sent this reminder
+                        try:
+                            await store.record_reminder(event.id, code)
+                        except Exception as e:
+                            log.error("Error recording reminder: %s", e)
                         
-                        # Check each reminder interval
-                        for interval in REMINDER_INTERVALS:
-                            # Build reminder type code (e.g., "5d", "1d", "2h")
-                            if 'days' in interval:
-                                reminder_type_code = f"{interval['days']}d"
-                            elif 'hours' in interval:
-                                reminder_type_code = f"{interval['hours']}h"
-                            else:
-                                continue
-                            
-                            # Check if reminder already sent (O(1) set lookup)
-                            if (event['id'], reminder_type_code) in sent_reminders_set:
-                                continue
-                            
-                            # Calculate the target time for this reminder
-                            reminder_time = event_datetime
-                            if 'days' in interval:
-                                reminder_time = reminder_time - timedelta(days=interval['days'])
-                            if 'hours' in interval:
-                                reminder_time = reminder_time - timedelta(hours=interval['hours'])
-                            
-                            # Past-due check: send if reminder time has arrived and event is still upcoming
-                            if reminder_time <= current_time:
-                                
-                                # Create rich embed with event details
-                                event_name = event['name']
-                                embed = discord.Embed(
-                                    title="📢 Event Reminder",
-                                    description=f"**{event_name}** is happening in **{interval['message']}**!\n\u200b",
-                                    color=discord.Color.teal()
-                                )
-                                
-                                # Add flyer image if available
-                                if event.get('flyer_url'):
-                                    embed.set_image(url=event['flyer_url'])
-                                
-                                # Format date/time - convert UTC to Eastern Time
-                                eastern_time = event_datetime.astimezone(eastern_tz)
-                                date_str = eastern_time.strftime('%B %d, %Y at %I:%M %p %Z')
-                                embed.add_field(
-                                    name="📅 Date & Time",
-                                    value=date_str,
-                                    inline=True
-                                )
-                                
-                                days = time_until.days
-                                hours = time_until.seconds // 3600
-                                embed.add_field(
-                                    name="⏰ Time Until",
-                                    value=f"{days} days, {hours} hours",
-                                    inline=True
-                                )
-                                
-                                if event.get('location'):
-                                    embed.add_field(
-                                        name="📍 Location",
-                                        value=event['location'],
-                                        inline=True
-                                    )
-                                
-                                # Spacer between info block and description
-                                embed.add_field(name="\u200b", value="\u200b", inline=False)
-                                
-                                if event.get('description'):
-                                    # Discord embed field value limit is 1024 characters
-                                    desc = event['description'][:1024]
-                                    embed.add_field(
-                                        name="📝 Description",
-                                        value=desc,
-                                        inline=False
-                                    )
-                                
-                                embed.set_footer(text=f"Event ID: {event['id']}")
-                                
-                                # Send with @everyone as content so it actually pings
-                                await announcements_channel.send(content="@everyone", embed=embed)
-                                
-                                # Record that we sent this reminder
-                                try:
-                                    supabase.table('event_reminders').insert({
-                                        'event_id': event['id'],
-                                        'reminder_type': reminder_type_code
-                                    }).execute()
-                                    sent_reminders_set.add((event['id'], reminder_type_code))
-                                except Exception as e:
-                                    print(f"Error recording reminder: {e}")
-                                
-                                print(f"Sent {interval['message']} reminder for event: {event_name}")
-                    
+                        log.info("Sent %s reminder for event: %s", interval['message'], event.name)
                     except Exception as e:
-                        print(f"Error processing reminder for event {event.get('id', 'unknown')}: {e}")
-                        import traceback
-                        traceback.print_exc()
-                        continue
-                
-                # Check every 5 minutes
-                await asyncio.sleep(300)
+                        log.exception("Error processing reminder for event %s: %s", event.id, e)
+
+                if planned_generation is None:
+                    continue
+
+                # Sleep until the next deadline or until the events change
+                timeout = None
+                if heap:
+                    timeout = max(0.0, (heap[0][0] - datetime.now(timezone.utc)).total_seconds())
+                    timeout = min(timeout, REMINDER_MAX_SLEEP_SECONDS)
+                REMINDER_CYCLE_SECONDS.observe(time.perf_counter() - cycle_started)
+                await store.wait_for_change(planned_generation, timeout)
                 
             except Exception as e:
-                print(f"Error in event reminder checker: {e}")
-                import traceback
-                traceback.print_exc()
+                log.exception("Error in event reminder scheduler: %s", e)
+                planned_generation = None
                 await asyncio.sleep(300)
 
-    async def sync_discord_scheduled_events(bot, supabase):
+    async def sync_discord_scheduled_events(bot, store):
         """Periodically sync Supabase events to Discord Scheduled Events."""
-        if not supabase:
-            print("Warning: Supabase not available for scheduled event sync")
-            return
-
         await bot.wait_until_ready()
 
         while True:
             try:
-                await sync_discord_scheduled_events_once(bot, supabase)
+                started = time.perf_counter()
+                result = await sync_discord_scheduled_events_once(bot, store)
+                EVENT_SYNC_SECONDS.labels("full" if result.full else "delta").observe(time.perf_counter() - started)
+                EVENT_SYNC_ERRORS.inc(len(result.errors))
+                if result.errors:
+                    log.warning("Scheduled event sync finished with %d error(s)", len(result.errors))
                 await asyncio.sleep(900)
             except Exception as e:
-                print(f"Error in scheduled event sync: {e}")
-                import traceback
-                traceback.print_exc()
+                log.exception("Error in scheduled event sync: %s", e)
                 await asyncio.sleep(900)
 
 
-# Zero-width chars for invisible sync ID encoding (not shown in event description)
-_ZWSP = '\u200B'   # zero-width space
-_ZWNJ = '\u200C'   # zero-width non-joiner
-_SYNC_START = '\u200D\u200B'  # ZWJ+ZWSP = invisible start marker
-_SYNC_END = '\u200D\u200C'    # ZWJ+ZWNJ = invisible end marker
-
-
-def _sync_tag(supabase_id: str) -> str:
-    """Return an invisible tag embedded in Discord event descriptions to track the Supabase source ID."""
-    hex_str = supabase_id.replace('-', '').lower()
-    encoded = []
-    for c in hex_str:
-        n = int(c, 16)
-        for i in range(4):
-            encoded.append(_ZWNJ if (n >> (3 - i)) & 1 else _ZWSP)
-    return _SYNC_START + ''.join(encoded) + _SYNC_END
-
-
-def _extract_sync_id(description: str | None) -> str | None:
-    """Extract the Supabase event ID from the invisible sync tag in a Discord event description."""
-    if not description:
-        return None
-    import re
-    # Try invisible format first
-    if _SYNC_START in description:
-        pattern = re.escape(_SYNC_START) + r'([\u200B\u200C]{128})' + re.escape(_SYNC_END)
-        m = re.search(pattern, description)
-        if m:
-            bits = m.group(1)
-            hex_chars = []
-            for i in range(0, 128, 4):
-                nibble = sum((1 if bits[i + j] == _ZWNJ else 0) << (3 - j) for j in range(4))
-                hex_chars.append(f'{nibble:x}')
-            h = ''.join(hex_chars)
-            if len(h) == 32:
-                return f'{h[:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:32]}'
-    # Fallback: old visible format [sync:uuid] for backward compatibility
-    m = re.search(r'\[sync:([a-f0-9\-]+)\]', description)
-    return m.group(1) if m else None
-
-
-def _build_description(event: dict) -> str:
+def _plan_reminders(store, events) -> list:
+    """Heap of (fire_time, seq, event, interval, code) for every reminder not yet sent."""
+    import heapq
+    from datetime import timedelta
+
+    heap = []
+    for event in events:
+        # Sent reminders couldn't be loaded; skip rather than risk duplicates
+        if not store.reminders_known(event.id):
+            continue
+        for interval in REMINDER_INTERVALS:
+            code = reminder_type_code(interval)
+            if code is None or store.reminder_sent(event.id, code):
+                continue
+            fire_time = event.start_time - timedelta(days=interval.get('days', 0), hours=interval.get('hours', 0))
+            heap.append((fire_time, len(heap), event, interval, code))
+    heapq.heapify(heap)
+    return heap
+
+
+def _build_reminder_embed(event, interval: dict, time_until) -> discord.Embed:
+    """Rich announcement embed for one event reminder."""
+    from datetime import timedelta, timezone
+    try:
+        from zoneinfo import ZoneInfo
+        eastern_tz = ZoneInfo('America/New_York')
+    except ImportError:
+        eastern_tz = timezone(timedelta(hours=-5))
+
+    embed = discord.Embed(
+        title="📢 Event Reminder",
+        description=f"**{event.name}** is happening in **{interval['message']}**!\n\u200b",
+        color=discord.Color.teal()
+    )
+    
+    # Add flyer image if available
+    if event.flyer_url:
+        embed.set_image(url=event.flyer_url)
+    
+    # Format date/time - convert UTC to Eastern Time
+    eastern_time = event.start_time.astimezone(eastern_tz)
+    date_str = eastern_time.strftime('%B %d, %Y at %I:%M %p %Z')
+    embed.add_field(
+        name="📅 Date & Time",
+        value=date_str,
+        inline=True
+    )
+    
+    days = time_until.days
+    hours = time_until.seconds // 3600
+    embed.add_field(
+        name="⏰ Time Until",
+        value=f"{days} days, {hours} hours",
+        inline=True
+    )
+    
+    if event.location:
+        embed.add_field(
+            name="📍 Location",
+            value=event.location,
+            inline=True
+        )
+    
+    # Spacer between info block and description
+    embed.add_field(name="\u200b", value="\u200b", inline=False)
+    
+    if event.description:
+        # Discord embed field value limit is 1024 characters
+        embed.add_field(
+            name="📝 Description",
+            value=event.description[:1024],
+            inline=False
+        )
+    
+    embed.set_footer(text=f"Event ID: {event.id}")
+    return embed
+
+
+def _build_description(event) -> str:
     """Build the Discord event description with the sync tag appended."""
-    desc = (event.get('description') or '')[:950]
-    return desc + _sync_tag(event['id'])
+    desc = (event.description or '')[:950]
+    return desc + sync_tag(event.id)
 
 
-async def _fetch_flyer(url: str) -> bytes | None:
-    """Download a flyer image, returning bytes or None on failure."""
-    try:
-        import aiohttp
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url, timeout=aiohttp.ClientTimeout(total=10)) as resp:
-                if resp.status == 200:
-                    return await resp.read()
-    except Exception:
-        pass
-    return None
+class _SyncState:
+    """Bookkeeping kept between sync runs for delta mode."""
 
+    def __init__(self):
+        self.revision = 0  # EventStore revision already pushed to Discord
+        self.last_full: float | None = None  # monotonic time of the last full reconcile
+        self.retry: set[str] = set()  # event ids whose create/edit failed last run
+        self.force_full = False  # a guild couldn't be synced as a whole last run
 
-async def sync_discord_scheduled_events_once(bot, supabase):
-    """One-shot sync of Supabase events to Discord Scheduled Events.
-    
-    Creates new events, updates existing ones when data has changed.
-    Returns a tuple (created_count, updated_count).
-    """
-    from datetime import datetime, timedelta, timezone
 
-    current_time = datetime.now(timezone.utc)
-    thirty_days_from_now = current_time + timedelta(days=30)
+_sync_state = _SyncState()
 
-    response = supabase.table('events').select('*').gte(
-        'start_time', current_time.isoformat()
-    ).lte(
-        'start_time', thirty_days_from_now.isoformat()
-    ).execute()
-    supabase_events = response.data if response.data else []
 
-    created_count = 0
-    updated_count = 0
+@dataclass
+class GuildSyncResult:
+    """What one sync run did in one guild."""
+    guild_id: int
+    guild_name: str
+    created: int = 0
+    updated: int = 0
+    cancelled: int = 0
+    errors: list[str] = field(default_factory=list)
+    # Events whose create/edit failed, pushed again on the next run
+    failed_ids: set[str] = field(default_factory=set)
+    # Set when something only a full reconcile redoes failed (fetching the
+    # guild's events, checking or cancelling removed ones)
+    needs_full: bool = False
 
-    for guild in bot.guilds:
-        try:
-            discord_events = await guild.fetch_scheduled_events()
-
-            # Map Supabase ID → Discord event via the sync tag in description
-            existing_by_sync_id = {}
-            # Fallback map for events created before sync tags were added
-            existing_by_name_time = {}
-            for de in discord_events:
-                sync_id = _extract_sync_id(de.description)
-                if sync_id:
-                    existing_by_sync_id[sync_id] = de
-                key = (de.name, de.start_time.isoformat() if de.start_time else None)
-                existing_by_name_time[key] = de
-
-            for event in supabase_events:
-                try:
-                    if not event.get('start_time') or not event.get('name'):
-                        continue
 
-                    start_time_str = event['start_time'].replace('Z', '+00:00')
-                    event_datetime = datetime.fromisoformat(start_time_str)
-                    if event_datetime.tzinfo is None:
-                        event_datetime = event_datetime.replace(tzinfo=timezone.utc)
+@dataclass
+class SyncResult:
+    """Outcome of one sync run across every guild."""
+    full: bool
+    guilds: list[GuildSyncResult] = field(default_factory=list)
 
-                    if event_datetime <= current_time:
-                        continue
+    @property
+    def created(self) -> int:
+        return sum(g.created for g in self.guilds)
 
-                    event_name = event['name']
-                    location = event.get('location') or 'TBA'
-                    end_datetime = event_datetime + timedelta(hours=1)
-                    description = _build_description(event)
-                    supabase_id = event['id']
-
-                    discord_event = existing_by_sync_id.get(supabase_id)
-                    # Fallback: match by name + start_time for events created before sync tags
-                    if not discord_event:
-                        fallback_key = (event_name, event_datetime.isoformat())
-                        discord_event = existing_by_name_time.get(fallback_key)
-
-                    if discord_event:
-                        # Check if anything changed
-                        needs_update = False
-                        edit_kwargs = {}
-
-                        if discord_event.name != event_name:
-                            edit_kwargs['name'] = event_name
-                            needs_update = True
-                        if discord_event.start_time and discord_event.start_time.isoformat() != event_datetime.isoformat():
-                            edit_kwargs['start_time'] = event_datetime
-                            edit_kwargs['end_time'] = end_datetime
-                            needs_update = True
-                        if (discord_event.location or '') != location:
-                            edit_kwargs['location'] = location
-                            needs_update = True
-                        if (discord_event.description or '').strip() != description.strip():
-                            edit_kwargs['description'] = description
-                            needs_update = True
-
-                        if needs_update:
-                            if event.get('flyer_url'):
-                                image_data = await _fetch_flyer(event['flyer_url'])
-                                if image_data:
-                                    edit_kwargs['image'] = image_data
-
-                            await discord_event.edit(**edit_kwargs)
-                            print(f"Updated Discord scheduled event: {event_name}")
-                            updated_count += 1
-                        continue
+    @property
+    def updated(self) -> int:
+        return sum(g.updated for g in self.guilds)
 
-                    # Create new event
-                    kwargs = {
-                        'name': event_name,
-                        'start_time': event_datetime,
-                        'end_time': end_datetime,
-                        'entity_type': discord.EntityType.external,
-                        'location': location,
-                        'privacy_level': discord.PrivacyLevel.guild_only,
-                        'description': description,
-                        'reason': 'Auto-synced from EMBS events',
-                    }
-
-                    if event.get('flyer_url'):
-                        image_data = await _fetch_flyer(event['flyer_url'])
-                        if image_data:
-                            kwargs['image'] = image_data
-
-                    await guild.create_scheduled_event(**kwargs)
-                    print(f"Created Discord scheduled event: {event_name}")
-                    created_count += 1
-
-                except discord.Forbidden:
-                    print(f"Missing permissions to create/update scheduled event in {guild.name}")
-                    break
-                except Exception as e:
-                    print(f"Error syncing scheduled event '{event.get('name', '?')}': {e}")
-                    continue
+    @property
+    def cancelled(self) -> int:
+        return sum(g.cancelled for g in self.guilds)
 
-        except discord.Forbidden:
-            print(f"Missing permissions to fetch scheduled events in {guild.name}")
+    @property
+    def errors(self) -> list[str]:
+        return [f"{g.guild_name}: {error}" for g in self.guilds for error in g.errors]
+
+
+async def _cancel_discord_event(discord_event, index: ScheduledEventIndex) -> bool:
+    """Cancel a Discord scheduled event that no longer exists in Supabase."""
+    if discord_event.status != discord.EventStatus.scheduled:
+        return False
+    await discord_event.cancel(reason='Removed from EMBS events')
+    index.remove(discord_event)
+    log.info("Cancelled Discord scheduled event: %s", discord_event.name)
+    return True
+
+
+async def sync_discord_scheduled_events_once(bot, store, full: bool = False) -> SyncResult:
+    """One-shot sync of Supabase events to Discord Scheduled Events.
+    
+    Reads events from the shared EventStore. Delta mode (the default once a
+    full run has happened) only pushes events the store saw change since the
+    last run, and returns without touching Discord when nothing changed.
+    Events deleted or cancelled in Supabase cancel their Discord event.
+    A full reconcile runs on the first call, when ``full`` is set, and every
+    FULL_SYNC_INTERVAL_SECONDS; it also cancels synced upcoming Discord events
+    whose Supabase row is gone. Events whose create/edit failed are pushed
+    again on the next run, and any other failure makes the next run a full one.
+
+    Guilds are synced concurrently (SYNC_GUILD_CONCURRENCY at a time), and so
+    are the events within a guild (SYNC_EVENT_CONCURRENCY at a time, since the
+    scheduled-event routes share a per-guild rate-limit bucket; discord.py
+    queues anything beyond the bucket). A failing event never stops the rest.
+
+    Existing Discord events come from ``bot.scheduled_index``, which is seeded
+    once per guild and then kept current by gateway events, so a sync only
+    calls the REST API for the events it actually creates, edits or cancels.
+    """
+    from datetime import datetime, timezone
+
+    await store.ensure_fresh()
+    current_time = datetime.now(timezone.utc)
+    window_end = current_time + store.window
+
+    if (_sync_state.force_full or _sync_state.last_full is None
+            or time.monotonic() - _sync_state.last_full >= FULL_SYNC_INTERVAL_SECONDS):
+        full = True
+
+    if full:
+        changed = await store.upcoming()
+        removed = []
+        revision = store.revision
+    else:
+        changed, removed, revision = store.changes_since(_sync_state.revision)
+        changed_ids = {event.id for event in changed}
+        # Retried events that were deleted since show up in removed instead
+        changed += [store.cached(event_id) for event_id in _sync_state.retry
+                    if event_id not in changed_ids and store.cached(event_id) is not None]
+        if not changed and not removed:
+            return SyncResult(full=False)
+    changed = [event for event in changed if event.start_time > current_time]
+
+    guild_slots = asyncio.Semaphore(SYNC_GUILD_CONCURRENCY)
+
+    async def sync_guild_bounded(guild):
+        async with guild_slots:
+            return await _sync_guild(
+                guild, bot.scheduled_index, store, changed, removed, full, current_time, window_end
+            )
+
+    result = SyncResult(full=full)
+    result.guilds = list(await asyncio.gather(*(sync_guild_bounded(guild) for guild in bot.guilds)))
+
+    _sync_state.revision = revision
+    _sync_state.retry = set().union(*(g.failed_ids for g in result.guilds))
+    _sync_state.force_full = any(g.needs_full for g in result.guilds)
+    if full:
+        _sync_state.last_full = time.monotonic()
+
+    return result
+
+
+async def _sync_guild(guild, index, store, changed, removed, full, current_time, window_end) -> GuildSyncResult:
+    """Push the given event changes into one guild's scheduled events."""
+    result = GuildSyncResult(guild.id, guild.name)
+    try:
+        guild_index = await index.for_guild(guild)
+    except discord.Forbidden:
+        result.errors.append("missing permissions to fetch scheduled events")
+        result.needs_full = True
+        log.warning("Missing permissions to fetch scheduled events in %s", guild.name)
+        return result
+    except Exception as e:
+        result.errors.append(f"fetching scheduled events failed: {e}")
+        result.needs_full = True
+        log.error("Error syncing scheduled events for guild %s: %s", guild.name, e)
+        return result
+
+    # Map Supabase ID → Discord event via the sync tag in description
+    existing_by_sync_id = guild_index.by_sync_id
+    # Fallback map for events created before sync tags were added
+    existing_by_name_time = guild_index.by_name_time
+
+    to_cancel = [existing_by_sync_id[event_id] for event_id in removed if event_id in existing_by_sync_id]
+    if full:
+        # Synced upcoming events the store doesn't know; confirm their rows are really gone
+        # (not just rescheduled past the window) before cancelling
+        live_ids = {event.id for event in changed}
+        candidates = {
+            sync_id: discord_event for sync_id, discord_event in existing_by_sync_id.items()
+            if sync_id not in live_ids and discord_event.start_time
+            and current_time < discord_event.start_time <= window_end
+        }
+        try:
+            alive = await store.existing_ids(list(candidates)) if candidates else set()
+            to_cancel += [de for sync_id, de in candidates.items() if sync_id not in alive]
         except Exception as e:
-            print(f"Error syncing scheduled events for guild {guild.name}: {e}")
+            result.errors.append(f"checking removed events failed: {e}")
+            result.needs_full = True
+
+    event_slots = asyncio.Semaphore(SYNC_EVENT_CONCURRENCY)
 
-    return created_count, updated_count
+    async def cancel(discord_event):
+        async with event_slots:
+            try:
+                if await _cancel_discord_event(discord_event, index):
+                    result.cancelled += 1
+            except discord.Forbidden:
+                result.errors.append(f"missing permissions to cancel '{discord_event.name}'")
+                result.needs_full = True
+                log.warning("Missing permissions to cancel scheduled event in %s", guild.name)
+            except Exception as e:
+                result.errors.append(f"cancelling '{discord_event.name}' failed: {e}")
+                result.needs_full = True
+                log.error("Error cancelling scheduled event '%s': %s", discord_event.name, e)
+
+    async def upsert(event):
+        async with event_slots:
+            discord_event = existing_by_sync_id.get(event.id)
+            # Fallback: match by name + start_time for events created before sync tags
+            if not discord_event:
+                discord_event = existing_by_name_time.get((event.name, event.start_time.isoformat()))
+            try:
+                outcome = await _upsert_scheduled_event(guild, index, event, discord_event)
+                if outcome == 'created':
+                    result.created += 1
+                elif outcome == 'updated':
+                    result.updated += 1
+            except discord.Forbidden:
+                result.errors.append(f"missing permissions to create/update '{event.name}'")
+                result.failed_ids.add(event.id)
+                log.warning("Missing permissions to create/update scheduled event in %s", guild.name)
+            except Exception as e:
+                result.errors.append(f"syncing '{event.name}' failed: {e}")
+                result.failed_ids.add(event.id)
+                log.error("Error syncing scheduled event '%s': %s", event.name, e)
+
+    await asyncio.gather(*map(cancel, to_cancel), *map(upsert, changed))
+    return result
+
+
+async def _upsert_scheduled_event(guild, index, event, discord_event) -> str | None:
+    """Create or edit the Discord event for one record; returns 'created', 'updated' or None."""
+    from datetime import timedelta
+
+    event_name = event.name
+    event_datetime = event.start_time
+    location = event.location or 'TBA'
+    end_datetime = event_datetime + timedelta(hours=1)
+    description = _build_description(event)
+
+    if discord_event:
+        # Check if anything changed
+        edit_kwargs = {}
+
+        if discord_event.name != event_name:
+            edit_kwargs['name'] = event_name
+        if discord_event.start_time and discord_event.start_time.isoformat() != event_datetime.isoformat():
+            edit_kwargs['start_time'] = event_datetime
+            edit_kwargs['end_time'] = end_datetime
+        if (discord_event.location or '') != location:
+            edit_kwargs['location'] = location
+        if (discord_event.description or '').strip() != description.strip():
+            edit_kwargs['description'] = description
+
+        if not edit_kwargs:
+            return None
+
+        if event.flyer_url:
+            image_data = await flyer_cache.get(event.flyer_url)
+            if image_data:
+                edit_kwargs['image'] = image_data
+
+        # Index the edited copy right away rather than waiting for the gateway update
+        index.upsert(await discord_event.edit(**edit_kwargs))
+        log.info("Updated Discord scheduled event: %s", event_name)
+        return 'updated'
+
+    # Create new event
+    kwargs = {
+        'name': event_name,
+        'start_time': event_datetime,
+        'end_time': end_datetime,
+        'entity_type': discord.EntityType.external,
+        'location': location,
+        'privacy_level': discord.PrivacyLevel.guild_only,
+        'description': description,
+        'reason': 'Auto-synced from EMBS events',
+    }
+
+    if event.flyer_url:
+        image_data = await flyer_cache.get(event.flyer_url)
+        if image_data:
+            kwargs['image'] = image_data
+
+    index.upsert(await guild.create_scheduled_event(**kwargs))
+    log.info("Created Discord scheduled event: %s", event_name)
+    return 'created'
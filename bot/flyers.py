@@ -0,0 +1,225 @@
+"""Content-addressed cache for event flyer images."""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from bot.config import FLYER_CACHE_DIR, FLYER_CACHE_MAX_BYTES, FLYER_DISK_MAX_BYTES, FLYER_REVALIDATE_SECONDS
+from bot.http import get_session
+
+log = logging.getLogger(__name__)
+
+
+@dataclass
+class _FlyerEntry:
+    """What we know about one flyer URL."""
+    content_hash: str
+    etag: str | None = None
+    last_modified: str | None = None
+    size: int = 0
+    checked_at: float = 0.0  # monotonic time of the last successful (re)validation
+
+
+class FlyerCache:
+    """
+    Flyer downloads keyed by URL, with image bytes stored by content hash.
+
+    - Memory tier: LRU of image bytes bounded by a byte budget.
+    - Disk tier (optional): one file per content hash plus a URL index, so
+      a restart doesn't re-download every flyer. Bounded by ``disk_max_bytes``:
+      the least recently used URLs are dropped first, and files no URL
+      points at are deleted (including leftovers found at startup).
+    - Revalidation: within ``revalidate_after`` seconds a URL is served
+      without touching the network; after that a conditional GET
+      (ETag / Last-Modified) is sent and a 304 reuses the cached bytes.
+    - Concurrent requests for the same URL share one download.
+    """
+
+    def __init__(self, max_bytes: int = FLYER_CACHE_MAX_BYTES, disk_dir: str | None = FLYER_CACHE_DIR,
+                 revalidate_after: float = FLYER_REVALIDATE_SECONDS, disk_max_bytes: int = FLYER_DISK_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self.disk_max_bytes = disk_max_bytes
+        self.revalidate_after = revalidate_after
+        self._blobs: OrderedDict[str, bytes] = OrderedDict()
+        self._blob_bytes = 0
+        self._entries: OrderedDict[str, _FlyerEntry] = OrderedDict()  # least recently used first
+        self._inflight: dict[str, asyncio.Task] = {}
+        self._index_loaded = False
+        self._index_lock = asyncio.Lock()
+        self._disk_lock = asyncio.Lock()
+
+    async def get(self, url: str) -> bytes | None:
+        """Return the flyer bytes for url, downloading only if it changed."""
+        if not self._index_loaded:
+            await self._load_index()
+
+        entry = self._entries.get(url)
+        if entry:
+            self._entries.move_to_end(url)
+        if entry and time.monotonic() - entry.checked_at < self.revalidate_after:
+            data = await self._get_blob(entry.content_hash)
+            if data is not None:
+                return data
+
+        task = self._inflight.get(url)
+        if task is None:
+            task = asyncio.create_task(self._fetch(url))
+            self._inflight[url] = task
+            task.add_done_callback(lambda _: self._inflight.pop(url, None))
+        return await asyncio.shield(task)
+
+    async def _fetch(self, url: str) -> bytes | None:
+        entry = self._entries.get(url)
+        cached = await self._get_blob(entry.content_hash) if entry else None
+
+        headers = {}
+        if cached is not None:
+            if entry.etag:
+                headers['If-None-Match'] = entry.etag
+            if entry.last_modified:
+                headers['If-Modified-Since'] = entry.last_modified
+
+        try:
+            async with get_session().get(url, headers=headers) as resp:
+                if resp.status == 304 and cached is not None:
+                    entry.checked_at = time.monotonic()
+                    return cached
+                if resp.status != 200:
+                    return cached
+                data = await resp.read()
+                etag = resp.headers.get('ETag')
+                last_modified = resp.headers.get('Last-Modified')
+        except Exception as e:
+            log.warning("Error downloading flyer %s: %s", url, e)
+            # A stale flyer is better than none
+            return cached
+
+        content_hash = hashlib.sha256(data).hexdigest()
+        old_hash = entry.content_hash if entry else None
+        self._entries[url] = _FlyerEntry(content_hash, etag, last_modified, len(data), time.monotonic())
+        self._entries.move_to_end(url)
+        self._put_blob(content_hash, data)
+        if self.disk_dir:
+            # Decide everything on the loop thread; the worker only does file I/O
+            dropped = self._evict_disk()
+            referenced = {e.content_hash for e in self._entries.values()}
+            orphans = {h for h in (old_hash, *dropped) if h and h not in referenced}
+            index = {
+                url: {'content_hash': e.content_hash, 'etag': e.etag, 'last_modified': e.last_modified, 'size': e.size}
+                for url, e in self._entries.items()
+            }
+            # One write at a time, in the order the snapshots were taken
+            async with self._disk_lock:
+                await self._run_io(self._save_to_disk, content_hash, data, index, orphans)
+        return data
+
+    def _evict_disk(self) -> list[str]:
+        """Drop least recently used URLs until the flyers on disk fit; returns their hashes."""
+        sizes = {e.content_hash: e.size for e in self._entries.values()}
+        total = sum(sizes.values())
+        dropped = []
+        while total > self.disk_max_bytes and len(self._entries) > 1:
+            _, evicted = self._entries.popitem(last=False)
+            dropped.append(evicted.content_hash)
+            if all(e.content_hash != evicted.content_hash for e in self._entries.values()):
+                total -= sizes[evicted.content_hash]
+        return dropped
+
+    # Memory tier
+
+    async def _get_blob(self, content_hash: str) -> bytes | None:
+        data = self._blobs.get(content_hash)
+        if data is not None:
+            self._blobs.move_to_end(content_hash)
+            return data
+        if not self.disk_dir:
+            return None
+        data = await self._run_io(self._read_blob, content_hash)
+        if data is not None:
+            self._put_blob(content_hash, data)
+        return data
+
+    def _put_blob(self, content_hash: str, data: bytes) -> None:
+        if len(data) > self.max_bytes or content_hash in self._blobs:
+            return
+        self._blobs[content_hash] = data
+        self._blob_bytes += len(data)
+        while self._blob_bytes > self.max_bytes:
+            _, evicted = self._blobs.popitem(last=False)
+            self._blob_bytes -= len(evicted)
+
+    # Disk tier (runs in a worker thread)
+
+    @staticmethod
+    async def _run_io(func, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, func, *args)
+
+    def _index_path(self) -> str:
+        return os.path.join(self.disk_dir, 'index.json')
+
+    async def _load_index(self) -> None:
+        # Concurrent first calls wait for one load instead of each starting one
+        async with self._index_lock:
+            if self._index_loaded:
+                return
+            if self.disk_dir:
+                for url, entry in (await self._run_io(self._read_index)).items():
+                    # Loaded entries always revalidate once (checked_at = 0)
+                    self._entries.setdefault(url, entry)
+            self._index_loaded = True
+
+    def _read_index(self) -> dict[str, _FlyerEntry]:
+        """Parse the index and delete files it doesn't reference (e.g. from a crash)."""
+        if not os.path.exists(self._index_path()):
+            return {}
+        entries = {}
+        try:
+            with open(self._index_path()) as f:
+                for url, fields in json.load(f).items():
+                    entry = _FlyerEntry(**fields)
+                    blob_path = os.path.join(self.disk_dir, entry.content_hash)
+                    if os.path.exists(blob_path):
+                        entry.size = os.path.getsize(blob_path)
+                        entries[url] = entry
+            referenced = {entry.content_hash for entry in entries.values()} | {'index.json'}
+            for name in os.listdir(self.disk_dir):
+                if name not in referenced:
+                    os.remove(os.path.join(self.disk_dir, name))
+        except (OSError, ValueError, TypeError) as e:
+            log.warning("⚠️ Ignoring unreadable flyer cache index: %s", e)
+        return entries
+
+    def _read_blob(self, content_hash: str) -> bytes | None:
+        try:
+            with open(os.path.join(self.disk_dir, content_hash), 'rb') as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def _save_to_disk(self, content_hash: str, data: bytes, index: dict, orphans: set[str]) -> None:
+        try:
+            os.makedirs(self.disk_dir, exist_ok=True)
+            blob_path = os.path.join(self.disk_dir, content_hash)
+            if not os.path.exists(blob_path):
+                with open(blob_path + '.tmp', 'wb') as f:
+                    f.write(data)
+                os.replace(blob_path + '.tmp', blob_path)
+
+            with open(self._index_path() + '.tmp', 'w') as f:
+                json.dump(index, f)
+            os.replace(self._index_path() + '.tmp', self._index_path())
+
+            # Drop previous versions and evicted flyers once no URL points at them
+            for orphan in orphans:
+                os.remove(os.path.join(self.disk_dir, orphan))
+        except OSError as e:
+            log.warning("⚠️ Could not write flyer cache to disk: %s", e)
+
+
+flyer_cache = FlyerCache()
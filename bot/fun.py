@@ -0,0 +1,154 @@
+"""Prefetched content for the fun commands (!dadjoke, !meme, !quote)."""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Awaitable, Callable
+from discord.ext import commands
+from bot.config import FUN_BUFFER_SIZE
+from bot.http import get_session
+
+log = logging.getLogger(__name__)
+
+
+class PrefetchBuffer:
+    """
+    Keeps a few items from an upstream API in memory so commands can answer
+    instantly. Whenever the buffer drops below half full, one background task
+    refills it; a command that finds it empty waits for that same refill.
+    """
+
+    def __init__(self, name: str, fetch_batch: Callable[[], Awaitable[list]], size: int = FUN_BUFFER_SIZE):
+        self.name = name
+        self.size = size
+        self._fetch_batch = fetch_batch
+        self._items = deque()
+        self._available = asyncio.Event()
+        self._refill_task: asyncio.Task | None = None
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    async def get(self):
+        """Pop one item, or None if the upstream is unavailable."""
+        if not self._items:
+            # Wait for the first item of the refill, not the whole batch
+            refill = self.refill()
+            available = asyncio.ensure_future(self._available.wait())
+            await asyncio.wait({refill, available}, return_when=asyncio.FIRST_COMPLETED)
+            available.cancel()
+        item = self._items.popleft() if self._items else None
+        if not self._items:
+            self._available.clear()
+        if len(self._items) <= self.size // 2:
+            self.refill()
+        return item
+
+    def refill(self) -> asyncio.Task:
+        """Start a background refill unless one is already running."""
+        if self._refill_task is None or self._refill_task.done():
+            self._refill_task = asyncio.create_task(self._refill())
+        return self._refill_task
+
+    async def _refill(self) -> None:
+        # Bounded number of upstream calls per refill so a flaky API isn't hammered
+        for _ in range(self.size):
+            if len(self._items) >= self.size:
+                return
+            try:
+                batch = await self._fetch_batch()
+            except Exception as e:
+                log.warning("Error prefetching %s: %s", self.name, e)
+                return
+            if not batch:
+                return
+            self._items.extend(batch)
+            self._available.set()
+
+
+async def _fetch_dadjokes() -> list[str]:
+    async with get_session().get('https://icanhazdadjoke.com/', headers={'Accept': 'application/json'}) as resp:
+        if resp.status != 200:
+            return []
+        data = await resp.json()
+    return [data['joke']] if data.get('joke') else []
+
+
+async def _fetch_memes() -> list[dict]:
+    async with get_session().get(f'https://meme-api.com/gimme/{FUN_BUFFER_SIZE}') as resp:
+        if resp.status != 200:
+            return []
+        data = await resp.json()
+    return [meme for meme in data.get('memes') or [] if meme.get('url')]
+
+
+async def _fetch_quotes() -> list[dict]:
+    # /api/quotes returns a batch of random quotes in a single call
+    async with get_session().get('https://zenquotes.io/api/quotes') as resp:
+        if resp.status != 200:
+            return []
+        data = await resp.json(content_type=None)
+    return [quote for quote in data or [] if quote.get('q')]
+
+
+dadjokes = PrefetchBuffer("dad jokes", _fetch_dadjokes)
+memes = PrefetchBuffer("memes", _fetch_memes)
+quotes = PrefetchBuffer("quotes", _fetch_quotes)
+
+
+def start_prefetch() -> None:
+    """Warm every buffer in the background (called once the bot is ready)."""
+    for buffer in (dadjokes, memes, quotes):
+        buffer.refill()
+
+
+class FunCommandOnCooldown(commands.CommandOnCooldown):
+    """A fun command hit its per-user or per-channel limit.
+
+    ``notify`` is False when the user was already told about this window,
+    so repeated attempts don't each get a reply.
+    """
+
+    def __init__(self, cooldown, retry_after: float, type, notify: bool):
+        super().__init__(cooldown, retry_after, type)
+        self.notify = notify
+
+
+def fun_cooldown(user_rate: tuple[int, float], channel_rate: tuple[int, float]):
+    """Decorator enforcing a per-user and a per-channel limit on a command together.
+
+    The user bucket is checked first and the channel bucket is only charged
+    for calls the user limit lets through, so one member retrying a command
+    can't use up the whole channel's allowance. The limit is enforced in a
+    before_invoke hook rather than a check: the default help command runs
+    every command's checks to decide what to list, and that must not use
+    up anyone's allowance.
+    """
+    users = commands.CooldownMapping.from_cooldown(*user_rate, commands.BucketType.user)
+    channels = commands.CooldownMapping.from_cooldown(*channel_rate, commands.BucketType.channel)
+    notified: dict[int, float] = {}  # user id -> end of the window they were told about
+
+    async def charge(ctx: commands.Context) -> None:
+        now = time.monotonic()
+        user_bucket = users.get_bucket(ctx.message, now)
+        retry_after = user_bucket.get_retry_after(now)
+        if retry_after:
+            user_id = ctx.author.id
+            notify = notified.get(user_id, 0.0) <= now
+            if notify:
+                notified[user_id] = now + retry_after
+                for expired in [user for user, until in notified.items() if until <= now]:
+                    del notified[expired]
+            raise FunCommandOnCooldown(user_bucket, retry_after, commands.BucketType.user, notify)
+
+        channel_bucket = channels.get_bucket(ctx.message, now)
+        retry_after = channel_bucket.get_retry_after(now)
+        if retry_after:
+            # Channel-wide limits stay silent; a reply would only add to the noise
+            raise FunCommandOnCooldown(channel_bucket, retry_after, commands.BucketType.channel, False)
+
+        user_bucket.update_rate_limit(now)
+        channel_bucket.update_rate_limit(now)
+
+    return commands.before_invoke(charge)
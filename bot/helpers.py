@@ -1,95 +1,216 @@
 """Helper utility functions for profanity filtering, spam detection, and role management."""
 
+import logging
 import re
+from typing import Iterable, NamedTuple
 import discord
 from words.BANNED_WORDS import bad_words
 from words.ALLOWED_WORDS import chill_profane_words
 from words.SPAM_WORDS import spam_words
-from bot.config import UNVERIFIED_ROLE_NAME, MEMBER_ROLE_NAME
+from bot.config import UNVERIFIED_ROLE_NAME, MEMBER_ROLE_NAME, SPAM_SCORE_THRESHOLD
+from bot.matcher import Match, WordMatcher
+from bot.normalize import Normalized, normalize, normalize_text
 
+log = logging.getLogger(__name__)
 
-def contains_allowed_words(text: str) -> bool:
+ALLOWED = "allowed"
+BANNED = "banned"
+
+# Prefilter: a standalone hit always starts on a word boundary, so a phrase
+# can only match if the message contains the phrase's first word as a whole
+# token (e.g. "selling" for "selling tickets").
+_TOKEN_RE = re.compile(r'[^\W_]+')
+
+
+class WordLists:
+    """
+    One compiled, read-only version of the banned/allowed/spam lists.
+
+    Words are normalized the same way as messages (bot/normalize.py), so
+    one entry covers its leetspeak, lookalike and spaced-out variants.
+    ``leet_words`` holds every word of the normalized entries; a message's
+    leetspeak is only folded into one of them.
+    Allowed words are layered last so a word that is in both lists
+    (e.g. "prick") is treated as allowed. Banned words and spam phrases
+    without a letter or digit are skipped since the prefilter can't index them.
+    """
+
+    def __init__(self, banned: Iterable[str], allowed: Iterable[str], spam: dict[str, int],
+                 version: int = 0, source: str = "built-in"):
+        self.version = version
+        self.source = source
+        banned = self._indexable(banned)
+        allowed = list(allowed)
+        spam = {phrase: spam[phrase] for phrase in self._indexable(spam)}
+        self.counts = {BANNED: len(banned), ALLOWED: len(allowed), "spam": len(spam)}
+
+        self.profanity_matcher = WordMatcher(
+            [(normalize_text(word), BANNED) for word in banned]
+            + [(normalize_text(word), ALLOWED) for word in allowed]
+        )
+        # Spam phrases carry (phrase as written, weight) as the label
+        self.spam_matcher = WordMatcher(
+            (normalize_text(phrase), (phrase, weight)) for phrase, weight in spam.items()
+        )
+
+        self.leet_words = frozenset(
+            token for word in [*banned, *allowed, *spam] for token in _TOKEN_RE.findall(normalize_text(word))
+        )
+        self.banned_triggers = frozenset(self._first_token(word) for word in banned)
+        # First word -> total weight of the phrases starting with it
+        self.spam_trigger_weights: dict[str, int] = {}
+        for phrase, weight in spam.items():
+            token = self._first_token(phrase)
+            self.spam_trigger_weights[token] = self.spam_trigger_weights.get(token, 0) + weight
+
+    @staticmethod
+    def _first_token(phrase: str) -> str | None:
+        match = _TOKEN_RE.search(normalize_text(phrase))
+        return match.group() if match else None
+
+    @classmethod
+    def _indexable(cls, words: Iterable[str]) -> list[str]:
+        kept = []
+        for word in words:
+            if cls._first_token(word):
+                kept.append(word)
+            else:
+                log.warning("⚠️ Skipping word list entry without letters or digits: %r", word)
+        return kept
+
+
+# The lists shipped in words/*.py until a reload replaces them. Swapped as a
+# whole by install_word_lists(), so a reader that grabbed one snapshot never
+# sees a half-built version.
+_active = WordLists(bad_words, chill_profane_words, spam_words)
+
+
+def active_word_lists() -> WordLists:
+    return _active
+
+
+def install_word_lists(lists: WordLists) -> None:
+    """Make ``lists`` the lists used by every check from now on."""
+    global _active
+    _active = lists
+
+
+def word_lists_version() -> int:
+    """Changes whenever the banned/allowed/spam lists in use change."""
+    return _active.version
+
+
+def _normalized(text: str | Normalized, lists: WordLists | None) -> Normalized:
+    return normalize(text, (lists or _active).leet_words)
+
+
+def message_tokens(text: str | Normalized, lists: WordLists | None = None) -> set[str]:
+    """The distinct words of the normalized message (runs of letters/digits)."""
+    return set(_TOKEN_RE.findall(_normalized(text, lists).text))
+
+
+def may_contain_banned(tokens: set[str], lists: WordLists | None = None) -> bool:
+    """False if a message with these words cannot contain a standalone banned word."""
+    return not (lists or _active).banned_triggers.isdisjoint(tokens)
+
+
+def spam_score_bound(tokens: set[str], lists: WordLists | None = None) -> int:
+    """Highest spam score a message with these words could reach."""
+    weights = (lists or _active).spam_trigger_weights
+    return sum(weights[token] for token in weights.keys() & tokens)
+
+
+def _scan_profanity(text: str | Normalized, lists: WordLists | None = None) -> list[Match]:
+    """Hits with offsets into the normalized text."""
+    return (lists or _active).profanity_matcher.scan(_normalized(text, lists).text)
+
+
+def find_profanity(text: str | Normalized, lists: WordLists | None = None) -> list[Match]:
+    """
+    Scan the message once and return every allowed/banned word hit.
+    Each hit carries its label and whether it is a standalone word, so
+    "class" containing "ass" shows up as a non-standalone hit. Offsets
+    point into the original message, e.g. for logging what matched.
+    """
+    normalized = _normalized(text, lists)
+    return [
+        hit._replace(start=start, end=end)
+        for hit in _scan_profanity(normalized, lists)
+        for start, end in (normalized.span(hit.start, hit.end),)
+    ]
+
+
+def contains_allowed_words(text: str | Normalized) -> bool:
     """Check if message contains any allowed profane words."""
-    text_lower = text.lower()
-    # Check each allowed word (with word boundaries to avoid false positives)
-    for word in chill_profane_words:
-        # Use word boundaries to match whole words only
-        pattern = r'\b' + re.escape(word.lower()) + r'\b'
-        if re.search(pattern, text_lower):
-            return True
-    return False
+    return any(hit.standalone and hit.label == ALLOWED for hit in _scan_profanity(text))
 
 
-def contains_banned_words(text: str) -> bool:
+def contains_banned_words(text: str | Normalized) -> bool:
     """
     Check if message contains any banned slurs/hate speech.
     Allows longer words that contain banned words (e.g., "class" containing "ass").
     """
-    text_lower = text.lower()
-    
-    for banned_word in bad_words:
-        banned_word_lower = banned_word.lower()
-        
-        # Find all occurrences of the banned word
-        for match in re.finditer(re.escape(banned_word_lower), text_lower):
-            start_pos = match.start()
-            end_pos = match.end()
-            
-            # Check if it's at a word boundary (standalone word)
-            # Word boundary means: start of string OR non-alphanumeric before, AND end of string OR non-alphanumeric after
-            is_word_start = (start_pos == 0 or not text_lower[start_pos - 1].isalnum())
-            is_word_end = (end_pos == len(text_lower) or not text_lower[end_pos].isalnum())
-            
-            # Only ban if it's a standalone word (at word boundaries)
-            # If it's part of a longer word (has alphanumeric chars before/after), allow it
-            if is_word_start and is_word_end:
-                return True
-    
-    return False
-
-
-def check_profanity(text: str) -> tuple[bool, str]:
+    return any(hit.standalone and hit.label == BANNED for hit in _scan_profanity(text))
+
+
+def check_profanity(text: str | Normalized, lists: WordLists | None = None) -> tuple[bool, str]:
     """
     Check if message contains profanity.
     Returns: (is_banned, reason)
-    - If contains allowed words, return (False, "allowed")
     - If contains banned words, return (True, "banned_word")
+    - If contains allowed words only, return (False, "allowed")
+    An allowed word no longer excuses a banned word elsewhere in the message.
     """
-    # First check: if message contains allowed words, it's fine
-    if contains_allowed_words(text):
+    has_allowed = False
+    for hit in _scan_profanity(text, lists):
+        if not hit.standalone:
+            continue
+        if hit.label == BANNED:
+            return True, "banned_word"
+        has_allowed = True
+
+    if has_allowed:
         return False, "allowed"
-    
-    # Second check: if message contains banned words from our list
-    if contains_banned_words(text):
-        return True, "banned_word"
-    
     return False, "clean"
 
 
-def check_spam(text: str) -> bool:
+class SpamScore(NamedTuple):
+    """Result of scoring a message against the weighted spam phrases."""
+    score: int
+    threshold: int
+    hits: dict[str, int]  # matched phrase -> weight
+
+    @property
+    def is_spam(self) -> bool:
+        return self.score >= self.threshold
+
+    def describe(self) -> str:
+        """Short breakdown for logs, e.g. '9/7 (selling tickets=3, dm me=2, ...)'."""
+        parts = ", ".join(f"{phrase}={weight}" for phrase, weight in self.hits.items())
+        return f"{self.score}/{self.threshold} ({parts})"
+
+
+def score_spam(text: str | Normalized, threshold: int = SPAM_SCORE_THRESHOLD,
+               lists: WordLists | None = None) -> SpamScore:
+    """
+    Scan the message once and add up the weights of the spam phrases it contains.
+    Each phrase counts once no matter how often it repeats, and only as a
+    whole word/phrase ("free" does not count inside "freedom").
+    """
+    hits = {}
+    for hit in (lists or _active).spam_matcher.scan(_normalized(text, lists).text):
+        if hit.standalone:
+            phrase, weight = hit.label
+            hits[phrase] = weight
+    return SpamScore(sum(hits.values()), threshold, hits)
+
+
+def check_spam(text: str | Normalized) -> bool:
     """
-    Check if message contains at least 2/3 of the spam words.
+    Check if the weighted spam phrases in a message reach the spam threshold.
     Returns True if message is spam, False otherwise.
     """
-    if not text:
-        return False
-    
-    text_lower = text.lower()
-    matched_words = 0
-    total_spam_words = len(spam_words)
-    
-    # Check how many spam words/phrases are present in the message
-    for spam_word in spam_words:
-        # Use case-insensitive search for phrases (some may be multi-word)
-        if spam_word.lower() in text_lower:
-            matched_words += 1
-    
-    # Check if message contains at least 2/3 of spam words
-    # Round up: (2 * total_spam_words + 2) // 3
-    # Example: 16 words → 11 needed, 9 words → 6 needed
-    threshold = (2 * total_spam_words + 2) // 3
-    
-    return matched_words >= threshold
+    return score_spam(text).is_spam
 
 
 def get_roles(guild: discord.Guild):
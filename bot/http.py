@@ -0,0 +1,26 @@
+"""Shared, long-lived aiohttp session for outbound HTTP calls."""
+
+import aiohttp
+from bot.config import HTTP_POOL_SIZE, HTTP_TIMEOUT_SECONDS
+
+_session: aiohttp.ClientSession | None = None
+
+
+def get_session() -> aiohttp.ClientSession:
+    """Return the process-wide session, creating it on first use (must be called from the event loop)."""
+    global _session
+    if _session is None or _session.closed:
+        _session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=HTTP_POOL_SIZE, ttl_dns_cache=300),
+            timeout=aiohttp.ClientTimeout(total=HTTP_TIMEOUT_SECONDS),
+            headers={"User-Agent": "UF-EMBS-Discord-Bot (https://www.ufembs.com)"},
+        )
+    return _session
+
+
+async def close_session() -> None:
+    """Close the shared session; safe to call if it was never opened."""
+    global _session
+    if _session is not None and not _session.closed:
+        await _session.close()
+    _session = None
@@ -0,0 +1,175 @@
+"""
+Logging setup: JSON lines written by a background thread.
+
+Every record goes through a bounded queue to one writer thread, which does
+the JSON encoding, the stdout writes and the rotating discord.log file, so
+the event loop never waits on I/O. Modules log with
+``logging.getLogger(__name__)`` and %-style arguments; keyword context goes
+in ``extra={...}`` and ends up as JSON fields.
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+import time
+from datetime import datetime, timezone
+from bot.config import (
+    LOG_FILE, LOG_FILE_MAX_BYTES, LOG_FILE_BACKUPS, LOG_LEVELS, LOG_QUEUE_SIZE, LOG_CONSOLE_JSON,
+    LOG_SAMPLED_LOGGERS, LOG_SAMPLE_BURST, LOG_SAMPLE_EVERY, LOG_SAMPLE_WINDOW_SECONDS,
+)
+from bot.metrics import LOG_RECORDS_DROPPED
+
+# Logger for moderation actions (one line per removed message), sampled during raids
+MODERATION_ACTIONS = "bot.moderation.actions"
+
+# Attributes every LogRecord has; anything else came from extra={...}
+_RECORD_FIELDS = frozenset(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+_listener: logging.handlers.QueueListener | None = None
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record: time, level, logger, message and any extra fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_FIELDS:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """Readable console lines; extra fields (e.g. ``suppressed``) are appended as key=value."""
+
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)-7s %(name)s: %(message)s")
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        extras = " ".join(f"{key}={value}" for key, value in vars(record).items() if key not in _RECORD_FIELDS)
+        return f"{line} [{extras}]" if extras else line
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """
+    Hands records to the writer thread without blocking.
+
+    Only the message text is rendered here (so arguments that change later
+    can't alter it); formatting, encoding and writes happen on the writer
+    thread. When the writer falls behind and the queue is full, records are
+    dropped and counted rather than stalling the caller.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Thins out a flood of similar records.
+
+    Per message template, the first ``burst`` records in each ``window``
+    seconds pass, then one in every ``every``. The next record that passes
+    carries ``suppressed``, the number skipped since the previous one.
+    Runs on the logging call, so skipped records are never formatted.
+    """
+
+    def __init__(self, burst: int = LOG_SAMPLE_BURST, every: int = LOG_SAMPLE_EVERY,
+                 window: float = LOG_SAMPLE_WINDOW_SECONDS):
+        super().__init__()
+        self.burst = burst
+        self.every = every
+        self.window = window
+        self._state: dict[str, list] = {}  # template -> [window start, seen in window, suppressed]
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        now = time.monotonic()
+        state = self._state.get(record.msg)
+        if state is None or now - state[0] >= self.window:
+            suppressed = state[2] if state else 0
+            state = self._state[record.msg] = [now, 0, suppressed]
+        state[1] += 1
+        over = state[1] - self.burst
+        if over > 0 and over % self.every:
+            state[2] += 1
+            return False
+        if state[2]:
+            record.suppressed = state[2]
+            state[2] = 0
+        return True
+
+
+def setup_logging(console: bool = True, log_file: str | None = LOG_FILE,
+                  levels: dict[str, str] = LOG_LEVELS) -> None:
+    """Route all logging (ours and discord.py's) through the background writer."""
+    global _listener
+    if _listener is not None:
+        return
+
+    handlers = []
+    if console:
+        stream = logging.StreamHandler(sys.stdout)
+        stream.setFormatter(JsonFormatter() if LOG_CONSOLE_JSON else TextFormatter())
+        handlers.append(stream)
+    if log_file:
+        rotating = logging.handlers.RotatingFileHandler(
+            log_file, maxBytes=LOG_FILE_MAX_BYTES, backupCount=LOG_FILE_BACKUPS, encoding="utf-8",
+        )
+        rotating.setFormatter(JsonFormatter())
+        handlers.append(rotating)
+    if not handlers:
+        handlers.append(logging.NullHandler())
+
+    log_queue = queue.Queue(LOG_QUEUE_SIZE)
+    root = logging.getLogger()
+    root.handlers[:] = [_QueueHandler(log_queue)]
+    for name, level in levels.items():
+        logging.getLogger(name or None).setLevel(level)
+    for name in LOG_SAMPLED_LOGGERS:
+        logging.getLogger(name).addFilter(SamplingFilter())
+
+    LOG_RECORDS_DROPPED.set_function(dropped_records)
+
+    _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+
+
+def shutdown_logging() -> None:
+    """Write out whatever is still queued and stop the writer thread."""
+    global _listener
+    if _listener is None:
+        return
+    _listener.stop()
+    _listener = None
+    for handler in logging.getLogger().handlers:
+        if isinstance(handler, _QueueHandler) and handler.dropped:
+            print(f"⚠️ {handler.dropped} log records were dropped because the writer fell behind", file=sys.stderr)
+
+
+def dropped_records() -> int:
+    """Records dropped so far because the queue was full."""
+    return sum(h.dropped for h in logging.getLogger().handlers if isinstance(h, _QueueHandler))
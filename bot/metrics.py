@@ -0,0 +1,314 @@
+"""
+Prometheus metrics for the bot and the small HTTP server that exposes them.
+
+Metrics are plain Python objects updated in place: an observation is a
+dict lookup, a bisect over the bucket bounds and two additions, with no
+locks since everything that records one runs on the event loop. They are
+only formatted when /metrics is scraped.
+"""
+
+import abc
+import logging
+import math
+import time
+from bisect import bisect_left
+import aiohttp
+from aiohttp import web
+from bot.config import METRICS_HOST, METRICS_PORT
+
+log = logging.getLogger(__name__)
+
+# Latency buckets in seconds: microseconds for in-process work, seconds for network calls
+FAST_BUCKETS = (0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.1)
+NETWORK_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _format_value(value: float) -> str:
+    if math.isnan(value):
+        return "NaN"
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _label_text(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric(abc.ABC):
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: dict[tuple[str, ...], object] = {}
+        if not self.labelnames:
+            self._children[()] = self._new_child()
+        REGISTRY.append(self)
+
+    def labels(self, *values):
+        """The child for one combination of label values (created on first use)."""
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} takes labels {self.labelnames}, got {values}")
+            child = self._children[values] = self._new_child()
+        return child
+
+    @abc.abstractmethod
+    def _new_child(self):
+        """A fresh child holding the value(s) for one label combination."""
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for values, child in list(self._children.items()):
+            lines.extend(self._render_child(values, child))
+        return lines
+
+    @abc.abstractmethod
+    def _render_child(self, values, child) -> list[str]:
+        """Exposition lines for one child."""
+
+
+class _CounterChild:
+    __slots__ = ('value',)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.value += amount
+
+
+class Counter(_Metric):
+    """A value that only goes up (events, errors, requests)."""
+    kind = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._children[()].inc(amount)
+
+    def _render_child(self, values, child):
+        return [f"{self.name}{_label_text(self.labelnames, values)} {_format_value(child.value)}"]
+
+
+class _GaugeChild:
+    __slots__ = ('value', 'function')
+
+    def __init__(self):
+        self.value = 0.0
+        self.function = None
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+    def set_function(self, function) -> None:
+        """Read the value from ``function()`` at scrape time instead."""
+        self.function = function
+
+    def get(self) -> float:
+        return self.function() if self.function is not None else self.value
+
+
+class Gauge(_Metric):
+    """A value that can go up and down, optionally read on demand."""
+    kind = "gauge"
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def set(self, value: float) -> None:
+        self._children[()].set(value)
+
+    def set_function(self, function) -> None:
+        self._children[()].set_function(function)
+
+    def _render_child(self, values, child):
+        try:
+            value = float(child.get())
+        except Exception:
+            value = math.nan
+        return [f"{self.name}{_label_text(self.labelnames, values)} {_format_value(value)}"]
+
+
+class _HistogramChild:
+    __slots__ = ('bounds', 'counts', 'sum')
+
+    def __init__(self, bounds: tuple[float, ...]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # last slot is +Inf
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+
+    def time(self) -> "_Timer":
+        """Context manager observing how long its block took."""
+        return _Timer(self)
+
+
+class _Timer:
+    __slots__ = ('child', 'started')
+
+    def __init__(self, child: _HistogramChild):
+        self.child = child
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.child.observe(time.perf_counter() - self.started)
+
+
+class Histogram(_Metric):
+    """Distribution of observed values (latencies) over fixed buckets."""
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = (),
+                 buckets: tuple[float, ...] = NETWORK_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self._children[()].observe(value)
+
+    def time(self) -> _Timer:
+        return self._children[()].time()
+
+    def _render_child(self, values, child):
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (math.inf,), child.counts):
+            cumulative += count
+            le = f'le="{_format_value(bound)}"'
+            lines.append(f"{self.name}_bucket{_label_text(self.labelnames, values, le)} {cumulative}")
+        labels = _label_text(self.labelnames, values)
+        lines.append(f"{self.name}_sum{labels} {_format_value(child.sum)}")
+        lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+REGISTRY: list[_Metric] = []
+_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def render() -> str:
+    """Every metric in the Prometheus text exposition format."""
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# Moderation (bot/moderation.py, bot/events.py)
+ON_MESSAGE_SECONDS = Histogram(
+    "bot_on_message_seconds", "Time spent in the on_message handler.", buckets=FAST_BUCKETS,
+)
+MODERATION_SECONDS = Histogram(
+    "bot_moderation_seconds", "Time to classify a message, by the stage it left the pipeline at.",
+    ("stage",), buckets=FAST_BUCKETS,
+)
+MODERATION_VERDICTS = Counter(
+    "bot_moderation_verdicts_total", "Moderation verdicts by reason (clean, allowed, flood, spam, banned_word).",
+    ("reason",),
+)
+
+# Supabase (bot/database.py)
+SUPABASE_SECONDS = Histogram(
+    "bot_supabase_seconds", "Supabase query duration, including time queued for a worker thread.", ("table",),
+)
+SUPABASE_ERRORS = Counter("bot_supabase_errors_total", "Supabase queries that failed or timed out.", ("table",))
+
+# Discord REST API (traced through discord.py's aiohttp session)
+DISCORD_REST_SECONDS = Histogram("bot_discord_rest_seconds", "Discord REST request duration.", ("method",))
+DISCORD_REST_RESPONSES = Counter(
+    "bot_discord_rest_responses_total", "Discord REST responses by method and status code.", ("method", "status"),
+)
+DISCORD_RATE_LIMITED = Counter(
+    "bot_discord_rate_limited_total", "Discord REST responses with status 429, by rate-limit scope.", ("scope",),
+)
+WEBSOCKET_LATENCY = Gauge("bot_websocket_latency_seconds", "Gateway heartbeat latency.")
+
+# Background loops (bot/events.py)
+REMINDER_CYCLE_SECONDS = Histogram(
+    "bot_reminder_cycle_seconds", "Time the reminder scheduler spends per wake-up, excluding its sleep.",
+)
+EVENT_SYNC_SECONDS = Histogram(
+    "bot_event_sync_seconds", "Duration of one scheduled-event sync run.", ("mode",),
+)
+EVENT_SYNC_ERRORS = Counter("bot_event_sync_errors_total", "Events that failed to sync.")
+TOKENS_REMOVED = Counter("bot_verification_tokens_removed_total", "Stale verification tokens deleted.")
+ROLE_GRANTS = Counter(
+    "bot_role_grants_total", "Member role grants for completed verifications, by result.", ("result",),
+)
+
+# Logging (bot/logs.py)
+LOG_RECORDS_DROPPED = Gauge("bot_log_records_dropped", "Log records dropped because the writer thread fell behind.")
+
+
+def discord_trace_config() -> aiohttp.TraceConfig:
+    """Trace hooks for discord.py's HTTP session (``commands.Bot(http_trace=...)``)."""
+    trace = aiohttp.TraceConfig()
+
+    async def on_request_start(session, context, params):
+        context.started = time.perf_counter()
+
+    async def on_request_end(session, context, params):
+        method = params.method
+        status = params.response.status
+        DISCORD_REST_SECONDS.labels(method).observe(time.perf_counter() - context.started)
+        DISCORD_REST_RESPONSES.labels(method, str(status)).inc()
+        if status == 429:
+            DISCORD_RATE_LIMITED.labels(params.response.headers.get("X-RateLimit-Scope", "unknown")).inc()
+
+    async def on_request_exception(session, context, params):
+        DISCORD_REST_RESPONSES.labels(params.method, "error").inc()
+
+    trace.on_request_start.append(on_request_start)
+    trace.on_request_end.append(on_request_end)
+    trace.on_request_exception.append(on_request_exception)
+    return trace
+
+
+class MetricsServer:
+    """Serves /metrics (and a plain health check on /) from the bot's own event loop."""
+
+    def __init__(self, host: str = METRICS_HOST, port: int = METRICS_PORT):
+        self.host = host
+        self.port = port
+        self._runner: web.AppRunner | None = None
+
+    async def start(self) -> None:
+        app = web.Application()
+        app.router.add_get("/metrics", self._metrics)
+        app.router.add_get("/", self._health)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        log.info("📈 Metrics available on http://%s:%s/metrics", self.host, self.port)
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def _metrics(self, request: web.Request) -> web.Response:
+        return web.Response(body=render().encode(), headers={"Content-Type": _CONTENT_TYPE})
+
+    async def _health(self, request: web.Request) -> web.Response:
+        return web.Response(text="Bot is running!")
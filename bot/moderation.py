@@ -0,0 +1,296 @@
+"""Staged moderation filters run on every message."""
+
+import asyncio
+import hashlib
+import time
+from array import array
+from collections import OrderedDict
+from typing import NamedTuple
+from bot.config import (
+    MODERATION_OFFLOAD_CHARS, SPAM_SCORE_THRESHOLD, VERDICT_CACHE_SIZE, VERDICT_CACHE_TTL_SECONDS,
+    FLOOD_MAX_MESSAGES, FLOOD_WINDOW_SECONDS, FLOOD_IDLE_SECONDS, FLOOD_MAX_TRACKED,
+)
+from bot.helpers import (
+    BANNED, SpamScore, WordLists, active_word_lists, check_profanity, find_profanity, may_contain_banned,
+    message_tokens, score_spam, spam_score_bound, word_lists_version,
+)
+from bot.metrics import MODERATION_SECONDS, MODERATION_VERDICTS
+from bot.normalize import Normalized, normalize
+
+
+class Verdict(NamedTuple):
+    """What moderation decided about one message."""
+    is_spam: bool
+    is_banned: bool
+    reason: str  # "flood", "spam", "banned_word", "allowed" or "clean"
+    spam: SpamScore | None = None
+    matched: str | None = None  # banned word as written in the (first) flagged message
+
+    def describe(self) -> str:
+        """Short reason for logs, with the score breakdown for phrase spam."""
+        if self.spam is not None:
+            return f"score {self.spam.describe()}"
+        if self.matched is not None:
+            return f"{self.reason} {self.matched!r}"
+        return self.reason
+
+
+CLEAN = Verdict(False, False, "clean")
+FLOODED = Verdict(True, False, "flood")
+
+# Stage names, in the order a message can leave the pipeline
+FLOOD = "flood"
+PREFILTER = "prefilter"
+CACHE = "cache"
+MATCHER = "matcher"
+EXECUTOR = "executor"
+STAGES = (FLOOD, PREFILTER, CACHE, MATCHER, EXECUTOR)
+
+
+class ModerationStats:
+    """Counts where messages leave the pipeline and what was flagged."""
+
+    def __init__(self):
+        self.messages = 0
+        self.stages = dict.fromkeys(STAGES, 0)
+        self.spam = 0
+        self.banned = 0
+
+    def rate(self, stage: str) -> float:
+        return self.stages[stage] / self.messages if self.messages else 0.0
+
+    def describe(self) -> str:
+        """One line per stage, e.g. 'prefilter: 9512 (95.1%)'."""
+        lines = [f"{stage}: {self.stages[stage]} ({self.rate(stage):.1%})" for stage in STAGES]
+        lines.append(f"flagged: {self.spam} spam, {self.banned} banned of {self.messages} messages")
+        return "\n".join(lines)
+
+
+class VerdictCache:
+    """
+    Bounded LRU of verdicts keyed by a hash of the message content.
+
+    Entries expire after ``ttl`` seconds, and the whole cache is dropped
+    when the word lists change so no verdict outlives the lists it was
+    made with.
+    """
+
+    def __init__(self, max_size: int = VERDICT_CACHE_SIZE, ttl: float = VERDICT_CACHE_TTL_SECONDS):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: OrderedDict[tuple, tuple[float, Verdict]] = OrderedDict()
+        self._lists_version = word_lists_version()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def key(content: Normalized | str, profanity: bool, lists: WordLists) -> tuple[int, bool, bool, bytes]:
+        # Keyed on what the matchers see, so equal keys always get equal verdicts.
+        # Long messages are keyed on their raw text, so a hit skips normalizing them too.
+        raw = not isinstance(content, Normalized)
+        data = (content if raw else content.text.strip()).encode('utf-8', 'surrogatepass')
+        return lists.version, profanity, raw, hashlib.blake2b(data, digest_size=16).digest()
+
+    def get(self, key: tuple) -> Verdict | None:
+        if self._lists_version != word_lists_version():
+            self.clear()
+            return None
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        stored_at, verdict = entry
+        if time.monotonic() - stored_at >= self.ttl:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return verdict
+
+    def put(self, key: tuple, verdict: Verdict) -> None:
+        self._entries[key] = (time.monotonic(), verdict)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._lists_version = word_lists_version()
+
+
+class _RecentMessages:
+    """Ring buffer with the times of a member's last ``size`` messages."""
+    __slots__ = ('times', 'next', 'last_seen')
+
+    def __init__(self, size: int):
+        self.times = array('d', [float('-inf')]) * size
+        self.next = 0
+        self.last_seen = 0.0
+
+
+class FloodDetector:
+    """
+    Flags members posting ``max_messages`` messages within ``window`` seconds.
+
+    Each (guild, user) keeps a fixed-size ring of its latest message times,
+    so a message costs O(1) no matter how fast the member posts. Members
+    are kept in least-recently-seen order and dropped once idle for
+    ``idle_after`` seconds (or when more than ``max_tracked`` are active).
+    """
+
+    def __init__(self, max_messages: int = FLOOD_MAX_MESSAGES, window: float = FLOOD_WINDOW_SECONDS,
+                 idle_after: float = FLOOD_IDLE_SECONDS, max_tracked: int = FLOOD_MAX_TRACKED):
+        self.max_messages = max_messages
+        self.window = window
+        self.idle_after = idle_after
+        self.max_tracked = max_tracked
+        self._members: OrderedDict[tuple[int, int], _RecentMessages] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._members)
+
+    def record(self, guild_id: int, user_id: int, now: float | None = None) -> bool:
+        """Note one message; True if the member is flooding."""
+        if now is None:
+            now = time.monotonic()
+        key = (guild_id, user_id)
+        recent = self._members.get(key)
+        if recent is None:
+            recent = self._members[key] = _RecentMessages(self.max_messages)
+        else:
+            self._members.move_to_end(key)
+        recent.last_seen = now
+        self._evict(now)
+
+        # After the write, the slot at ``next`` holds the oldest of the last max_messages times
+        recent.times[recent.next] = now
+        recent.next = (recent.next + 1) % self.max_messages
+        return now - recent.times[recent.next] <= self.window
+
+    def _evict(self, now: float) -> None:
+        members = self._members
+        while members:
+            key, oldest = next(iter(members.items()))
+            if len(members) <= self.max_tracked and now - oldest.last_seen < self.idle_after:
+                break
+            del members[key]
+
+
+def _screen(text: str, profanity: bool, lists: WordLists) -> tuple[Normalized, bool, bool]:
+    """Normalize the message and run the prefilter: (normalized, spam candidate, profanity candidate)."""
+    normalized = normalize(text, lists.leet_words)
+    tokens = message_tokens(normalized, lists)
+    spam_candidate = spam_score_bound(tokens, lists) >= SPAM_SCORE_THRESHOLD
+    profanity_candidate = profanity and may_contain_banned(tokens, lists)
+    return normalized, spam_candidate, profanity_candidate
+
+
+def _check_long(text: str, profanity: bool, lists: WordLists) -> tuple[str, Verdict]:
+    """Every stage after the flood check for one long message, run on a worker thread."""
+    normalized, spam_candidate, profanity_candidate = _screen(text, profanity, lists)
+    if not spam_candidate and not profanity_candidate:
+        return PREFILTER, CLEAN
+    return EXECUTOR, _full_check(normalized, lists, spam_candidate, profanity_candidate)
+
+
+def _full_check(normalized: Normalized, lists: WordLists,
+                spam_candidate: bool, profanity_candidate: bool) -> Verdict:
+    """Run the Aho-Corasick matchers the prefilter couldn't rule out (spam first)."""
+    if spam_candidate:
+        spam = score_spam(normalized, lists=lists)
+        if spam.is_spam:
+            return Verdict(True, False, "spam", spam)
+    if profanity_candidate:
+        is_banned, reason = check_profanity(normalized, lists)
+        if not is_banned:
+            return Verdict(False, False, reason)
+        # Flagged messages only: map the hit back to what was actually typed
+        hit = next(hit for hit in find_profanity(normalized, lists) if hit.standalone and hit.label == BANNED)
+        return Verdict(False, True, reason, matched=normalized.original[hit.start:hit.end])
+    return CLEAN
+
+
+class ModerationPipeline:
+    """
+    Classifies messages in stages so the common case stays cheap. Each
+    message is normalized once (bot/normalize.py) and every stage after
+    the flood check works on that normalized text. A message is checked
+    against one snapshot of the word lists from start to finish, even if
+    the lists are reloaded meanwhile.
+
+    0. Flood (``check`` only): members posting too fast are spam regardless
+       of what they post.
+    1. Prefilter: split the message into words (one C-level regex pass) and
+       check them against the first word of every banned word / spam phrase.
+       A message with no trigger word, or whose trigger words can't add up
+       to the spam threshold, is clean and never reaches the matchers.
+    2. Cache: candidates whose content was classified recently (raids,
+       copy-paste chains) reuse that verdict.
+    3. Matchers: the full spam and profanity scans for everything else.
+
+    Messages of ``offload_chars`` or more go through stages 1-3 on a worker
+    thread in one job, since normalizing and splitting a long paste costs
+    as much as scanning it. Their cache entries are keyed on the raw text,
+    so a repeated paste is answered before any of that work.
+    """
+
+    def __init__(self, offload_chars: int = MODERATION_OFFLOAD_CHARS, cache: VerdictCache | None = None,
+                 flood: FloodDetector | None = None):
+        self.offload_chars = offload_chars
+        self.cache = cache if cache is not None else VerdictCache()
+        self.flood = flood if flood is not None else FloodDetector()
+        self.stats = ModerationStats()
+
+    async def check(self, message) -> Verdict:
+        """Verdict for a Discord message: flood check, then its content."""
+        started = time.perf_counter()
+        if message.guild and self.flood.record(message.guild.id, message.author.id):
+            stage, verdict = FLOOD, FLOODED
+        else:
+            # Spam is checked for all users (bots and regular users), profanity for regular users only
+            stage, verdict = await self._classify(message.content, not message.author.bot)
+        self._record(stage, verdict, started)
+        return verdict
+
+    async def classify(self, text: str, profanity: bool = True) -> Verdict:
+        """Verdict for one message; pass profanity=False to only check for spam (bots)."""
+        started = time.perf_counter()
+        stage, verdict = await self._classify(text, profanity)
+        self._record(stage, verdict, started)
+        return verdict
+
+    async def _classify(self, text: str, profanity: bool) -> tuple[str, Verdict]:
+        """The verdict and the stage that produced it."""
+        lists = active_word_lists()
+        text = text or ''
+        if len(text) >= self.offload_chars:
+            key = self.cache.key(text, profanity, lists)
+            verdict = self.cache.get(key)
+            if verdict is not None:
+                return CACHE, verdict
+            loop = asyncio.get_running_loop()
+            stage, verdict = await loop.run_in_executor(None, _check_long, text, profanity, lists)
+            # Clean ones too: a repeated paste shouldn't need another worker hop
+            self.cache.put(key, verdict)
+            return stage, verdict
+
+        normalized, spam_candidate, profanity_candidate = _screen(text, profanity, lists)
+        if not spam_candidate and not profanity_candidate:
+            return PREFILTER, CLEAN
+
+        key = self.cache.key(normalized, profanity, lists)
+        verdict = self.cache.get(key)
+        if verdict is not None:
+            return CACHE, verdict
+        verdict = _full_check(normalized, lists, spam_candidate, profanity_candidate)
+        self.cache.put(key, verdict)
+        return MATCHER, verdict
+
+    def _record(self, stage: str, verdict: Verdict, started: float) -> None:
+        self.stats.messages += 1
+        self.stats.stages[stage] += 1
+        if verdict.is_spam:
+            self.stats.spam += 1
+        elif verdict.is_banned:
+            self.stats.banned += 1
+        MODERATION_SECONDS.labels(stage).observe(time.perf_counter() - started)
+        MODERATION_VERDICTS.labels(verdict.reason).inc()
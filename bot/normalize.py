@@ -0,0 +1,234 @@
+"""Text normalization applied before the moderation matchers."""
+
+import re
+import unicodedata
+
+# Lookalike letters NFKD leaves alone, folded to the Latin letter they imitate
+_CONFUSABLES = {
+    # Cyrillic
+    'а': 'a', 'в': 'b', 'г': 'r', 'д': 'd', 'е': 'e', 'з': '3', 'и': 'u', 'к': 'k', 'л': 'n', 'м': 'm',
+    'н': 'h', 'о': 'o', 'п': 'n', 'р': 'p', 'с': 'c', 'т': 't', 'у': 'y', 'х': 'x', 'ц': 'u', 'ч': '4',
+    'ш': 'w', 'щ': 'w', 'ь': 'b', 'ы': 'bi', 'ѕ': 's', 'і': 'i', 'ї': 'i', 'ј': 'j', 'ԁ': 'd', 'ԛ': 'q',
+    'ԝ': 'w', 'ӏ': 'l', 'һ': 'h', 'ү': 'y',
+    # Greek
+    'α': 'a', 'β': 'b', 'γ': 'y', 'δ': 'd', 'ε': 'e', 'ζ': 'z', 'η': 'n', 'ι': 'i', 'κ': 'k', 'ν': 'v',
+    'ο': 'o', 'ρ': 'p', 'σ': 'o', 'ς': 's', 'τ': 't', 'υ': 'u', 'χ': 'x', 'ω': 'w',
+    # Latin letters outside ASCII that NFKD doesn't decompose
+    'ı': 'i', 'ł': 'l', 'ø': 'o', 'đ': 'd', 'ħ': 'h', 'ŧ': 't', 'ƀ': 'b', 'ɡ': 'g', 'ɑ': 'a', 'ß': 'ss',
+    'æ': 'ae', 'œ': 'oe', 'þ': 'th',
+}
+
+# Combining marks used for accents, strike-through and "zalgo" text
+_COMBINING_RANGES = ((0x0300, 0x036F), (0x1AB0, 0x1AFF), (0x1DC0, 0x1DFF), (0x20D0, 0x20FF), (0xFE20, 0xFE2F))
+
+# Digits/symbols standing in for letters inside a word ("n1gg3r", "a$$")
+_LEET = str.maketrans({
+    '0': 'o', '1': 'i', '2': 'z', '3': 'e', '4': 'a', '5': 's', '6': 'g', '7': 't', '8': 'b', '9': 'g',
+    '@': 'a', '$': 's', '!': 'i',
+})
+_LEET_CHARS_RE = re.compile(r'[0-9@$!]')
+# A leet character next to a letter: every word that needs folding has one,
+# while numbers and punctuation on their own ("(42);", "!!") don't
+_LEET_NEXT_TO_LETTER_RE = re.compile(r'[0-9@$!](?:(?<=[a-z].)|(?=[a-z]))')
+_RUN_CHARS = frozenset('abcdefghijklmnopqrstuvwxyz0123456789@$!')
+_RUN_END_RE = re.compile(r'[a-z0-9@$!]*')
+_LETTER_RE = re.compile(r'[a-z]')
+# A number followed by letters is a count or a unit ("5pic", "2nd", "10min"), not leetspeak
+_QUANTITY_RE = re.compile(r'[0-9]+[a-z]+')
+
+# Three or more single letters split by separators ("f u c k", "s.p.a.m")
+_SPACED_RE = re.compile(r'(?<![^\W_])[a-z](?:[ .\-_*,/|]+[a-z](?![^\W_])){2,}')
+_SPACED_SEPARATOR_RE = re.compile(r'[ .\-_*,/|]')
+# What any such run contains: a single letter after a separator, then more
+# separators and a last single letter. Starting from a separator instead of
+# every letter makes this a cheap test for the common case of no match.
+_SPACED_GATE_RE = re.compile(r'[ .\-_*,/|][a-z][ .\-_*,/|]+[a-z](?![^\W_])')
+_SPACE_RUN_RE = re.compile(r'  +')
+
+
+def _is_combining(cp: int) -> bool:
+    return any(low <= cp <= high for low, high in _COMBINING_RANGES)
+
+
+def _strip_combining(text: str) -> str:
+    return ''.join(ch for ch in text if not _is_combining(ord(ch)))
+
+
+def _fold_char(ch: str) -> str:
+    """What one character normalizes to: lowercase ASCII where possible."""
+    cp = ord(ch)
+    if ch.isspace():
+        return ' '
+    if _is_combining(cp) or unicodedata.category(ch) in ('Cf', 'Me'):
+        # Zero-width and formatting characters, and stray combining marks
+        return ''
+    lower = ch.lower()
+    if lower == ch and ch not in _CONFUSABLES and not unicodedata.decomposition(ch):
+        # Nothing to fold (most non-Latin text); skip the NFKD work
+        return ch
+    folded = ''.join(_CONFUSABLES.get(c, c) for c in _strip_combining(unicodedata.normalize('NFKD', lower)))
+    if folded.isascii():
+        return folded
+    # Not something Latin in disguise (e.g. CJK): keep it, only lowercased
+    return ''.join(_CONFUSABLES.get(c, c) for c in lower)
+
+
+class _FoldTable(dict):
+    """
+    Code point -> folded text (None to drop it), for ``str.translate``.
+
+    Filled in on first sight of each character instead of up front, since
+    walking every code point at import took seconds. Only a few thousand
+    characters fold to something else, and those are always kept.
+    Characters that stay as they are (CJK, emoji, ...) are remembered only
+    up to ``max_unchanged``, so text full of distinct characters can't grow
+    the table without bound.
+    """
+
+    def __init__(self, max_unchanged: int = 4096):
+        super().__init__()
+        self.max_unchanged = max_unchanged
+        self._unchanged = 0
+
+    def __missing__(self, cp: int) -> str | None:
+        ch = chr(cp)
+        folded = _fold_char(ch)
+        if folded == ch:
+            if self._unchanged >= self.max_unchanged:
+                return ch
+            self._unchanged += 1
+        folded = folded or None
+        self[cp] = folded
+        return folded
+
+
+_FOLD = _FoldTable()
+
+
+def _fold_leet(text: str, leet_words: frozenset[str] | None) -> str:
+    """Fold the words (runs of letters, digits and @$!) that contain a leet character."""
+    parts = []
+    done = 0  # everything before this is already in parts
+    for match in _LEET_NEXT_TO_LETTER_RE.finditer(text):
+        if match.start() < done:
+            continue  # inside the run just handled
+        # Grow the run around the leet character; each character is visited
+        # once overall, so a long run of "!" or digits stays linear
+        start = match.start()
+        while start > done and text[start - 1] in _RUN_CHARS:
+            start -= 1
+        end = _RUN_END_RE.match(text, match.end()).end()
+        parts.append(text[done:start])
+        parts.append(_fold_run(text[start:end], leet_words))
+        done = end
+    parts.append(text[done:])
+    return ''.join(parts)
+
+
+def _fold_run(run: str, leet_words: frozenset[str] | None) -> str:
+    # A "!" only counts inside the word ("sh!t"), not as punctuation around it
+    word = run.strip('!')
+    if not _LETTER_RE.search(word) or _QUANTITY_RE.fullmatch(word):
+        return run
+    folded = word.translate(_LEET)
+    if leet_words is not None and folded not in leet_words:
+        # Only fold into a word the lists care about, so "c0de" stays as typed
+        return run
+    start = run.index(word)
+    return run[:start] + folded + run[start + len(word):]
+
+
+def _normalize(text: str, track: bool, leet_words: frozenset[str] | None = None) -> tuple[str, list[int] | None]:
+    """Normalize text; with ``track`` also return each output char's index in the input."""
+    # 1. Case, compatibility (fullwidth, math letters, ligatures), accents,
+    #    lookalikes and zero-width characters, all in one translate table
+    if track:
+        chars = []
+        offsets = []
+        for index, ch in enumerate(text):
+            folded = _FOLD[ord(ch)]
+            if folded:
+                chars.append(folded)
+                offsets.extend([index] * len(folded))
+        text = ''.join(chars)
+    else:
+        text = text.translate(_FOLD)
+        offsets = None
+
+    # 2. Leetspeak inside words; one character for one, so offsets are unchanged
+    if _LEET_CHARS_RE.search(text):
+        text = _fold_leet(text, leet_words)
+
+    # 3. Join spaced-out letters, then collapse runs of spaces
+    for gate, pattern, drop in ((_SPACED_GATE_RE, _SPACED_RE, _spaced_drops),
+                                (_SPACE_RUN_RE, _SPACE_RUN_RE, _space_run_drops)):
+        if not gate.search(text):
+            continue
+        if not track:
+            if pattern is _SPACE_RUN_RE:
+                text = pattern.sub(' ', text)
+            else:
+                text = pattern.sub(lambda m: _without(m, drop(m)), text)
+            continue
+        dropped = set()
+        for m in pattern.finditer(text):
+            dropped.update(drop(m))
+        offsets = [offset for i, offset in enumerate(offsets) if i not in dropped]
+        text = ''.join(ch for i, ch in enumerate(text) if i not in dropped)
+    return text, offsets
+
+
+def _without(match: re.Match, dropped: set[int]) -> str:
+    return ''.join(ch for i, ch in enumerate(match.group(), match.start()) if i not in dropped)
+
+
+def _spaced_drops(match: re.Match) -> set[int]:
+    return {match.start() + m.start() for m in _SPACED_SEPARATOR_RE.finditer(match.group())}
+
+
+def _space_run_drops(match: re.Match) -> set[int]:
+    return set(range(match.start() + 1, match.end()))
+
+
+class Normalized:
+    """
+    A message as the matchers see it, plus the way back to the original.
+
+    ``text`` is computed up front; the offset map is only built when a
+    span has to be mapped back (logging a hit), since that path is slower.
+    """
+    __slots__ = ('original', 'text', '_leet_words', '_offsets')
+
+    def __init__(self, original: str, leet_words: frozenset[str] | None = None):
+        self.original = original
+        self.text = _normalize(original, False, leet_words)[0]
+        self._leet_words = leet_words
+        self._offsets: list[int] | None = None
+
+    def span(self, start: int, end: int) -> tuple[int, int]:
+        """The (start, end) in the original text that produced text[start:end]."""
+        if self._offsets is None:
+            self._offsets = _normalize(self.original, True, self._leet_words)[1]
+        return self._offsets[start], self._offsets[end - 1] + 1
+
+    def original_text(self, start: int, end: int) -> str:
+        first, last = self.span(start, end)
+        return self.original[first:last]
+
+
+def normalize(text: str | Normalized, leet_words: frozenset[str] | None = None) -> Normalized:
+    """
+    Normalize a message once so every matcher can share the result.
+
+    With ``leet_words``, a word written with digits or symbols is only
+    folded if the result is one of those words (the words of the lists in
+    use), so "5ecret" or "c0de" don't turn into something they weren't.
+    """
+    if isinstance(text, Normalized):
+        return text
+    return Normalized(text or '', leet_words)
+
+
+def normalize_text(text: str) -> str:
+    """Just the normalized string, folding every leet word (used for the word lists themselves)."""
+    return _normalize(text, track=False)[0]
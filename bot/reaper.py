@@ -0,0 +1,164 @@
+"""Deletes temporary bot messages (warnings, cooldown notices) once they expire."""
+
+import asyncio
+import heapq
+import json
+import logging
+import os
+import time
+import discord
+from bot.config import REAPER_BATCH_SECONDS, REAPER_SAVE_FILE, REAPER_SAVE_SECONDS
+
+log = logging.getLogger(__name__)
+
+_BULK_DELETE_LIMIT = 100  # Discord's cap per bulk delete request
+
+
+async def delete_batch(channel, messages: list, reason: str | None = None) -> None:
+    """
+    Delete messages from one channel, in bulk where the channel supports it.
+
+    ``messages`` can be full or partial messages. If a bulk request is
+    rejected (e.g. one message is already gone or older than 14 days) its
+    messages are deleted one at a time instead.
+    """
+    if len(messages) == 1 or not hasattr(channel, 'delete_messages'):
+        for message in messages:
+            await _delete_one(channel, message)
+        return
+
+    for i in range(0, len(messages), _BULK_DELETE_LIMIT):
+        chunk = messages[i:i + _BULK_DELETE_LIMIT]
+        try:
+            await channel.delete_messages(chunk, reason=reason)
+        except discord.Forbidden:
+            log.warning("Missing permissions to delete messages in %s", channel)
+            return
+        except discord.HTTPException:
+            for message in chunk:
+                await _delete_one(channel, message)
+
+
+async def _delete_one(channel, message) -> None:
+    try:
+        await message.delete()
+    except discord.Forbidden:
+        log.warning("Missing permissions to delete message in %s", channel)
+    except discord.NotFound:
+        # Message was already deleted
+        pass
+
+
+class MessageReaper:
+    """
+    One background task that deletes messages when they expire.
+
+    Pending deletions are kept in a min-heap of (expires_at, channel_id,
+    message_id) and saved to ``save_file`` so messages posted right before
+    a restart are still cleaned up afterwards. Saves happen on a worker
+    thread, at most once every ``save_interval`` seconds, so a burst of
+    warnings shares one write. Messages that expire within
+    ``batch_window`` seconds of each other are deleted together, one bulk
+    request per channel.
+    """
+
+    def __init__(self, bot, save_file: str | None = REAPER_SAVE_FILE, batch_window: float = REAPER_BATCH_SECONDS,
+                 save_interval: float = REAPER_SAVE_SECONDS):
+        self.bot = bot
+        self.save_file = save_file
+        self.batch_window = batch_window
+        self.save_interval = save_interval
+        self._heap: list[tuple[float, int, int]] = []
+        self._wakeup = asyncio.Event()
+        self._dirty = False
+        self._save_after = 0.0  # monotonic time before which a save waits
+        self._task: asyncio.Task | None = None
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def start(self) -> None:
+        """Load deletions left over from the last run and start reaping (once)."""
+        if self._task is not None:
+            return
+        for entry in self._load():
+            heapq.heappush(self._heap, entry)
+        self._task = asyncio.create_task(self._run())
+
+    def schedule(self, message: discord.Message, delay: float) -> None:
+        """Delete ``message`` after ``delay`` seconds."""
+        # Wall-clock time so the deadline still means something after a restart
+        heapq.heappush(self._heap, (time.time() + delay, message.channel.id, message.id))
+        self._dirty = True
+        self._wakeup.set()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                if self._dirty and time.monotonic() >= self._save_after:
+                    await self._save()
+                timeout = self._heap[0][0] - time.time() if self._heap else None
+                if timeout is None or timeout > 0:
+                    if self._dirty:
+                        # Wake up for the save that was held back
+                        save_in = max(0.0, self._save_after - time.monotonic())
+                        timeout = save_in if timeout is None else min(timeout, save_in)
+                    self._wakeup.clear()
+                    try:
+                        await asyncio.wait_for(self._wakeup.wait(), timeout)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+
+                # Everything due now, plus what is about to be, in one round
+                cutoff = time.time() + self.batch_window
+                due: dict[int, list[int]] = {}
+                while self._heap and self._heap[0][0] <= cutoff:
+                    _, channel_id, message_id = heapq.heappop(self._heap)
+                    due.setdefault(channel_id, []).append(message_id)
+                self._dirty = True
+
+                await asyncio.gather(*(self._reap(channel_id, ids) for channel_id, ids in due.items()))
+            except Exception as e:
+                log.exception("Error in message reaper: %s", e)
+                await asyncio.sleep(5)
+
+    async def _reap(self, channel_id: int, message_ids: list[int]) -> None:
+        channel = self.bot.get_channel(channel_id)
+        if channel is None:
+            try:
+                channel = await self.bot.fetch_channel(channel_id)
+            except (discord.NotFound, discord.Forbidden):
+                # Channel is gone or hidden from us; nothing left to clean up
+                return
+        messages = [channel.get_partial_message(message_id) for message_id in message_ids]
+        await delete_batch(channel, messages)
+
+    # Persistence
+
+    def _load(self) -> list[tuple[float, int, int]]:
+        if not self.save_file or not os.path.exists(self.save_file):
+            return []
+        try:
+            with open(self.save_file) as f:
+                return [(float(at), int(channel_id), int(message_id)) for at, channel_id, message_id in json.load(f)]
+        except (OSError, ValueError, TypeError) as e:
+            log.warning("⚠️ Ignoring unreadable pending deletions file: %s", e)
+            return []
+
+    async def _save(self) -> None:
+        self._dirty = False
+        self._save_after = time.monotonic() + self.save_interval
+        if not self.save_file:
+            return
+        # Snapshot on the loop; the worker thread only encodes and writes it
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self._write, list(self._heap))
+
+    def _write(self, pending: list[tuple[float, int, int]]) -> None:
+        try:
+            with open(self.save_file + '.tmp', 'w') as f:
+                json.dump(pending, f)
+            os.replace(self.save_file + '.tmp', self.save_file)
+        except OSError as e:
+            log.warning("⚠️ Could not save pending deletions: %s", e)
@@ -0,0 +1,136 @@
+"""Gives the Member role to members whose verification token was just used."""
+
+import asyncio
+import datetime
+import logging
+import discord
+from bot.config import (
+    ROLE_GRANT_POLL_SECONDS, ROLE_GRANT_CONCURRENCY, ROLE_GRANT_LOOKBACK_MINUTES, ROLE_GRANT_MAX_ATTEMPTS,
+)
+from bot.event_store import parse_timestamp
+from bot.helpers import get_roles
+from bot.metrics import ROLE_GRANTS
+
+log = logging.getLogger(__name__)
+
+_RETRY_SECONDS = (2, 5, 15, 30, 60)
+
+
+class VerifiedRoleGranter:
+    """
+    Swaps Unverified for Member once the website marks a token as used.
+
+    Polls discord_verification_tokens every ``interval`` seconds for used
+    tokens whose expiry is within the last ``lookback`` minutes (a token
+    can only be used before it expires, so that window catches every
+    newly used one, through the expires_at index). Token ids already seen
+    are remembered, so each verification is handled once.
+
+    Grants are queued and applied by ``concurrency`` workers, one
+    ``member.edit(roles=...)`` per member; discord.py's per-route buckets
+    pace the workers, so a wave of verifications waits on the rate limit
+    instead of running into it. Members who already have the right roles
+    (e.g. granted by the website, or before a restart) cost no REST call.
+    A grant that still fails is retried with backoff.
+    """
+
+    def __init__(self, bot, supabase, interval: float = ROLE_GRANT_POLL_SECONDS,
+                 concurrency: int = ROLE_GRANT_CONCURRENCY, lookback_minutes: float = ROLE_GRANT_LOOKBACK_MINUTES):
+        self.bot = bot
+        self.supabase = supabase
+        self.interval = interval
+        self.concurrency = concurrency
+        self.lookback = datetime.timedelta(minutes=lookback_minutes)
+        self._seen: dict[int, datetime.datetime] = {}  # token id -> expires_at
+        self._queued: set[tuple[int, int]] = set()  # (guild id, user id) waiting or in progress
+        self._queue: asyncio.Queue[tuple[int, int, int]] = asyncio.Queue()  # (guild id, user id, attempt)
+
+    async def run(self) -> None:
+        """Background loop: start the workers, then poll for used tokens."""
+        for _ in range(self.concurrency):
+            asyncio.create_task(self._worker())
+        while True:
+            try:
+                await self.poll()
+            except Exception as e:
+                log.error("Error polling used verification tokens: %s", e)
+            await asyncio.sleep(self.interval)
+
+    async def poll(self) -> int:
+        """Queue grants for newly used tokens; returns how many were queued."""
+        now = datetime.datetime.now(datetime.timezone.utc)
+        rows = await self.supabase.fetch_used_verification_tokens(now - self.lookback)
+        queued = 0
+        for row in rows:
+            if row['id'] in self._seen:
+                continue
+            self._seen[row['id']] = parse_timestamp(row['expires_at'])
+            key = (int(row['guild_id']), int(row['discord_user_id']))
+            if key not in self._queued:
+                self._queued.add(key)
+                self._queue.put_nowait((*key, 1))
+                queued += 1
+
+        # Tokens that have left the polling window can't show up again
+        cutoff = now - self.lookback
+        for token_id in [token_id for token_id, expires_at in self._seen.items() if expires_at < cutoff]:
+            del self._seen[token_id]
+
+        if queued:
+            log.info("Queued %d Member role grant(s)", queued)
+        return queued
+
+    async def _worker(self) -> None:
+        while True:
+            guild_id, user_id, attempt = await self._queue.get()
+            try:
+                result = await self._grant(guild_id, user_id)
+                ROLE_GRANTS.labels(result).inc()
+                self._queued.discard((guild_id, user_id))
+            except discord.HTTPException as e:
+                retryable = e.status == 429 or e.status >= 500
+                if retryable and attempt < ROLE_GRANT_MAX_ATTEMPTS:
+                    delay = _RETRY_SECONDS[min(attempt, len(_RETRY_SECONDS)) - 1]
+                    log.warning("Role grant for %s failed (%s), retrying in %ds", user_id, e.status, delay)
+                    asyncio.get_running_loop().call_later(
+                        delay, self._queue.put_nowait, (guild_id, user_id, attempt + 1)
+                    )
+                else:
+                    log.error("Could not give Member role to %s: %s", user_id, e)
+                    ROLE_GRANTS.labels("failed").inc()
+                    self._queued.discard((guild_id, user_id))
+            except Exception:
+                log.exception("Error giving Member role to %s", user_id)
+                ROLE_GRANTS.labels("failed").inc()
+                self._queued.discard((guild_id, user_id))
+            finally:
+                self._queue.task_done()
+
+    async def _grant(self, guild_id: int, user_id: int) -> str:
+        """Apply the role swap with one edit; returns "granted" or "skipped"."""
+        guild = self.bot.get_guild(guild_id)
+        if guild is None:
+            return "skipped"
+        member = guild.get_member(user_id)
+        if member is None:
+            try:
+                member = await guild.fetch_member(user_id)
+            except discord.NotFound:
+                # Left the server before the grant
+                return "skipped"
+
+        unverified, member_role = get_roles(guild)
+        if member_role is None:
+            log.warning("Member role not found in %s", guild.name)
+            return "skipped"
+
+        current = [role for role in member.roles if not role.is_default()]
+        roles = [role for role in current if role != unverified]
+        if member_role not in roles:
+            roles.append(member_role)
+        if set(roles) == set(current):
+            return "skipped"
+
+        await member.edit(roles=roles, reason="Completed verification")
+        log.info("Gave Member role to %s", member)
+        return "granted"
@@ -0,0 +1,138 @@
+"""Live per-guild index of Discord scheduled events, kept current from gateway events."""
+
+import re
+import discord
+
+# Zero-width chars for invisible sync ID encoding (not shown in event description)
+_ZWSP = '\u200B'   # zero-width space
+_ZWNJ = '\u200C'   # zero-width non-joiner
+_SYNC_START = '\u200D\u200B'  # ZWJ+ZWSP = invisible start marker
+_SYNC_END = '\u200D\u200C'    # ZWJ+ZWNJ = invisible end marker
+
+_SYNC_TAG_RE = re.compile(re.escape(_SYNC_START) + r'([\u200B\u200C]{128})' + re.escape(_SYNC_END))
+_LEGACY_SYNC_TAG_RE = re.compile(r'\[sync:([a-f0-9\-]+)\]')
+
+
+def sync_tag(supabase_id: str) -> str:
+    """Return an invisible tag embedded in Discord event descriptions to track the Supabase source ID."""
+    hex_str = supabase_id.replace('-', '').lower()
+    encoded = []
+    for c in hex_str:
+        n = int(c, 16)
+        for i in range(4):
+            encoded.append(_ZWNJ if (n >> (3 - i)) & 1 else _ZWSP)
+    return _SYNC_START + ''.join(encoded) + _SYNC_END
+
+
+def extract_sync_id(description: str | None) -> str | None:
+    """Extract the Supabase event ID from the invisible sync tag in a Discord event description."""
+    if not description:
+        return None
+    # Try invisible format first
+    if _SYNC_START in description:
+        m = _SYNC_TAG_RE.search(description)
+        if m:
+            bits = m.group(1)
+            hex_chars = []
+            for i in range(0, 128, 4):
+                nibble = sum((1 if bits[i + j] == _ZWNJ else 0) << (3 - j) for j in range(4))
+                hex_chars.append(f'{nibble:x}')
+            h = ''.join(hex_chars)
+            if len(h) == 32:
+                return f'{h[:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:32]}'
+    # Fallback: old visible format [sync:uuid] for backward compatibility
+    m = _LEGACY_SYNC_TAG_RE.search(description)
+    return m.group(1) if m else None
+
+
+def _name_time_key(event) -> tuple:
+    return (event.name, event.start_time.isoformat() if event.start_time else None)
+
+
+class GuildEventIndex:
+    """Scheduled events of one guild, looked up by sync id or by (name, start time)."""
+
+    def __init__(self):
+        self.by_sync_id: dict[str, discord.ScheduledEvent] = {}
+        # Fallback map for events created before sync tags were added
+        self.by_name_time: dict[tuple, discord.ScheduledEvent] = {}
+        self._entries: dict[int, tuple] = {}  # discord event id -> (event, sync_id, key)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def add(self, event) -> None:
+        previous = self._entries.get(event.id)
+        # The sync tag only changes with the description, so decode once per revision of it
+        if previous and previous[0].description == event.description:
+            sync_id = previous[1]
+        else:
+            sync_id = extract_sync_id(event.description)
+        self.discard(event.id)
+
+        key = _name_time_key(event)
+        self._entries[event.id] = (event, sync_id, key)
+        if sync_id:
+            self.by_sync_id[sync_id] = event
+        self.by_name_time[key] = event
+
+    def discard(self, event_id: int) -> None:
+        entry = self._entries.pop(event_id, None)
+        if entry is None:
+            return
+        event, sync_id, key = entry
+        if sync_id and self.by_sync_id.get(sync_id) is event:
+            del self.by_sync_id[sync_id]
+        if self.by_name_time.get(key) is event:
+            del self.by_name_time[key]
+
+
+class ScheduledEventIndex:
+    """
+    Per-guild scheduled-event index shared by the sync.
+
+    Each guild is seeded with one ``fetch_scheduled_events()`` call the first
+    time it is needed; after that it is kept current by the gateway handlers
+    (``on_scheduled_event_create/update/delete``) and by the sync itself as
+    it creates/edits events, so regular syncs never list events over REST.
+    """
+
+    def __init__(self):
+        self._guilds: dict[int, GuildEventIndex] = {}
+
+    async def for_guild(self, guild) -> GuildEventIndex:
+        """The guild's index, seeding it over REST if this is the first use."""
+        index = self._guilds.get(guild.id)
+        if index is None:
+            index = GuildEventIndex()
+            for event in await guild.fetch_scheduled_events():
+                index.add(event)
+            # Gateway events that arrived while we were fetching are newer; keep them
+            current = self._guilds.get(guild.id)
+            if current is not None:
+                return current
+            self._guilds[guild.id] = index
+        return index
+
+    def upsert(self, event) -> None:
+        """Record a created/updated event; finished or cancelled ones are dropped."""
+        index = self._guilds.get(event.guild_id)
+        if index is None:
+            # Not seeded yet; the seed will pick it up
+            return
+        if event.status in (discord.EventStatus.completed, discord.EventStatus.canceled):
+            index.discard(event.id)
+        else:
+            index.add(event)
+
+    def remove(self, event) -> None:
+        index = self._guilds.get(event.guild_id)
+        if index is not None:
+            index.discard(event.id)
+
+    def forget_guild(self, guild_id: int) -> None:
+        self._guilds.pop(guild_id, None)
+
+    def reset(self) -> None:
+        """Drop everything so each guild is re-seeded (e.g. after a fresh gateway session)."""
+        self._guilds.clear()
@@ -0,0 +1,229 @@
+"""Verification tokens: issued from memory, written to Supabase behind, and cleaned up."""
+
+import asyncio
+import datetime
+import logging
+import random
+import secrets
+import time
+from typing import NamedTuple
+from bot.config import (
+    TOKEN_EXPIRY_MINUTES, VERIFY_TOKEN_MIN_REMAINING_SECONDS, VERIFY_TOKEN_BATCH_SIZE, VERIFY_TOKEN_FLUSH_SECONDS,
+    VERIFY_TOKEN_STORE_TIMEOUT_SECONDS,
+    TOKEN_GC_INTERVAL_SECONDS, TOKEN_GC_JITTER, TOKEN_GC_BATCH_SIZE, TOKEN_GC_TIME_BUDGET_SECONDS,
+    TOKEN_GC_USED_RETENTION_DAYS,
+)
+from bot.metrics import TOKENS_REMOVED
+
+log = logging.getLogger(__name__)
+
+_RETRY_SECONDS = (1, 2, 5, 10, 30)
+
+
+class IssuedToken(NamedTuple):
+    token: str
+    expires_at: datetime.datetime  # aware, UTC
+    expires_mono: float  # time.monotonic() deadline, for cheap cache checks
+
+
+class VerificationTokens:
+    """
+    Hands out verification tokens, writing them to Supabase in batches.
+
+    Each (guild, user) has one active token, kept in memory and returned
+    again on every click until fewer than VERIFY_TOKEN_MIN_REMAINING_SECONDS
+    of its lifetime are left. New tokens are queued, and one background
+    writer inserts them in multi-row batches of up to ``batch_size``,
+    waiting ``flush_interval`` seconds to gather a batch. ``stored()`` waits
+    for one token's batch, so a link is only handed out once the Edge
+    Function can find its token; concurrent clicks still share one insert.
+    A batch that fails is retried with backoff until its tokens expire; if
+    a token can't be stored, it is dropped from memory so the next click
+    issues a fresh one.
+    """
+
+    def __init__(self, supabase, lifetime_minutes: float = TOKEN_EXPIRY_MINUTES,
+                 batch_size: int = VERIFY_TOKEN_BATCH_SIZE, flush_interval: float = VERIFY_TOKEN_FLUSH_SECONDS):
+        self.supabase = supabase
+        self.lifetime = lifetime_minutes * 60
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._active: dict[tuple[int, int], IssuedToken] = {}
+        self._pending: list[tuple[tuple[int, int], IssuedToken]] = []
+        # Tokens not written yet -> resolved with whether they were stored
+        self._waiters: dict[str, asyncio.Future] = {}
+        self._wakeup = asyncio.Event()
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        """Start the background writer (no-op if it is already running)."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    def issue(self, guild_id: int, user_id: int) -> IssuedToken:
+        """The member's active token, or a new one queued for insertion."""
+        key = (guild_id, user_id)
+        now = time.monotonic()
+        current = self._active.get(key)
+        if current is not None and current.expires_mono - now >= VERIFY_TOKEN_MIN_REMAINING_SECONDS:
+            return current
+
+        issued = IssuedToken(
+            secrets.token_urlsafe(32),
+            datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(seconds=self.lifetime),
+            now + self.lifetime,
+        )
+        self._active[key] = issued
+        self._pending.append((key, issued))
+        self._waiters[issued.token] = asyncio.get_running_loop().create_future()
+        self._idle.clear()
+        self._wakeup.set()
+        return issued
+
+    async def stored(self, issued: IssuedToken, timeout: float = VERIFY_TOKEN_STORE_TIMEOUT_SECONDS) -> bool:
+        """Wait until ``issued`` is in Supabase; False if it was given up on or ``timeout`` passed first."""
+        waiter = self._waiters.get(issued.token)
+        if waiter is None:
+            # Settled already; issue() stops handing out tokens that failed
+            return True
+        if self._task is None or self._task.done():
+            await self.flush()
+        try:
+            return await asyncio.wait_for(asyncio.shield(waiter), timeout)
+        except asyncio.TimeoutError:
+            return False
+
+    async def flush(self) -> None:
+        """Wait until every queued token has been written (or given up on)."""
+        if self._task is None or self._task.done():
+            await self._write_pending()
+        else:
+            await self._idle.wait()
+
+    async def _run(self) -> None:
+        while True:
+            await self._wakeup.wait()
+            # Let a join wave accumulate into one request
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self._write_pending()
+            except Exception:
+                log.exception("Error writing verification tokens")
+
+    async def _write_pending(self) -> None:
+        self._wakeup.clear()
+        while self._pending:
+            batch = self._pending[:self.batch_size]
+            del self._pending[:self.batch_size]
+            await self._insert(batch)
+        self._prune()
+        self._idle.set()
+
+    async def _insert(self, batch: list[tuple[tuple[int, int], IssuedToken]]) -> None:
+        for attempt, delay in enumerate((*_RETRY_SECONDS, None)):
+            now = time.monotonic()
+            self._settle([item for item in batch if item[1].expires_mono <= now], False)
+            batch = [(key, issued) for key, issued in batch if issued.expires_mono > now]
+            if not batch:
+                return
+            try:
+                await self.supabase.insert_verification_tokens([
+                    {
+                        "discord_user_id": str(user_id),
+                        "guild_id": str(guild_id),
+                        "token": issued.token,
+                        "expires_at": issued.expires_at.isoformat().replace("+00:00", "Z"),
+                    }
+                    for (guild_id, user_id), issued in batch
+                ])
+                log.info("Stored %d verification token(s)", len(batch))
+                self._settle(batch, True)
+                return
+            except Exception as e:
+                if delay is None:
+                    break
+                log.warning("Could not store %d verification token(s) (attempt %d), retrying in %ds: %s",
+                            len(batch), attempt + 1, delay, e)
+                await asyncio.sleep(delay)
+
+        log.error("Giving up on %d verification token(s)", len(batch))
+        for key, issued in batch:
+            if self._active.get(key) is issued:
+                del self._active[key]
+        self._settle(batch, False)
+
+    def _settle(self, batch: list[tuple[tuple[int, int], IssuedToken]], stored: bool) -> None:
+        for _, issued in batch:
+            waiter = self._waiters.pop(issued.token, None)
+            if waiter is not None and not waiter.done():
+                waiter.set_result(stored)
+
+    def _prune(self) -> None:
+        now = time.monotonic()
+        for key in [key for key, issued in self._active.items() if issued.expires_mono <= now]:
+            del self._active[key]
+
+
+class StaleTokenCollector:
+    """
+    Keeps discord_verification_tokens small by deleting tokens nobody can use.
+
+    Removes unused tokens past their expiry and used tokens older than
+    ``used_retention_days``. Each run selects and deletes ``batch_size`` rows
+    at a time, oldest first, and stops when nothing is left or after
+    ``time_budget`` seconds (the rest waits for the next run). Runs are
+    spaced ``interval`` seconds apart with +/- ``jitter`` (a fraction of the
+    interval) so restarts of several instances don't line up.
+    """
+
+    def __init__(self, supabase, interval: float = TOKEN_GC_INTERVAL_SECONDS, jitter: float = TOKEN_GC_JITTER,
+                 batch_size: int = TOKEN_GC_BATCH_SIZE, time_budget: float = TOKEN_GC_TIME_BUDGET_SECONDS,
+                 used_retention_days: float = TOKEN_GC_USED_RETENTION_DAYS):
+        self.supabase = supabase
+        self.interval = interval
+        self.jitter = jitter
+        self.batch_size = batch_size
+        self.time_budget = time_budget
+        self.used_retention = datetime.timedelta(days=used_retention_days)
+
+    def _next_delay(self) -> float:
+        return self.interval * (1 + random.uniform(-self.jitter, self.jitter))
+
+    async def run(self) -> None:
+        """Background loop. The first run comes within ``jitter`` of an interval so
+        frequent restarts still get to clean up, but not right at startup."""
+        delay = self.interval * random.uniform(0, self.jitter)
+        while True:
+            await asyncio.sleep(delay)
+            try:
+                await self.collect()
+            except Exception as e:
+                log.error("Error removing stale verification tokens: %s", e)
+            delay = self._next_delay()
+
+    async def collect(self) -> int:
+        """One bounded cleanup pass; returns the number of rows removed."""
+        started = time.monotonic()
+        now = datetime.datetime.now(datetime.timezone.utc)
+        used_before = now - self.used_retention
+        removed = 0
+        finished = False
+        while time.monotonic() - started < self.time_budget:
+            ids = await self.supabase.fetch_stale_verification_token_ids(now, used_before, self.batch_size)
+            if ids:
+                await self.supabase.delete_verification_tokens(ids)
+                removed += len(ids)
+                TOKENS_REMOVED.inc(len(ids))
+            if len(ids) < self.batch_size:
+                finished = True
+                break
+
+        elapsed = time.monotonic() - started
+        if finished:
+            log.info("🧹 Removed %d stale verification token(s) in %.1fs", removed, elapsed)
+        else:
+            log.warning("🧹 Removed %d stale verification token(s) in %.1fs; time budget reached, "
+                        "the rest will be removed on the next run", removed, elapsed)
+        return removed
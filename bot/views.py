@@ -1,116 +1,108 @@
 """Discord UI components (views, selects, buttons)."""
 
+import logging
 import discord
-import secrets
-import datetime
 from bot.helpers import get_roles
-from bot.config import VERIFY_CHANNEL_ID, VERIFICATION_URL_BASE, TOKEN_EXPIRY_MINUTES
+from bot.config import VERIFY_CHANNEL_ID, VERIFICATION_URL_BASE, ROLE_CATEGORIES
 
-class YearSelect(discord.ui.Select):
-    def __init__(self):
-        options = [
-            discord.SelectOption(label="Freshman"),
-            discord.SelectOption(label="Sophomore"),
-            discord.SelectOption(label="Junior"),
-            discord.SelectOption(label="Senior"),
-            discord.SelectOption(label="Grad"),
-            discord.SelectOption(label="Alumni"),
-        ]
+log = logging.getLogger(__name__)
+
+
+class RolePickerSelect(discord.ui.Select):
+    """
+    Dropdown for one ROLE_CATEGORIES entry; a member holds at most one of its roles.
+
+    The new role set is worked out locally and applied with a single
+    ``member.edit(roles=...)`` after the interaction has been answered.
+    Role names are resolved to ids per guild and then looked up by id; the
+    guild's roles are scanned again while any of the category's roles is
+    missing, so a role created later is picked up.
+    """
+
+    def __init__(self, category: str):
+        self.category = category
+        config = ROLE_CATEGORIES[category]
+        self.role_names: list[str] = list(config["roles"])
+        self._role_ids: dict[int, dict[str, int]] = {}  # guild id -> role name -> role id
 
         super().__init__(
-            placeholder="Select your year...",
+            placeholder=config["placeholder"],
             min_values=1,
             max_values=1,
-            options=options,
-            custom_id="year_select_menu"  # must stay same for persistence
+            options=[discord.SelectOption(label=name) for name in self.role_names],
+            custom_id=config["custom_id"]  # must stay same for persistence
         )
 
+    def _category_roles(self, guild: discord.Guild) -> dict[str, discord.Role]:
+        """This category's roles in the guild, by name (roles that don't exist are left out)."""
+        ids = self._role_ids.get(guild.id)
+        if ids is not None and len(ids) == len(self.role_names):
+            roles = {name: guild.get_role(role_id) for name, role_id in ids.items()}
+            # Still valid unless a role was deleted or renamed since
+            if all(role is not None and role.name == name for name, role in roles.items()):
+                return roles
+        wanted = set(self.role_names)
+        roles = {role.name: role for role in guild.roles if role.name in wanted}
+        self._role_ids[guild.id] = {name: role.id for name, role in roles.items()}
+        return roles
+
     async def callback(self, interaction: discord.Interaction):
         chosen = self.values[0]
+        member = interaction.user
+        category_roles = self._category_roles(interaction.guild)
 
-        role = discord.utils.get(interaction.guild.roles, name=chosen)
-
+        role = category_roles.get(chosen)
         if role is None:
             return await interaction.response.send_message(
                 "That role does not exist — please tell an officer.",
                 ephemeral=True
             )
 
-        year_names = ["Freshman", "Sophomore", "Junior", "Senior", "Grad", "Alumni"]
-        for r in interaction.user.roles:
-            if r.name in year_names:
-                await interaction.user.remove_roles(r)
-
-        await interaction.user.add_roles(role)
+        exclusive = {r.id for r in category_roles.values()}
+        current = [r for r in member.roles if not r.is_default()]
+        roles = [r for r in current if r.id not in exclusive] + [role]
 
         await interaction.response.send_message(
             f"You have been assigned the **{role.name}** role.",
             ephemeral=True
         )
+        if {r.id for r in roles} == {r.id for r in current}:
+            return
 
-class YearView(discord.ui.View):
-    def __init__(self):
-        super().__init__(timeout=None)
-        self.add_item(YearSelect())
-
-class MajorSelect(discord.ui.Select):
-    def __init__(self):
-        options = [
-            discord.SelectOption(label="Biology"),
-            discord.SelectOption(label="Biomedical Engineering"),
-            discord.SelectOption(label="Chemistry"),
-            discord.SelectOption(label="Computer Engineering"),
-            discord.SelectOption(label="Computer Science"),
-            discord.SelectOption(label="Electrical Engineering"),
-            discord.SelectOption(label="Mechanical Engineering"),
-        ]
-
-        super().__init__(
-            placeholder="Select your major...",
-            min_values=1,
-            max_values=1,
-            options=options,
-            custom_id="major_select_menu"  # must stay same for persistence
-        )
-
-    async def callback(self, interaction: discord.Interaction):
-        chosen = self.values[0]
-
-        role = discord.utils.get(interaction.guild.roles, name=chosen)
-
-        if role is None:
-            return await interaction.response.send_message(
-                "That role does not exist — please tell an officer.",
+        try:
+            await member.edit(roles=roles, reason=f"Picked {self.category} role")
+        except discord.HTTPException as e:
+            log.warning("Could not set %s role for %s: %s", self.category, member, e)
+            await interaction.followup.send(
+                "Your role could not be updated — please tell an officer.",
                 ephemeral=True
             )
 
-        major_names = ["Biology", "Biomedical Engineering", "Chemistry", "Computer Engineering", "Computer Science", "Electrical Engineering", "Mechanical Engineering"]
-        for r in interaction.user.roles:
-            if r.name in major_names:
-                await interaction.user.remove_roles(r)
 
-        await interaction.user.add_roles(role)
+class RolePickerView(discord.ui.View):
+    def __init__(self, category: str):
+        super().__init__(timeout=None)
+        self.add_item(RolePickerSelect(category))
 
-        await interaction.response.send_message(
-            f"You have been assigned the **{role.name}** role.",
-            ephemeral=True
-        )
 
+class YearView(RolePickerView):
+    def __init__(self):
+        super().__init__("year")
 
-class MajorView(discord.ui.View):
+
+class MajorView(RolePickerView):
     def __init__(self):
-        super().__init__(timeout=None)
-        self.add_item(MajorSelect())
+        super().__init__("major")
 
 
 class VerifyView(discord.ui.View):
-    def __init__(self, supabase_client=None):
+    def __init__(self, tokens=None):
         super().__init__(timeout=None)
-        self.supabase = supabase_client
+        self.tokens = tokens  # bot.verification_tokens (None without Supabase)
 
     @discord.ui.button(label="Verify", style=discord.ButtonStyle.blurple, custom_id="embs_verify_button")
     async def verify_button(self, interaction: discord.Interaction, button: discord.ui.Button):
-        """Create a verification token row in Supabase and DM/reply a URL."""
+        """Reply with a verification URL once its token is stored in Supabase."""
         guild = interaction.guild
         user = interaction.user
 
@@ -128,36 +120,28 @@ class VerifyView(discord.ui.View):
             )
             return
 
-        # 1) generate a random token
-        token = secrets.token_urlsafe(32)
-        expires_at = datetime.datetime.utcnow() + datetime.timedelta(minutes=TOKEN_EXPIRY_MINUTES)
-
-        # 2) insert into Supabase
-        if self.supabase is None:
+        if self.tokens is None:
             await interaction.response.send_message(
                 "Verification is not available. Supabase is not configured.",
                 ephemeral=True,
             )
             return
-        
-        try:
-            self.supabase.table("discord_verification_tokens").insert({
-                "discord_user_id": str(user.id),
-                "guild_id": str(guild.id),
-                "token": token,
-                "expires_at": expires_at.isoformat() + "Z",
-            }).execute()
-        except Exception as e:
-            print("Supabase insert error:", e)
-            await interaction.response.send_message(
-                "Could not start verification right now. Please try again later.",
+
+        # 1) reuse the member's active token or issue one, and wait for its
+        #    batch to be written so the link works when clicked; a write can
+        #    take longer than Discord waits for a response, so defer first
+        await interaction.response.defer(ephemeral=True, thinking=True)
+        issued = self.tokens.issue(guild.id, user.id)
+        if not await self.tokens.stored(issued):
+            await interaction.followup.send(
+                "Sorry, your verification link couldn't be created right now. Please click Verify again in a minute.",
                 ephemeral=True,
             )
             return
 
-        # 3) build URL and send to user
-        url = f"{VERIFICATION_URL_BASE}?token={token}"
-        await interaction.response.send_message(
+        # 2) build URL and send to user
+        url = f"{VERIFICATION_URL_BASE}?token={issued.token}"
+        await interaction.followup.send(
             f"Click this link to complete CAPTCHA verification:\n{url}",
             ephemeral=True,
         )
@@ -0,0 +1,115 @@
+"""Reloads the moderation word lists from Supabase without a redeploy."""
+
+import asyncio
+import hashlib
+import json
+import logging
+from words.BANNED_WORDS import bad_words
+from words.ALLOWED_WORDS import chill_profane_words
+from words.SPAM_WORDS import spam_words
+from bot.config import WORD_LIST_POLL_SECONDS
+from bot.helpers import ALLOWED, BANNED, WordLists, active_word_lists, install_word_lists
+
+log = logging.getLogger(__name__)
+
+SPAM = "spam"
+# PostgREST/Postgres error codes for a table that does not exist
+_MISSING_TABLE_CODES = {"PGRST205", "42P01"}
+
+
+def _parse_rows(rows: list[dict]) -> tuple[list[str], list[str], dict[str, int]]:
+    banned, allowed, spam = [], [], {}
+    for row in rows:
+        word = (row.get('word') or '').strip()
+        kind = (row.get('list') or '').strip().lower()
+        if not word:
+            continue
+        if kind == BANNED:
+            banned.append(word)
+        elif kind == ALLOWED:
+            allowed.append(word)
+        elif kind == SPAM:
+            try:
+                spam[word] = int(row.get('weight') or 1)
+            except (TypeError, ValueError):
+                log.warning("⚠️ Ignoring spam phrase %r with invalid weight %r", word, row.get('weight'))
+        else:
+            log.warning("⚠️ Ignoring moderation word %r with unknown list %r", word, kind)
+    return banned, allowed, spam
+
+
+def _is_missing_table(error: Exception) -> bool:
+    return getattr(error, 'code', None) in _MISSING_TABLE_CODES
+
+
+def _fingerprint(rows: list[dict]) -> str:
+    """Order-independent hash of the table contents."""
+    canonical = sorted(json.dumps(row, sort_keys=True) for row in rows)
+    return hashlib.sha256(json.dumps(canonical).encode()).hexdigest()
+
+
+class WordListReloader:
+    """
+    Keeps the active word lists in sync with the ``moderation_words`` table.
+
+    Rows are (word, list, weight) with list one of "banned", "allowed" or
+    "spam" (weight only matters for spam). The table is polled every
+    ``interval`` seconds; when its contents change, the new lists are
+    compiled on a worker thread and then swapped in with a single
+    assignment, so messages being checked keep the snapshot they started
+    with. A list with no rows in the table uses the built-in one from
+    words/*.py, so an empty (or partly filled) table never disables a filter.
+    A missing table is treated like an empty one (the schema is in README.md).
+    """
+
+    def __init__(self, supabase, interval: float = WORD_LIST_POLL_SECONDS):
+        self.supabase = supabase
+        self.interval = interval
+        # The built-in lists are what an empty table means, so start from that
+        self._fingerprint = _fingerprint([])
+        self._lock = asyncio.Lock()
+        self._warned_missing = False
+
+    async def run(self) -> None:
+        """Background loop: load now, then poll for changes."""
+        while True:
+            try:
+                await self.reload()
+            except Exception as e:
+                # Keep moderating with the lists we have
+                log.error("Error reloading word lists: %s", e)
+            await asyncio.sleep(self.interval)
+
+    async def reload(self, force: bool = False) -> bool:
+        """Fetch the lists and install them if they changed (or ``force``); True if swapped."""
+        async with self._lock:
+            rows = await self._fetch_rows()
+            fingerprint = _fingerprint(rows)
+            if fingerprint == self._fingerprint and not force:
+                return False
+
+            banned, allowed, spam = _parse_rows(rows)
+            version = active_word_lists().version + 1
+            source = "supabase" if rows else "built-in"
+            loop = asyncio.get_running_loop()
+            lists = await loop.run_in_executor(None, lambda: WordLists(
+                banned or bad_words, allowed or chill_profane_words, spam or spam_words,
+                version=version, source=source,
+            ))
+
+            install_word_lists(lists)
+            self._fingerprint = fingerprint
+            counts = ", ".join(f"{count} {kind}" for kind, count in lists.counts.items())
+            log.info("✅ Word lists v%d loaded from %s: %s", lists.version, lists.source, counts)
+            return True
+
+    async def _fetch_rows(self) -> list[dict]:
+        try:
+            return await self.supabase.fetch_word_lists()
+        except Exception as e:
+            if not _is_missing_table(e):
+                raise
+            if not self._warned_missing:
+                log.warning("⚠️ No moderation_words table in Supabase, using the built-in word lists")
+                self._warned_missing = True
+            return []
@@ -4,13 +4,18 @@ import discord
 from discord.ext import commands
 import logging
 import asyncio
+import sys
 from dotenv import load_dotenv
 import os
 from supabase import create_client, Client
 from bot.events import setup_events
 from bot.commands import setup_commands
-from bot.config import DATA_DIR
-import traceback
+from bot.config import DATA_DIR, METRICS_PORT
+from bot.http import close_session
+from bot.logs import setup_logging
+from bot.metrics import MetricsServer, discord_trace_config
+
+log = logging.getLogger("main")
 
 # Load environment variables
 load_dotenv()
@@ -29,8 +34,8 @@ intents = discord.Intents.default()
 intents.members = True
 intents.message_content = True
 
-# Create bot instance
-bot = commands.Bot(command_prefix='!', intents=intents)
+# Create bot instance; REST calls are traced for the metrics endpoint
+bot = commands.Bot(command_prefix='!', intents=intents, http_trace=discord_trace_config())
 
 # Store supabase credentials on bot for later initialization
 bot.supabase_url = SUPABASE_URL
@@ -47,6 +52,17 @@ async def safe_bot_close():
         await bot.close()
     except Exception:
         pass
+    if bot.verification_tokens is not None:
+        try:
+            await asyncio.wait_for(bot.verification_tokens.flush(), timeout=5)
+        except Exception:
+            pass
+    if bot.supabase is not None:
+        bot.supabase.close()
+    try:
+        await close_session()
+    except Exception:
+        pass
 
 
 async def start_bot_with_retry():
@@ -56,104 +72,102 @@ async def start_bot_with_retry():
 
     for attempt in range(max_retries):
         try:
-            _log(f"🚀 Starting Discord bot (attempt {attempt + 1}/{max_retries})...")
+            log.info("🚀 Starting Discord bot (attempt %d/%d)...", attempt + 1, max_retries)
             await bot.start(DISCORD_TOKEN)
             break  # If successful, exit the loop
 
         except discord.LoginFailure as e:
-            _log(f"❌ CRITICAL ERROR: Discord login failed! Check your DISCORD_TOKEN.")
-            _log(f"   Error details: {e}")
+            log.critical("❌ CRITICAL ERROR: Discord login failed! Check your DISCORD_TOKEN.")
+            log.critical("   Error details: %s", e)
             await safe_bot_close()
             return  # Don't retry on auth failures
 
         except discord.PrivilegedIntentsRequired as e:
-            _log(f"❌ CRITICAL ERROR: Privileged intents required but not enabled!")
-            _log(f"   Error details: {e}")
-            _log("   Enable 'Server Members Intent' and 'Message Content Intent' in your bot settings.")
+            log.critical("❌ CRITICAL ERROR: Privileged intents required but not enabled!")
+            log.critical("   Error details: %s", e)
+            log.critical("   Enable 'Server Members Intent' and 'Message Content Intent' in your bot settings.")
             await safe_bot_close()
             return  # Don't retry on intent failures
 
         except discord.HTTPException as e:
-            _log(f"❌ Discord HTTPException: status={e.status} response={e.text!r}")
+            log.error("❌ Discord HTTPException: status=%s response=%r", e.status, e.text)
             if e.status == 429:  # Rate limited
                 if attempt < max_retries - 1:
                     wait_time = base_delay * (2 ** attempt)
-                    _log(f"⏳ Rate limited (429)! Waiting {wait_time} seconds before retry...")
-                    _log(f"   (Attempt {attempt + 1}/{max_retries})")
+                    log.warning("⏳ Rate limited (429)! Waiting %d seconds before retry...", wait_time)
+                    log.warning("   (Attempt %d/%d)", attempt + 1, max_retries)
                     await asyncio.sleep(wait_time)
                 else:
-                    _log(f"❌ Maximum retry attempts reached. Rate limit persists.")
-                    _log(f"   Please wait several hours before redeploying.")
+                    log.error("❌ Maximum retry attempts reached. Rate limit persists.")
+                    log.error("   Please wait several hours before redeploying.")
                     await safe_bot_close()
                     return
             else:
                 if attempt < max_retries - 1:
                     wait_time = 30
-                    _log(f"⏳ Retrying in {wait_time} seconds...")
+                    log.info("⏳ Retrying in %d seconds...", wait_time)
                     await asyncio.sleep(wait_time)
                 else:
                     await safe_bot_close()
                     return
 
         except Exception as e:
-            _log(f"❌ Unexpected error starting Discord bot: {type(e).__name__}: {e}")
-            _log("   Full traceback:")
-            traceback.print_exc()
-            import sys
-            sys.stdout.flush()
-            sys.stderr.flush()
+            log.exception("❌ Unexpected error starting Discord bot: %s: %s", type(e).__name__, e)
             if attempt < max_retries - 1:
                 wait_time = 30
-                _log(f"⏳ Retrying in {wait_time} seconds...")
+                log.info("⏳ Retrying in %d seconds...", wait_time)
                 await asyncio.sleep(wait_time)
             else:
-                _log("   Maximum retry attempts reached.")
+                log.error("   Maximum retry attempts reached.")
                 await safe_bot_close()
                 return
 
-def _log(msg: str, flush: bool = True) -> None:
-    """Print and flush so Render logs show output immediately."""
-    print(msg, flush=flush)
+
+async def run_bot() -> None:
+    """Serve metrics (when enabled) for as long as the bot runs."""
+    metrics_server = MetricsServer() if METRICS_PORT is not None else None
+    if metrics_server is not None:
+        try:
+            await metrics_server.start()
+        except OSError as e:
+            log.warning("⚠️ Metrics server not started: %s", e)
+            metrics_server = None
+    try:
+        await start_bot_with_retry()
+    finally:
+        if metrics_server is not None:
+            await metrics_server.stop()
 
 
 # Run the bot
 if __name__ == "__main__":
-    import sys
-    # Force line-buffered stdout so deploy logs show every line immediately
-    if hasattr(sys.stdout, "reconfigure"):
-        sys.stdout.reconfigure(line_buffering=True)
-
-    print("=" * 50, flush=True)
-    print("🔧 MAIN.PY STARTED", flush=True)
-    print("=" * 50, flush=True)
+    # Set up logging first so everything after this goes through the log writer
+    try:
+        setup_logging()
+    except OSError as e:
+        # e.g. discord.log not writable: keep console logging
+        setup_logging(log_file=None)
+        log.warning("⚠️ Could not open the log file, logging to the console only: %s", e)
+
+    log.info("🔧 main.py started")
     
     # Defensive check for Discord token
     if not DISCORD_TOKEN:
-        print("❌ CRITICAL ERROR: DISCORD_TOKEN environment variable is missing!", flush=True)
-        print("   Please set DISCORD_TOKEN in your environment variables or .env file.", flush=True)
-        exit(1)
-    
-    print("✅ Discord token found", flush=True)
-
-    # Set up logging
-    print("📝 Setting up logging...", flush=True)
-    try:
-        handler = logging.FileHandler(filename='discord.log', encoding='utf-8', mode='w')
-        print("✅ Logging setup complete!", flush=True)
-    except Exception as e:
-        print(f"⚠️ Logging setup failed: {e}", flush=True)
+        log.critical("❌ CRITICAL ERROR: DISCORD_TOKEN environment variable is missing!")
+        log.critical("   Please set DISCORD_TOKEN in your environment variables or .env file.")
+        sys.exit(1)
     
-    print("🤖 Starting Discord bot...", flush=True)
+    log.info("✅ Discord token found")
+    log.info("🤖 Starting Discord bot...")
     
     # Run the Discord bot with retry logic
     try:
-        asyncio.run(start_bot_with_retry())
-        print("✅ asyncio.run() completed", flush=True)
+        asyncio.run(run_bot())
+        log.info("✅ asyncio.run() completed")
     except KeyboardInterrupt:
-        print("👋 Bot stopped by user", flush=True)
+        log.info("👋 Bot stopped by user")
     except Exception as e:
-        print(f"❌ Fatal error in main loop: {e}", flush=True)
-        traceback.print_exc()
-        exit(1)
+        log.exception("❌ Fatal error in main loop: %s", e)
+        sys.exit(1)
     
-    print("🏁 Main.py execution complete", flush=True)
\ No newline at end of file
+    log.info("🏁 Main.py execution complete")
\ No newline at end of file
@@ -0,0 +1,74 @@
+"""EventStore: noticing deleted events between full reloads."""
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+from bot.event_store import EventStore
+
+
+class _Supabase:
+    def __init__(self, rows: list[dict]):
+        self.rows = {row['id']: row for row in rows}
+
+    async def fetch_latest_event_update(self):
+        return max((row['updated_at'] for row in self.rows.values()), default=None)
+
+    async def fetch_upcoming_events(self, start, end):
+        return [row for row in self.rows.values() if start <= datetime.fromisoformat(row['start_time']) <= end]
+
+    async def fetch_upcoming_event_ids(self, start, end):
+        return [row['id'] for row in await self.fetch_upcoming_events(start, end)]
+
+    async def fetch_events_updated_since(self, updated_at):
+        return [row for row in self.rows.values() if row['updated_at'] > updated_at]
+
+    async def fetch_events_by_ids(self, event_ids):
+        return [self.rows[event_id] for event_id in event_ids if event_id in self.rows]
+
+    async def fetch_event(self, event_id):
+        return self.rows.get(event_id)
+
+    async def fetch_sent_reminders(self, event_ids):
+        return []
+
+
+def _row(event_id: str, days: int) -> dict:
+    start = datetime.now(timezone.utc) + timedelta(days=days)
+    return {'id': event_id, 'name': f"Event {event_id}", 'start_time': start.isoformat(),
+            'updated_at': "2026-01-01T00:00:00+00:00"}
+
+
+def test_delta_refresh_drops_hard_deleted_events():
+    supabase = _Supabase([_row("a", 2), _row("b", 3)])
+    store = EventStore(supabase, ttl=0, full_interval=3600)
+
+    async def scenario():
+        await store.ensure_fresh()
+        assert [event.id for event in await store.upcoming()] == ["a", "b"]
+        # Hard delete: updated_at can't move, so only the id sweep sees it
+        del supabase.rows["a"]
+        revision = store.revision
+        await store.ensure_fresh()
+        return revision, [event.id for event in await store.upcoming()]
+
+    revision, upcoming = asyncio.run(scenario())
+    assert upcoming == ["b"]
+    assert store.changes_since(revision)[1] == ["a"]
+
+
+def test_confirm_rejects_deleted_and_edited_events():
+    supabase = _Supabase([_row("a", 2), _row("b", 3), _row("c", 4)])
+    store = EventStore(supabase, ttl=3600)
+
+    async def scenario():
+        await store.ensure_fresh()
+        a, b, c = await store.upcoming()
+        generation = store.generation
+        del supabase.rows["a"]
+        supabase.rows["b"] = {**supabase.rows["b"], 'name': "Renamed"}
+        return [await store.confirm(a), await store.confirm(b), await store.confirm(c)], generation
+
+    confirmed, generation = asyncio.run(scenario())
+    assert confirmed == [False, False, True]
+    assert store.cached("a") is None
+    assert store.cached("b").name == "Renamed"
+    assert store.generation > generation
@@ -0,0 +1,103 @@
+"""Scheduled-event sync: failed pushes are retried on the next run."""
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+import pytest
+import bot.events
+from bot.event_store import EventRecord
+from bot.events import _SyncState, sync_discord_scheduled_events_once
+
+NOW = datetime.now(timezone.utc)
+
+
+class _Store:
+    window = timedelta(days=30)
+
+    def __init__(self, events):
+        self.records = {event.id: event for event in events}
+        self.revision = 1
+
+    async def ensure_fresh(self):
+        pass
+
+    async def upcoming(self):
+        return list(self.records.values())
+
+    def changes_since(self, revision):
+        return [], [], self.revision
+
+    def cached(self, event_id):
+        return self.records.get(event_id)
+
+    async def existing_ids(self, event_ids):
+        return set(event_ids)
+
+
+class _Index:
+    def __init__(self, fail: int = 0):
+        self.fail = fail
+
+    async def for_guild(self, guild):
+        if self.fail:
+            self.fail -= 1
+            raise RuntimeError("discord unavailable")
+        return SimpleNamespace(by_sync_id={}, by_name_time={})
+
+
+def _bot(index: _Index):
+    return SimpleNamespace(guilds=[SimpleNamespace(id=1, name="Guild")], scheduled_index=index)
+
+
+@pytest.fixture(autouse=True)
+def _fresh_state(monkeypatch):
+    monkeypatch.setattr(bot.events, "_sync_state", _SyncState())
+
+
+def _pushes(monkeypatch, failures: set[str]):
+    pushed = []
+
+    async def upsert(guild, index, event, discord_event):
+        pushed.append(event.id)
+        if event.id in failures:
+            failures.discard(event.id)
+            raise RuntimeError("503 Service Unavailable")
+        return 'created'
+
+    monkeypatch.setattr(bot.events, "_upsert_scheduled_event", upsert)
+    return pushed
+
+
+def _event(event_id: str) -> EventRecord:
+    return EventRecord(id=event_id, name=f"Event {event_id}", start_time=NOW + timedelta(days=2))
+
+
+def test_failed_push_is_retried_on_the_next_delta_run(monkeypatch):
+    pushed = _pushes(monkeypatch, failures={"b"})
+    store = _Store([_event("a"), _event("b")])
+    sync_bot = _bot(_Index())
+
+    async def runs():
+        return [await sync_discord_scheduled_events_once(sync_bot, store) for _ in range(3)]
+
+    first, second, third = asyncio.run(runs())
+    assert first.full and first.guilds[0].failed_ids == {"b"}
+    assert not second.full and second.created == 1 and not second.errors
+    # Nothing left to retry
+    assert third.guilds == []
+    assert sorted(pushed) == ["a", "b", "b"]
+
+
+def test_guild_failure_forces_a_full_run(monkeypatch):
+    pushed = _pushes(monkeypatch, failures=set())
+    store = _Store([_event("a")])
+    sync_bot = _bot(_Index(fail=1))
+
+    async def runs():
+        return [await sync_discord_scheduled_events_once(sync_bot, store) for _ in range(3)]
+
+    first, second, third = asyncio.run(runs())
+    assert first.guilds[0].needs_full
+    assert second.full and second.created == 1
+    assert not third.full and third.guilds == []
+    assert pushed == ["a"]
@@ -0,0 +1,75 @@
+"""The combined per-user/per-channel limit on the fun commands."""
+
+import asyncio
+from types import SimpleNamespace
+from discord.ext import commands
+from bot.fun import FunCommandOnCooldown, fun_cooldown
+
+
+class _Bot:
+    _before_invoke = None
+
+    async def can_run(self, ctx, *, call_once=False):
+        return True
+
+
+def _command(user_rate, channel_rate) -> commands.Command:
+    async def fun(ctx):
+        pass
+
+    return commands.Command(fun_cooldown(user_rate, channel_rate)(fun), name="fun")
+
+
+def _ctx(user_id: int, channel_id: int = 1):
+    author = SimpleNamespace(id=user_id)
+    message = SimpleNamespace(author=author, channel=SimpleNamespace(id=channel_id), guild=None)
+    return SimpleNamespace(author=author, message=message, bot=_Bot(), command=None)
+
+
+def _attempt(command, ctx):
+    """None if the call is allowed, otherwise the cooldown error."""
+    try:
+        asyncio.run(command.call_before_hooks(ctx))
+    except FunCommandOnCooldown as error:
+        return error
+    return None
+
+
+def test_user_retries_do_not_use_up_the_channel():
+    command = _command((1, 60.0), (3, 60.0))
+    assert _attempt(command, _ctx(1)) is None
+    for _ in range(5):
+        assert _attempt(command, _ctx(1)).type == commands.BucketType.user
+    # Only user 1's first call was charged to the channel
+    assert _attempt(command, _ctx(2)) is None
+    assert _attempt(command, _ctx(3)) is None
+    assert _attempt(command, _ctx(4)).type == commands.BucketType.channel
+
+
+def test_user_is_notified_once_per_window():
+    command = _command((1, 60.0), (10, 60.0))
+    assert _attempt(command, _ctx(1)) is None
+    notices = [_attempt(command, _ctx(1)).notify for _ in range(4)]
+    assert notices == [True, False, False, False]
+    # Another user gets their own notice
+    assert _attempt(command, _ctx(2)) is None
+    assert _attempt(command, _ctx(2)).notify is True
+
+
+def test_channel_limit_is_silent_and_per_channel():
+    command = _command((1, 60.0), (1, 60.0))
+    assert _attempt(command, _ctx(1, channel_id=1)) is None
+    error = _attempt(command, _ctx(2, channel_id=1))
+    assert error.type == commands.BucketType.channel
+    assert error.notify is False
+    # The user was not charged for the call the channel limit refused
+    assert _attempt(command, _ctx(2, channel_id=2)) is None
+
+
+def test_can_run_does_not_charge_the_buckets():
+    # The default help command calls can_run on every command it lists
+    command = _command((1, 60.0), (1, 60.0))
+    ctx = _ctx(1)
+    for _ in range(5):
+        assert asyncio.run(command.can_run(ctx)) is True
+    assert _attempt(command, ctx) is None
@@ -0,0 +1,97 @@
+"""WordMatcher and the spam/profanity checks built on it."""
+
+import random
+import re
+import pytest
+from words.BANNED_WORDS import bad_words
+from words.ALLOWED_WORDS import chill_profane_words
+from words.SPAM_WORDS import spam_words
+from bot.helpers import check_profanity, score_spam
+from bot.matcher import WordMatcher
+from bot.normalize import normalize_text
+
+_FILLER = "hey anyone going to the meeting tonight class pass freedom lol the demo is next week".split()
+
+
+class _FindMatcher(WordMatcher):
+    FIND_MAX_WORDS = 10 ** 9
+
+
+class _AutomatonMatcher(WordMatcher):
+    FIND_MAX_WORDS = -1
+
+
+def _standalone(text: str, word: str) -> bool:
+    """The baseline word-boundary check: an occurrence with no letter/digit on either side."""
+    for match in re.finditer(re.escape(word), text):
+        start, end = match.span()
+        if (start == 0 or not text[start - 1].isalnum()) and (end == len(text) or not text[end].isalnum()):
+            return True
+    return False
+
+
+def _messages(words: list[str], count: int = 300, seed: int = 0) -> list[str]:
+    rng = random.Random(seed)
+    messages = []
+    for _ in range(count):
+        parts = [rng.choice(_FILLER) for _ in range(rng.randint(1, 12))]
+        for _ in range(rng.randint(0, 3)):
+            parts.insert(rng.randrange(len(parts) + 1), rng.choice(words))
+        glue = rng.choice([" ", " ", ", ", "\n"])
+        messages.append(glue.join(parts))
+    return messages
+
+
+@pytest.mark.parametrize("matcher_class", [_FindMatcher, _AutomatonMatcher])
+def test_scan_finds_every_occurrence(matcher_class):
+    matcher = matcher_class([("ass", "a"), ("asses", "b"), ("dm me", "c"), ("me", "d")])
+    hits = [(hit.start, hit.end, hit.word, hit.standalone) for hit in matcher.scan("class asses dm me")]
+    assert hits == [
+        (2, 5, "ass", False),
+        (6, 9, "ass", False),
+        (6, 11, "asses", True),
+        (12, 17, "dm me", True),
+        (15, 17, "me", True),
+    ]
+
+
+def test_scan_strategies_agree():
+    words = sorted({normalize_text(word) for word in [*bad_words, *chill_profane_words, *spam_words]})
+    find = _FindMatcher((word, i) for i, word in enumerate(words))
+    automaton = _AutomatonMatcher((word, i) for i, word in enumerate(words))
+    for message in _messages(words) + ["assass", "dm me dm me", "free freedom free"]:
+        text = normalize_text(message)
+        assert find.scan(text) == automaton.scan(text), message
+
+
+def test_later_labels_win():
+    matcher = WordMatcher([("prick", "banned"), ("prick", "allowed")])
+    assert [hit.label for hit in matcher.scan("prick")] == ["allowed"]
+
+
+def test_score_spam_matches_phrase_by_phrase_scan():
+    for message in _messages(list(spam_words), seed=1):
+        text = normalize_text(message)
+        expected = {phrase: weight for phrase, weight in spam_words.items() if _standalone(text, normalize_text(phrase))}
+        score = score_spam(message)
+        assert score.hits == expected, message
+        assert score.score == sum(expected.values())
+
+
+def test_check_profanity_matches_word_by_word_scan():
+    allowed = {normalize_text(word) for word in chill_profane_words}
+    banned = {normalize_text(word) for word in bad_words} - allowed
+    for message in _messages([*bad_words, *chill_profane_words], seed=2):
+        text = normalize_text(message)
+        if any(_standalone(text, word) for word in banned):
+            expected = (True, "banned_word")
+        elif any(_standalone(text, word) for word in allowed):
+            expected = (False, "allowed")
+        else:
+            expected = (False, "clean")
+        assert check_profanity(message) == expected, message
+
+
+def test_substrings_do_not_count():
+    assert score_spam("freedom of speech").hits == {}
+    assert check_profanity("first class passes") == (False, "clean")
@@ -0,0 +1,83 @@
+"""ModerationPipeline: the prefilter, the offloaded path and the caches."""
+
+import asyncio
+import random
+from words.BANNED_WORDS import bad_words
+from words.ALLOWED_WORDS import chill_profane_words
+from words.SPAM_WORDS import spam_words
+from bot.helpers import active_word_lists
+from bot.moderation import (
+    CACHE, EXECUTOR, MATCHER, PREFILTER, FloodDetector, ModerationPipeline, VerdictCache, _full_check,
+)
+from bot.normalize import normalize
+
+_FILLER = "hey anyone going to the meeting tonight class pass freedom lol the demo is next week".split()
+
+
+def _messages(count: int = 400, seed: int = 0) -> list[str]:
+    rng = random.Random(seed)
+    pool = [*bad_words, *chill_profane_words, *spam_words]
+    messages = []
+    for _ in range(count):
+        parts = [rng.choice(_FILLER) for _ in range(rng.randint(1, 10))]
+        for _ in range(rng.choice([0, 0, 1, 3, 6])):
+            parts.insert(rng.randrange(len(parts) + 1), rng.choice(pool))
+        message = " ".join(parts)
+        messages.append(message.upper() if rng.random() < 0.2 else message)
+    return messages
+
+
+def _classify(pipeline: ModerationPipeline, text: str, profanity: bool = True):
+    return asyncio.run(pipeline.classify(text, profanity))
+
+
+def test_prefilter_never_changes_the_outcome():
+    lists = active_word_lists()
+    pipeline = ModerationPipeline(cache=VerdictCache(max_size=0))
+    for message in _messages():
+        for profanity in (True, False):
+            verdict = _classify(pipeline, message, profanity)
+            full = _full_check(normalize(message, lists.leet_words), lists, True, profanity)
+            assert (verdict.is_spam, verdict.is_banned) == (full.is_spam, full.is_banned), message
+    assert pipeline.stats.stages[PREFILTER] > 0
+    assert pipeline.stats.stages[MATCHER] > 0
+
+
+def test_long_messages_get_the_same_verdicts_off_the_loop():
+    inline = ModerationPipeline(offload_chars=10 ** 9, cache=VerdictCache(max_size=0))
+    offloaded = ModerationPipeline(offload_chars=0, cache=VerdictCache(max_size=0))
+    for message in _messages(seed=1):
+        assert _classify(inline, message) == _classify(offloaded, message), message
+    assert offloaded.stats.stages[EXECUTOR] > 0
+    assert offloaded.stats.stages[MATCHER] == 0
+
+
+def test_repeated_long_message_is_answered_from_the_cache():
+    pipeline = ModerationPipeline(offload_chars=100)
+    paste = "selling tickets dm me brand new perfect condition " * 10
+    first = _classify(pipeline, paste)
+    assert first.is_spam
+    assert _classify(pipeline, paste) == first
+    assert pipeline.stats.stages[EXECUTOR] == 1
+    assert pipeline.stats.stages[CACHE] == 1
+
+
+def test_verdict_cache_evicts_least_recently_used():
+    cache = VerdictCache(max_size=2)
+    lists = active_word_lists()
+    keys = [cache.key(normalize(text), True, lists) for text in ("one", "two", "three")]
+    verdict = _classify(ModerationPipeline(), "hello")
+    cache.put(keys[0], verdict)
+    cache.put(keys[1], verdict)
+    cache.get(keys[0])
+    cache.put(keys[2], verdict)
+    assert cache.get(keys[0]) is verdict
+    assert cache.get(keys[1]) is None
+
+
+def test_flood_detector_flags_bursts_per_member():
+    flood = FloodDetector(max_messages=3, window=5.0)
+    assert [flood.record(1, 1, now) for now in (0.0, 1.0, 2.0)] == [False, False, True]
+    assert flood.record(1, 2, 2.5) is False
+    # The oldest of the last three is more than 5s old again
+    assert flood.record(1, 1, 8.0) is False
@@ -0,0 +1,73 @@
+"""Text normalization: leet folding, the fold table and span mapping."""
+
+import time
+import pytest
+from bot.helpers import active_word_lists, check_profanity
+from bot.normalize import _FoldTable, normalize, normalize_text
+
+
+@pytest.mark.parametrize("text", [
+    "!" * 10000,
+    "1" * 10000,
+    "a1" * 5000,
+    "a" * 9999 + "1",
+    "s p " * 5000,
+])
+def test_hostile_input_normalizes_in_linear_time(text):
+    leet_words = active_word_lists().leet_words
+    start = time.perf_counter()
+    normalize_text(text)
+    normalize(text, leet_words)
+    # Linear work is a few milliseconds here; the old pattern took seconds
+    assert time.perf_counter() - start < 0.5
+
+
+def test_leet_only_folds_into_listed_words():
+    leet_words = active_word_lists().leet_words
+    assert normalize("sp1c", leet_words).text == "spic"
+    assert normalize("n1gg3r", leet_words).text == "nigger"
+    assert normalize("c0de", leet_words).text == "c0de"
+    assert normalize("I got a 5pic", leet_words).text == "i got a 5pic"
+
+
+def test_leet_false_positives_are_not_flagged():
+    assert check_profanity("I got a 5pic") == (False, "clean")
+    assert check_profanity("meet at 5pm in room 101") == (False, "clean")
+    assert check_profanity("sp1c") == (True, "banned_word")
+    assert check_profanity("5p1c") == (True, "banned_word")
+
+
+def test_punctuation_around_words_is_kept():
+    assert normalize_text("hell!!!") == "hell!!!"
+    assert normalize_text("!!!sh!t") == "!!!shit"
+
+
+def test_fold_table_covers_lookalike_letters():
+    # Fullwidth and mathematical letters are folded on first use
+    assert normalize_text("ｓｐａｍ") == "spam"
+    assert normalize_text("𝐬𝐩𝐚𝐦") == "spam"
+
+
+def test_span_maps_back_to_the_original():
+    leet_words = active_word_lists().leet_words
+    original = "well ＳＰ1Ｃ there"
+    normalized = normalize(original, leet_words)
+    start = normalized.text.index("spic")
+    assert normalized.span(start, start + 4) == (5, 9)
+
+
+def test_fold_table_stays_bounded():
+    table = _FoldTable(max_unchanged=100)
+    cjk = ''.join(chr(cp) for cp in range(0x4E00, 0x4E00 + 20000))
+    assert cjk.translate(table) == cjk
+    assert len(table) == 100
+    # Characters that fold are still cached past the limit
+    assert "ＳＰＡＭ".translate(table) == "spam"
+    assert len(table) == 104
+
+
+def test_spaced_letters_and_space_runs():
+    assert normalize_text("f u c k off") == "fuck off"
+    assert normalize_text("s.p.a.m in t-i-m-e") == "spam in time"
+    assert normalize_text("i am a b") == "i am a b"
+    assert normalize_text("hi   there\n\nyou") == "hi there you"
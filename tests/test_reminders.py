@@ -0,0 +1,62 @@
+"""Reminder planning: which reminders go on the heap and in what order."""
+
+import heapq
+from datetime import datetime, timedelta, timezone
+from bot.event_store import EventRecord
+from bot.events import _plan_reminders
+
+NOW = datetime(2026, 3, 1, 12, 0, tzinfo=timezone.utc)
+
+
+class _Store:
+    def __init__(self, sent=(), unknown=()):
+        self.sent = set(sent)
+        self.unknown = set(unknown)
+
+    def reminders_known(self, event_id: str) -> bool:
+        return event_id not in self.unknown
+
+    def reminder_sent(self, event_id: str, reminder_type: str) -> bool:
+        return (event_id, reminder_type) in self.sent
+
+
+def _event(event_id: str, starts_in: timedelta) -> EventRecord:
+    return EventRecord(id=event_id, name=f"Event {event_id}", start_time=NOW + starts_in)
+
+
+def _drain(heap: list) -> list[tuple[datetime, str, str]]:
+    return [(fire_time, event.id, code) for fire_time, _, event, _, code in
+            (heapq.heappop(heap) for _ in range(len(heap)))]
+
+
+def test_every_interval_is_planned_in_fire_order():
+    a = _event("a", timedelta(days=6))
+    b = _event("b", timedelta(days=2))
+    planned = _drain(_plan_reminders(_Store(), [a, b]))
+    assert planned == [
+        (b.start_time - timedelta(days=5), "b", "5d"),
+        (a.start_time - timedelta(days=5), "a", "5d"),
+        (b.start_time - timedelta(days=1), "b", "1d"),
+        (b.start_time - timedelta(hours=2), "b", "2h"),
+        (a.start_time - timedelta(days=1), "a", "1d"),
+        (a.start_time - timedelta(hours=2), "a", "2h"),
+    ]
+
+
+def test_sent_reminders_are_not_planned_again():
+    event = _event("a", timedelta(days=3))
+    planned = _drain(_plan_reminders(_Store(sent={("a", "5d"), ("a", "1d")}), [event]))
+    assert [code for _, _, code in planned] == ["2h"]
+
+
+def test_events_with_unknown_sent_reminders_are_skipped():
+    known = _event("a", timedelta(days=3))
+    unknown = _event("b", timedelta(days=3))
+    planned = _drain(_plan_reminders(_Store(unknown={"b"}), [known, unknown]))
+    assert {event_id for _, event_id, _ in planned} == {"a"}
+
+
+def test_same_fire_time_does_not_compare_events():
+    # Identical start times must not fall through to comparing EventRecords
+    events = [_event(str(i), timedelta(days=2)) for i in range(5)]
+    assert len(_drain(_plan_reminders(_Store(), events))) == 15
@@ -0,0 +1,87 @@
+"""Verification tokens: batched writes and waiting for a token to be stored."""
+
+import asyncio
+import pytest
+import bot.verification
+from bot.verification import VerificationTokens
+
+
+class _Supabase:
+    def __init__(self, failures: int = 0, delay: float = 0.0):
+        self.failures = failures
+        self.delay = delay
+        self.inserts: list[list[dict]] = []
+
+    async def insert_verification_tokens(self, rows: list[dict]) -> None:
+        await asyncio.sleep(self.delay)
+        self.inserts.append(rows)
+        if self.failures:
+            self.failures -= 1
+            raise RuntimeError("supabase unavailable")
+
+
+@pytest.fixture(autouse=True)
+def _fast_retries(monkeypatch):
+    monkeypatch.setattr(bot.verification, "_RETRY_SECONDS", (0, 0))
+
+
+def _tokens(supabase: _Supabase) -> VerificationTokens:
+    tokens = VerificationTokens(supabase, flush_interval=0.01)
+    tokens.start()
+    return tokens
+
+
+def test_concurrent_clicks_share_one_insert():
+    supabase = _Supabase()
+
+    async def clicks():
+        tokens = _tokens(supabase)
+        issued = [tokens.issue(1, user_id) for user_id in (1, 2, 3, 1)]
+        assert issued[0] is issued[3]
+        results = await asyncio.gather(*(tokens.stored(token) for token in issued))
+        # Already written: a later click gets the same token without waiting
+        again = tokens.issue(1, 1)
+        return issued, results, again, await tokens.stored(again)
+
+    issued, results, again, stored_again = asyncio.run(clicks())
+    assert results == [True] * 4
+    assert [len(rows) for rows in supabase.inserts] == [3]
+    assert again is issued[0] and stored_again is True
+
+
+def test_failed_insert_is_retried():
+    supabase = _Supabase(failures=1)
+
+    async def click():
+        tokens = _tokens(supabase)
+        return await tokens.stored(tokens.issue(1, 1))
+
+    assert asyncio.run(click()) is True
+    assert len(supabase.inserts) == 2
+    assert supabase.inserts[0] == supabase.inserts[1]
+
+
+def test_token_is_dropped_after_giving_up():
+    supabase = _Supabase(failures=10)
+
+    async def clicks():
+        tokens = _tokens(supabase)
+        first = tokens.issue(1, 1)
+        stored = await tokens.stored(first)
+        return first, stored, tokens.issue(1, 1)
+
+    first, stored, second = asyncio.run(clicks())
+    assert stored is False
+    # Every attempt plus the last one after the final backoff
+    assert len(supabase.inserts) == 3
+    assert second.token != first.token
+
+
+def test_wait_is_bounded():
+    supabase = _Supabase(delay=1.0)
+
+    async def click():
+        tokens = _tokens(supabase)
+        return await tokens.stored(tokens.issue(1, 1), timeout=0.05)
+
+    assert asyncio.run(click()) is False
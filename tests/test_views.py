@@ -0,0 +1,42 @@
+"""RolePickerSelect: resolving a category's role names to guild roles."""
+
+from types import SimpleNamespace
+from bot.config import ROLE_CATEGORIES
+from bot.views import RolePickerSelect
+
+
+class _Guild:
+    def __init__(self, names):
+        self.id = 1
+        self.roles = []
+        for name in names:
+            self.add(name)
+
+    def add(self, name: str):
+        self.roles.append(SimpleNamespace(id=len(self.roles) + 100, name=name))
+
+    def get_role(self, role_id: int):
+        return next((role for role in self.roles if role.id == role_id), None)
+
+
+def test_role_created_after_first_lookup_is_found():
+    select = RolePickerSelect("year")
+    names = ROLE_CATEGORIES["year"]["roles"]
+    guild = _Guild(names[:-1])
+    assert names[-1] not in select._category_roles(guild)
+
+    guild.add(names[-1])
+    roles = select._category_roles(guild)
+    assert set(roles) == set(names)
+    # Complete now, so the cached ids are used from here on
+    assert select._role_ids[guild.id] == {name: role.id for name, role in roles.items()}
+
+
+def test_renamed_role_is_resolved_again():
+    select = RolePickerSelect("year")
+    names = ROLE_CATEGORIES["year"]["roles"]
+    guild = _Guild(names)
+    select._category_roles(guild)
+    guild.roles[0].name = "Old name"
+    guild.add(names[0])
+    assert select._category_roles(guild)[names[0]].id == guild.roles[-1].id
@@ -0,0 +1,43 @@
+"""Loading the moderation word lists from the moderation_words table."""
+
+import asyncio
+import logging
+from postgrest.exceptions import APIError
+from bot.wordlists import WordListReloader, _parse_rows
+
+
+class _MissingTable:
+    def __init__(self):
+        self.calls = 0
+
+    async def fetch_word_lists(self) -> list[dict]:
+        self.calls += 1
+        raise APIError({"code": "PGRST205", "message": "Could not find the table 'public.moderation_words'"})
+
+
+def test_bad_weights_skip_only_their_row(caplog):
+    rows = [
+        {"word": "dm me", "list": "spam", "weight": "3"},
+        {"word": "free", "list": "spam", "weight": "lots"},
+        {"word": "crypto", "list": "spam", "weight": [2]},
+        {"word": "giveaway", "list": "spam", "weight": None},
+        {"word": "heck", "list": "allowed", "weight": "n/a"},
+    ]
+    with caplog.at_level(logging.WARNING, logger="bot.wordlists"):
+        banned, allowed, spam = _parse_rows(rows)
+    assert spam == {"dm me": 3, "giveaway": 1}
+    assert allowed == ["heck"] and banned == []
+    assert len(caplog.records) == 2
+
+
+def test_missing_table_uses_built_in_lists_and_warns_once(caplog):
+    supabase = _MissingTable()
+    reloader = WordListReloader(supabase)
+
+    async def reload_twice():
+        return [await reloader.reload(), await reloader.reload()]
+
+    with caplog.at_level(logging.WARNING, logger="bot.wordlists"):
+        assert asyncio.run(reload_twice()) == [False, False]
+    assert supabase.calls == 2
+    assert len(caplog.records) == 1
@@ -1,21 +1,24 @@
 # Common spam words/phrases used in Discord spam messages
 # Based on typical spam patterns: selling tickets, giving away items, etc.
+# Each phrase maps to a weight; a message is spam once the weights of the
+# phrases it contains add up to SPAM_SCORE_THRESHOLD (see bot/config.py).
+# Strong phrases that rarely show up in normal chat get higher weights.
 
-spam_words = [
-    "giving out",
-    "giving away",
-    "free",
-    "dm if you are interested",
-    "dm me",
-    "interested",
-    "first come first serve",
-    "perfect condition",
-    "brand new",
-    "reselling",
-    "selling tickets",
-    "concert",
-    "kindly",
-    "send me a text",
-    "reach out to me",
-    "@everyone",
-]
+spam_words = {
+    "giving out": 2,
+    "giving away": 2,
+    "free": 1,
+    "dm if you are interested": 3,
+    "dm me": 2,
+    "interested": 1,
+    "first come first serve": 3,
+    "perfect condition": 2,
+    "brand new": 1,
+    "reselling": 2,
+    "selling tickets": 3,
+    "concert": 1,
+    "kindly": 1,
+    "send me a text": 3,
+    "reach out to me": 2,
+    "@everyone": 2,
+}